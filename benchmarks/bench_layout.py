@@ -0,0 +1,151 @@
+"""
+首次完整布局基准测试
+用合成的 2000 条封面数据打开海报墙，模拟用户滚动到底，测量所有卡片完成 Masonry 布局的时间：
+预计算宽高比（立即布局）vs 旧数据（每批等待 imagesLoaded）
+
+用法:
+    python benchmarks/bench_layout.py                     # 2000 张封面，每张图片 80ms 延迟
+    python benchmarks/bench_layout.py --items 500 --latency 0.2
+
+需要 playwright，且页面会从 unpkg 加载 Masonry / imagesLoaded（需联网）
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+
+# 1x1 GIF，作为所有封面图片
+PIXEL = bytes.fromhex("47494638396101000100800000ffffff00000021f90401000000002c00000000010001000002024401003b")
+
+# 常见封面比例：竖屏 9:16、3:4，横屏 16:9，方形
+ASPECTS = [(720, 1280), (720, 1280), (720, 1280), (810, 1080), (1280, 720), (1080, 1080)]
+
+
+def build_metadata(items: int, precomputed: bool) -> list:
+    rng = random.Random(42)
+    covers = []
+    for index in range(items):
+        width, height = rng.choice(ASPECTS)
+        cover = {
+            "id": str(7300000000000000000 + index),
+            "title": f"合成视频 {index}",
+            "author": f"作者{index % 50}",
+            "video_url": "",
+            "cover_url": "",
+            "local_cover": f"data/covers/bench/{index}.jpg",
+        }
+        if precomputed:
+            cover.update({
+                "width": width,
+                "height": height,
+                "aspect": round(width / height, 4),
+                "placeholder": f"#{rng.randrange(0x1000000):06x}",
+            })
+        covers.append(cover)
+    return covers
+
+
+class BenchHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/data/metadata.json":
+            self.send_body(self.server.metadata, "application/json")
+        elif path.startswith("/data/covers/bench/"):
+            time.sleep(self.server.latency)
+            self.send_body(PIXEL, "image/gif")
+        else:
+            super().do_GET()
+
+
+async def time_full_layout(browser, base_url: str, timeout: float) -> dict:
+    """打开海报墙并持续滚动到底，返回所有卡片完成布局时距导航开始的毫秒数"""
+    context = await browser.new_context(viewport={"width": 1440, "height": 900})  # 独立 localStorage
+    page = await context.new_page()
+    await page.goto(base_url + "/frontend/index.html", wait_until="domcontentloaded")
+    result = await page.evaluate('''async (timeout) => {
+        const deadline = performance.now() + timeout;
+        let firstBatch = null;
+        while (state.loadedCount < state.allCovers.length || state.allCovers.length === 0) {
+            if (performance.now() > deadline) break;
+            if (firstBatch === null && state.loadedCount > 0) firstBatch = performance.now();
+            // 模拟用户滚动到底部，触发下一批加载
+            window.scrollTo(0, document.body.scrollHeight);
+            if (!state.isLoading) loadNextBatch();
+            await new Promise(resolve => setTimeout(resolve, 16));
+        }
+        return {
+            done: state.loadedCount === state.allCovers.length,
+            loaded: state.loadedCount,
+            total: state.allCovers.length,
+            first_batch_ms: firstBatch,
+            full_layout_ms: performance.now(),
+        };
+    }''', timeout * 1000)
+    await context.close()
+    return result
+
+
+async def bench(items: int, latency: float, timeout: float):
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("❌ 需要 playwright：pip install playwright && python -m playwright install chromium")
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(BenchHandler, directory=str(PROJECT_DIR)))
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{items} 张封面, 每张图片延迟 {latency * 1000:.0f}ms\n")
+
+    results = {}
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            for name, precomputed in (("imagesLoaded", False), ("precomputed", True)):
+                server.metadata = json.dumps(build_metadata(items, precomputed), ensure_ascii=False).encode("utf-8")
+                results[name] = await time_full_layout(browser, base_url, timeout)
+            await browser.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"{'模式':<14}{'首批(ms)':>10}{'完整布局(ms)':>14}{'卡片':>12}")
+    for name, r in results.items():
+        first = f"{r['first_batch_ms']:.0f}" if r["first_batch_ms"] is not None else "-"
+        suffix = "" if r["done"] else "  (超时)"
+        print(f"{name:<14}{first:>10}{r['full_layout_ms']:>14.0f}{r['loaded']:>7}/{r['total']}{suffix}")
+    if all(r["done"] for r in results.values()):
+        print(f"\n预计算尺寸加速 {results['imagesLoaded']['full_layout_ms'] / results['precomputed']['full_layout_ms']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="海报墙首次完整布局耗时")
+    parser.add_argument("--items", type=int, default=2000, help="封面数量")
+    parser.add_argument("--latency", type=float, default=0.08, help="每张图片的响应延迟（秒）")
+    parser.add_argument("--timeout", type=float, default=300, help="单次测量超时（秒）")
+    args = parser.parse_args()
+    asyncio.run(bench(args.items, args.latency, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
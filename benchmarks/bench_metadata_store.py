@@ -0,0 +1,126 @@
+"""
+元数据存储后端基准测试
+用合成元数据对比三种写法在 1k / 10k / 50k 条时的耗时：
+    json-full: 旧做法，每次修改都读入并重写整个 metadata.json
+    json:      metadata.json 快照 + 操作日志（MetadataStore）
+    sqlite:    metadata.db，WAL + 索引（SqliteMetadataStore）
+
+测量项：
+    load:    冷启动读取全部卡片
+    update:  按 ID 修改一张卡片的标题
+    reorder: 把一张卡片拖到最前（move 操作）
+
+用法:
+    python benchmarks/bench_metadata_store.py
+    python benchmarks/bench_metadata_store.py --sizes 1000 10000 --ops 100
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from postwall.repository import open_repository  # noqa: E402
+
+
+def build_metadata(items: int) -> list:
+    rng = random.Random(42)
+    return [{
+        "id": str(7300000000000000000 + index),
+        "title": f"合成视频 {index} #标签{index % 97} #话题{index % 13}",
+        "author": f"作者{index % 500}",
+        "create_time": 1700000000 + rng.randrange(86400 * 365),
+        "video_url": f"https://www.douyin.com/video/{7300000000000000000 + index}",
+        "cover_url": f"https://p3-pc-sign.douyinpic.com/tos-cn-p-0015/{index:x}~tplv-dy-resize.jpeg?x-expires=1700000000",
+        "local_cover": f"data/covers/blobs/{index % 256:02x}/{index:064x}.jpg",
+        "width": 720, "height": 1280, "aspect": 0.5625, "placeholder": "#334455",
+    } for index in range(items)]
+
+
+class FullRewrite:
+    """旧做法：每次修改读入整个 JSON、改完再整体写回"""
+
+    def __init__(self, data_dir):
+        self.path = Path(data_dir) / "metadata.json"
+
+    def snapshot(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f), None
+
+    def apply(self, ops, base_version=None):
+        from postwall.metadata_store import apply_op
+        covers, _ = self.snapshot()
+        for op in ops:
+            covers = apply_op(covers, op)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(covers, f, ensure_ascii=False, indent=2)
+
+
+def open_backend(name: str, data_dir: Path):
+    if name == "json-full":
+        return FullRewrite(data_dir)
+    return open_repository(data_dir, name)
+
+
+def time_ms(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_backend(name: str, covers: list, ops: int) -> dict:
+    rng = random.Random(7)
+    ids = [c["id"] for c in covers]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        with open(data_dir / "metadata.json", "w", encoding="utf-8") as f:
+            json.dump(covers, f, ensure_ascii=False, indent=2)
+        setup = open_backend(name, data_dir)  # sqlite 在这里完成首次导入
+        setup.snapshot()
+        if hasattr(setup, "close"):
+            setup.close()
+
+        load = time_ms(lambda: open_backend(name, data_dir).snapshot())
+        repo = open_backend(name, data_dir)
+        repo.snapshot()
+
+        def commit(op):
+            # 服务器每次提交后都会刷新搜索索引（调用 snapshot），一并计时
+            repo.apply([op])
+            repo.snapshot()
+
+        update = [time_ms(lambda: commit({"op": "update", "id": rng.choice(ids), "fields": {"title": "新标题"}}))
+                  for _ in range(ops)]
+        reorder = [time_ms(lambda: commit({"op": "move", "id": rng.choice(ids), "to": 0}))
+                   for _ in range(ops)]
+        if hasattr(repo, "close"):
+            repo.close()
+    return {"load": load, "update": statistics.median(update), "reorder": statistics.median(reorder),
+            "update_p95": sorted(update)[int(len(update) * 0.95) - 1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元数据存储后端基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="卡片数量")
+    parser.add_argument("--ops", type=int, default=50, help="每种修改操作的次数")
+    parser.add_argument("--backends", nargs="+", default=["json-full", "json", "sqlite"], help="参与对比的后端")
+    args = parser.parse_args()
+
+    print(f"{'条数':>7}  {'后端':<10}{'load(ms)':>10}{'update(ms)':>12}{'p95':>9}{'reorder(ms)':>13}")
+    for size in args.sizes:
+        covers = build_metadata(size)
+        for name in args.backends:
+            r = bench_backend(name, covers, args.ops)
+            print(f"{size:>7}  {name:<10}{r['load']:>10.1f}{r['update']:>12.2f}{r['update_p95']:>9.2f}{r['reorder']:>13.2f}")
+        print()
+    print("update / reorder 为中位数，包含提交后的 snapshot()；json 后端每 200 次提交压缩一次快照，p95 反映压缩的摊还成本")
+
+
+if __name__ == "__main__":
+    main()
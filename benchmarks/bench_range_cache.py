@@ -0,0 +1,71 @@
+"""
+视频 Range 缓存基准测试
+模拟帧选择器里的反复拖动：同一组重叠 Range 请求播放多轮，对比每轮的耗时与回源字节数
+
+用法:
+    python benchmarks/bench_range_cache.py --rounds 3 --seeks 60
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from urllib.parse import quote
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+import run  # noqa: E402
+from fake_cdn import FakeCDN  # noqa: E402
+
+VIDEO_SIZE = 32 << 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频 Range 缓存基准测试")
+    parser.add_argument("--rounds", type=int, default=3, help="重复播放轮数")
+    parser.add_argument("--seeks", type=int, default=60, help="每轮拖动次数")
+    parser.add_argument("--delay", type=float, default=0.002, help="CDN 每 64KB 的延迟（秒）")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    seeks = []
+    for _ in range(args.seeks):
+        start = rng.randrange(0, VIDEO_SIZE - (2 << 20))
+        seeks.append(f"bytes={start}-{start + rng.randrange(64 << 10, 2 << 20)}")
+
+    cdn = FakeCDN({"/video.mp4": bytes(VIDEO_SIZE)}, chunk_delay=args.delay).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        run.VIDEO_CACHE_DIR = Path(tmp)
+        server = run.create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        url = f"{base}/proxy_video?url={quote(cdn.base_url + '/video.mp4', safe='')}"
+
+        previous = {"bytes_fetched": 0, "bytes_hit": 0}
+        for round_no in range(1, args.rounds + 1):
+            start = time.perf_counter()
+            served = 0
+            for byte_range in seeks:
+                req = urllib.request.Request(url, headers={"Range": byte_range})
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    served += len(resp.read())
+            elapsed = time.perf_counter() - start
+            with urllib.request.urlopen(f"{base}/api/proxy_stats") as resp:
+                stats = json.loads(resp.read())["cache"]
+            fetched = stats["bytes_fetched"] - previous["bytes_fetched"]
+            print(f"第 {round_no} 轮: {elapsed:.2f}s  返回 {served / 1e6:.1f}MB  回源 {fetched / 1e6:.1f}MB")
+            previous = stats
+
+        print(f"缓存: {stats['chunks']} chunks  {stats['total_bytes'] / 1e6:.1f}MB  "
+              f"命中 {stats['chunk_hits']}  未命中 {stats['chunk_misses']}")
+        server.graceful_shutdown(timeout=1.0)
+    cdn.stop()
+
+
+if __name__ == "__main__":
+    main()
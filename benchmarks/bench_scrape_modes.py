@@ -0,0 +1,204 @@
+"""
+采集模式基准测试
+用本地夹具页面模拟抖音收藏页（滚动到底部时请求收藏接口，接口带人工延迟），
+在无头 Chromium 中分别运行 DOM 模式与接口捕获模式，对比采集耗时
+
+用法:
+    python benchmarks/bench_scrape_modes.py                          # 由 data/metadata.json 或合成数据生成夹具
+    python benchmarks/bench_scrape_modes.py --fixture pages.json     # 使用录制的接口响应（[{aweme_list, has_more}, ...]）
+    python benchmarks/bench_scrape_modes.py --items 300 --latency 0.4
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+import run  # noqa: E402
+from postwall.scrape_capture import FavoritesCapture  # noqa: E402
+from postwall.scrape_state import ScrapeProgress  # noqa: E402
+
+
+FIXTURE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>收藏夹夹具</title>
+<style>
+  body { margin: 0; font-family: sans-serif; }
+  #list { display: grid; grid-template-columns: repeat(4, 200px); gap: 8px; }
+  #list a { display: block; height: 300px; background: #ddd; }
+  #list img { width: 200px; height: 260px; }
+</style></head>
+<body>
+<ul id="list"></ul>
+<div id="status">加载中</div>
+<script>
+  let cursor = 0, hasMore = true, loading = false;
+  async function loadMore() {
+    if (loading || !hasMore) return;
+    loading = true;
+    const resp = await fetch(`/aweme/v1/web/aweme/listcollection/?cursor=${cursor}`);
+    const data = await resp.json();
+    const list = document.getElementById('list');
+    for (const item of data.aweme_list) {
+      const li = document.createElement('li');
+      li.innerHTML = `<a href="/video/${item.aweme_id}"><img alt="${item.desc}" src="${item.video.cover.url_list[0]}"></a>`;
+      list.appendChild(li);
+    }
+    cursor = data.cursor;
+    hasMore = !!data.has_more;
+    if (!hasMore) document.getElementById('status').textContent = '暂时没有更多了';
+    loading = false;
+  }
+  window.addEventListener('scroll', () => {
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 600) loadMore();
+  });
+  loadMore();
+</script>
+</body></html>
+"""
+
+# 1x1 GIF，夹具页的封面图
+PIXEL = bytes.fromhex("47494638396101000100800000ffffff00000021f90401000000002c00000000010001000002024401003b")
+
+
+def build_pages(items: int, page_size: int) -> list:
+    """由 metadata.json（不足时补合成数据）生成收藏接口分页响应"""
+    metadata = []
+    if run.METADATA_PATH.exists():
+        with open(run.METADATA_PATH, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    awemes = []
+    for index in range(items):
+        source = metadata[index] if index < len(metadata) else {}
+        aweme_id = str(source.get("id") or 7300000000000000000 + index)
+        awemes.append({
+            "aweme_id": aweme_id,
+            "desc": source.get("title") or f"合成视频 {index}",
+            "create_time": source.get("create_time", 0),
+            "author": {"nickname": source.get("author") or f"作者{index % 50}", "sec_uid": ""},
+            "video": {"cover": {"url_list": [f"/douyinpic/{aweme_id}.gif"]}},
+        })
+    return [
+        {"aweme_list": awemes[start:start + page_size], "has_more": int(start + page_size < items)}
+        for start in range(0, items, page_size)
+    ]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/":
+            self.send_body(FIXTURE_PAGE.encode("utf-8"), "text/html; charset=utf-8")
+        elif parsed.path.startswith("/aweme/v1/web/aweme/listcollection/"):
+            cursor = int(parse_qs(parsed.query).get("cursor", ["0"])[0])
+            pages = self.server.pages
+            page = dict(pages[cursor]) if cursor < len(pages) else {"aweme_list": [], "has_more": 0}
+            page["cursor"] = cursor + 1
+            time.sleep(self.server.latency)
+            self.send_body(json.dumps(page, ensure_ascii=False).encode("utf-8"), "application/json")
+        elif parsed.path.startswith("/douyinpic/"):
+            self.send_body(PIXEL, "image/gif")
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages: list, latency: float):
+        self.pages = pages
+        self.latency = latency
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+async def run_mode(browser, base_url: str, mode: str) -> tuple:
+    """在新页面中运行一种采集模式，返回 (耗时, 采集数量)"""
+    page = await browser.new_page(viewport={"width": 1000, "height": 800})
+    capture = FavoritesCapture()
+    if mode == "capture":
+        page.on("response", capture.on_response)
+    await page.goto(base_url + "/")
+    progress = ScrapeProgress()
+
+    started = time.perf_counter()
+    if mode == "capture":
+        await run.scrape_by_capture(page, capture, progress)
+    else:
+        await run.scrape_by_dom(page, progress)
+    elapsed = time.perf_counter() - started
+    print()
+    await page.close()
+    return elapsed, len(progress.videos)
+
+
+async def bench(pages: list, latency: float):
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("❌ 需要 playwright：pip install playwright && python -m playwright install chromium")
+        return
+
+    server = FixtureServer(pages, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    total = sum(len(p["aweme_list"]) for p in pages)
+    print(f"夹具: {len(pages)} 页 / {total} 个视频, 接口延迟 {latency * 1000:.0f}ms\n")
+
+    results = {}
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            for mode in ("dom", "capture"):
+                print(f"▶ {mode} 模式")
+                results[mode] = await run_mode(browser, server.base_url, mode)
+            await browser.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"\n{'模式':<10}{'耗时(s)':>10}{'采集数':>10}{'视频/s':>10}")
+    for mode, (elapsed, count) in results.items():
+        print(f"{mode:<10}{elapsed:>10.1f}{count:>10}{count / elapsed:>10.1f}")
+    if "dom" in results and "capture" in results:
+        print(f"\n接口模式加速 {results['dom'][0] / results['capture'][0]:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DOM 模式与接口捕获模式采集耗时对比")
+    parser.add_argument("--fixture", type=Path, help="录制的收藏接口响应 JSON（响应对象列表）")
+    parser.add_argument("--items", type=int, default=200, help="生成夹具时的视频数")
+    parser.add_argument("--page-size", type=int, default=18, help="每页视频数（抖音默认约 18）")
+    parser.add_argument("--latency", type=float, default=0.3, help="接口响应延迟（秒）")
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture, "r", encoding="utf-8") as f:
+            pages = json.load(f)
+    else:
+        pages = build_pages(args.items, args.page_size)
+    asyncio.run(bench(pages, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+全文搜索基准测试
+生成带中文标题、#话题 和作者的合成收藏数据，测量建索引耗时、各类查询的延迟（p50 / p95 / 最大）
+以及修改少量卡片后的增量同步耗时。目标：5 万条时单次查询 < 10ms
+
+用法:
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --items 100000 --queries 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from postwall.search_index import SearchIndex  # noqa: E402
+
+WORDS = ("今天 我们 一起 去 吃 火锅 烧烤 奶茶 咖啡 旅行 日常 分享 教程 推荐 好物 开箱 测评 穿搭 护肤 化妆 "
+         "健身 减脂 跑步 瑜伽 猫咪 狗狗 萌宠 宝宝 家常菜 早餐 午餐 晚餐 夜宵 甜品 蛋糕 面包 电影 剧情 解说 "
+         "音乐 翻唱 舞蹈 搞笑 段子 游戏 攻略 数码 手机 电脑 摄影 风景 城市 夜景 海边 雪山 露营 自驾 vlog "
+         "plog 学习 考研 英语 读书 职场 面试 理财 装修 收纳 手工 绘画 书法 钓鱼 汽车 科普 历史 故事").split()
+TAGS = ("美食 旅行 日常 萌宠 穿搭 健身 电影 音乐 舞蹈 搞笑 游戏 数码 摄影 学习 职场 家居 手工 汽车 科普 "
+        "生活 vlog 抖音小助手 热门 上热门 推荐 记录生活 治愈 宝藏 干货 新手").split()
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+
+
+def build_corpus(items: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    authors = [rng.choice(SURNAMES) + "".join(rng.choice(WORDS)[:1] for _ in range(rng.randint(1, 3)))
+               for _ in range(max(1, items // 20))]
+    covers = []
+    for index in range(items):
+        words = rng.choices(WORDS, k=rng.randint(4, 12))
+        tags = rng.sample(TAGS, rng.randint(0, 4))
+        title = "".join(w if not w.isascii() else f" {w} " for w in words)
+        title += "".join(f" #{tag}" for tag in tags)
+        covers.append({"id": str(7300000000000000000 + index), "title": title.strip(), "author": rng.choice(authors)})
+    return covers
+
+
+def build_queries(covers: list, count: int, seed: int = 7) -> dict:
+    """按类型生成查询：常见词、组合词、单字、话题、作者、英文、无结果"""
+    rng = random.Random(seed)
+    return {
+        "词": [rng.choice(WORDS) for _ in range(count)],
+        "两个词": [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(count)],
+        "单字": [rng.choice(rng.choice([w for w in WORDS if not w.isascii()])) for _ in range(count)],
+        "#话题": [f"#{rng.choice(TAGS)}" for _ in range(count)],
+        "作者": [rng.choice(covers)["author"] for _ in range(count)],
+        "话题+词": [f"#{rng.choice(TAGS)} {rng.choice(WORDS)}" for _ in range(count)],
+        "无结果": [f"不存在的词{i}" for i in range(count)],
+    }
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全文搜索基准测试")
+    parser.add_argument("--items", type=int, default=50000, help="合成卡片数量")
+    parser.add_argument("--queries", type=int, default=200, help="每类查询的次数")
+    parser.add_argument("--limit", type=int, default=50, help="每次返回的结果数")
+    args = parser.parse_args()
+
+    covers = build_corpus(args.items)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.sync(covers, 1)
+    print(f"📚 {args.items} 条，建索引 {(time.perf_counter() - start) * 1000:.0f}ms\n")
+
+    print(f"{'查询类型':<10}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}{'平均命中':>10}")
+    worst = 0.0
+    for kind, queries in build_queries(covers, args.queries).items():
+        timings, hits = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result = index.search(query, args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits.append(result["total"])
+        worst = max(worst, percentile(timings, 0.95))
+        print(f"{kind:<10}{statistics.median(timings):>10.3f}{percentile(timings, 0.95):>10.3f}"
+              f"{max(timings):>10.3f}{statistics.mean(hits):>10.0f}")
+
+    # 增量同步：改 10 个标题、删 10 条、插入 10 条
+    rng = random.Random(3)
+    changed = [dict(c) for c in covers]
+    for cover in rng.sample(changed, 10):
+        cover["title"] = "修改后的标题 #新话题"
+    for cover in rng.sample(changed, 10):
+        changed.remove(cover)
+    changed[:0] = build_corpus(10, seed=99)
+    for i, cover in enumerate(changed[:10]):
+        cover["id"] = f"new_{i}"
+    start = time.perf_counter()
+    stats = index.sync(changed, 2)
+    print(f"\n🔄 增量同步 {stats}: {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"{'✅' if worst < 10 else '⚠️'} 最慢一类查询 p95 = {worst:.3f}ms（目标 < 10ms）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+服务器并发基准测试
+在 N 路视频经 /proxy_video 流式播放的同时，测量封面 GET 的 p50/p99 延迟
+
+用法:
+    python benchmarks/bench_server.py --videos 8 --covers 400
+    python benchmarks/bench_server.py --single   # 对比旧的单线程 HTTPServer
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import HTTPServer
+from pathlib import Path
+from urllib.parse import quote
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from run import ProxyHandler, create_server  # noqa: E402
+from fake_cdn import FakeCDN  # noqa: E402
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def stream_video(base: str, video_url: str, stop: threading.Event):
+    """模拟 <video> 反复拉取整段视频"""
+    url = f"{base}/proxy_video?url={quote(video_url, safe='')}"
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                while not stop.is_set() and resp.read(65536):
+                    pass
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+
+
+def fetch_cover(base: str, index: int, timeout: float):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(f"{base}/data/covers/{index}.jpg", timeout=timeout) as resp:
+            resp.read()
+        return time.perf_counter() - start
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="服务器并发基准测试")
+    parser.add_argument("--videos", type=int, default=8, help="同时播放的视频数")
+    parser.add_argument("--covers", type=int, default=400, help="封面请求总数")
+    parser.add_argument("--parallel", type=int, default=64, help="封面请求并发数")
+    parser.add_argument("--workers", type=int, default=32, help="服务器工作线程数")
+    parser.add_argument("--timeout", type=float, default=5.0, help="单个封面请求超时（秒）")
+    parser.add_argument("--single", action="store_true", help="使用单线程 HTTPServer 对比")
+    args = parser.parse_args()
+
+    # 慢速 CDN：每 64KB 暂停 50ms，约 1.3MB/s
+    cdn = FakeCDN({"/video.mp4": b"\0" * (8 << 20)}, chunk_delay=0.05).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        covers_dir = Path(tmp) / "data" / "covers"
+        covers_dir.mkdir(parents=True)
+        for i in range(args.covers):
+            (covers_dir / f"{i}.jpg").write_bytes(b"\xff\xd8" + b"\0" * 40000 + b"\xff\xd9")
+
+        if args.single:
+            server = HTTPServer(("127.0.0.1", 0), partial(ProxyHandler, directory=tmp))
+        else:
+            server = create_server(port=0, max_workers=args.workers, directory=tmp)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        stop = threading.Event()
+        for _ in range(args.videos):
+            threading.Thread(target=stream_video, args=(base, f"{cdn.base_url}/video.mp4", stop), daemon=True).start()
+        time.sleep(0.5)  # 让视频流先占住连接
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+            results = list(pool.map(lambda i: fetch_cover(base, i, args.timeout), range(args.covers)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        if args.single:
+            server.shutdown()
+            server.server_close()
+        else:
+            server.graceful_shutdown(timeout=1.0)
+        cdn.stop()
+
+    latencies = [r * 1000 for r in results if r is not None]
+    failed = len(results) - len(latencies)
+    mode = "single-thread" if args.single else f"pooled({args.workers})"
+    print(f"模式: {mode}  视频流: {args.videos}  封面请求: {args.covers}  耗时: {elapsed:.2f}s")
+    if latencies:
+        print(f"p50: {statistics.median(latencies):.1f}ms  p99: {percentile(latencies, 99):.1f}ms  "
+              f"max: {max(latencies):.1f}ms")
+    print(f"超时/失败: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+分享页提取基准测试
+对比旧的"整页读取 + 解码 + 多次 findall"与单遍流式提取器的读取字节数和耗时。
+耗时只统计两种实现都解析出视频地址的页面，保证比较的是同样的工作；只有一方能解析的页面单独计数
+
+用法:
+    python benchmarks/bench_share_extract.py                 # 使用合成分享页
+    python benchmarks/bench_share_extract.py --corpus pages/ # 使用保存的分享页 (*.html)
+"""
+import argparse
+import io
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from postwall.share_page import extract_share_page  # noqa: E402
+
+
+def legacy_extract(response) -> dict:
+    """旧实现：读取整页后多次正则扫描（逻辑与原 /api/resolve_video 一致）"""
+    html = response.read().decode("utf-8", errors="ignore")
+    result = {"title": "", "real_video_url": "", "cover_url": ""}
+    title_match = re.search(r"<title>(.*?)</title>", html)
+    if title_match:
+        result["title"] = re.sub(r" - 抖音.*", "", title_match.group(1)).strip()
+    for src in re.findall(r'"src":"(https?://[^"]+?)"', html):
+        src = src.replace(r"\u0026", "&")
+        if ("/video/" in src or "aweme" in src) and ".mp3" not in src and "avatar" not in src:
+            result["real_video_url"] = src
+            break
+    if not result["real_video_url"]:
+        for src in re.findall(r'"playAddr":\[{"src":"(https?://[^"]+?)"', html):
+            result["real_video_url"] = src.replace(r"\u0026", "&")
+            break
+    cover_matches = re.findall(r'"cover":"(https?://[^"]+?)"', html)
+    if cover_matches:
+        result["cover_url"] = cover_matches[0].replace(r"\u0026", "&")
+    return result
+
+
+def synthetic_page(index: int, rng: random.Random) -> bytes:
+    """
+    生成结构接近真实分享页的 HTML：大段内联脚本 + RENDER_DATA（urlencode）+ 明文路由数据 + 尾部埋点。
+    明文路由数据中的 "playAddr":[{"src":...}] 与 "cover" 让旧实现也能解析出同样的地址
+    """
+    aweme_id = str(7300000000000000000 + index)
+    play_url = f"https://v26-web.douyinvod.com/{aweme_id}/video/tos/cn/play.mp4?x-expires=2085768000"
+    cover_url = f"https://p3-pc-sign.douyinpic.com/{aweme_id}~tplv.jpeg?x-expires=2085768000"
+    filler = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz{}();=") for _ in range(rng.randrange(40000, 120000)))
+    render = {
+        "app": {"videoDetail": {
+            "awemeId": aweme_id,
+            "desc": f"合成视频标题 {index} #测试",
+            "authorInfo": {"nickname": f"作者{index}"},
+            "video": {
+                "playAddr": [{"src": play_url[len("https:"):]}],
+                "cover": cover_url,
+            },
+        }},
+        "padding": ["x" * 200] * rng.randrange(50, 400),
+    }
+    router = {"loaderData": {"video_page": {"videoInfoRes": {"item_list": [{
+        "aweme_id": aweme_id,
+        "video": {"playAddr": [{"src": play_url}], "cover": cover_url},
+    }]}}}}
+    tail = "".join(rng.choice("0123456789abcdef") for _ in range(rng.randrange(100000, 300000)))
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>合成视频 {index} - 抖音</title>"
+        f"<script>{filler}</script></head><body>"
+        f"<script id=\"RENDER_DATA\" type=\"application/json\">{quote(json.dumps(render, ensure_ascii=False))}</script>"
+        f"<script>window._ROUTER_DATA = {json.dumps(router, ensure_ascii=False, separators=(',', ':'))};</script>"
+        f"<script>window.__tail=\"{tail}\";</script></body></html>"
+    ).encode("utf-8")
+
+
+def load_corpus(corpus: str, count: int) -> list:
+    if corpus:
+        return [p.read_bytes() for p in sorted(Path(corpus).glob("*.html"))]
+    rng = random.Random(3)
+    return [synthetic_page(i, rng) for i in range(count)]
+
+
+def legacy_run(page: bytes) -> tuple:
+    """返回 (视频地址, 读取字节数)"""
+    return legacy_extract(io.BytesIO(page))["real_video_url"], len(page)
+
+
+def stream_run(page: bytes) -> tuple:
+    extractor = extract_share_page(io.BytesIO(page), "")
+    return extractor.real_video_url, extractor.bytes_read
+
+
+def measure(run, page: bytes, repeat: int) -> tuple:
+    """返回 (每次耗时秒数, 视频地址, 读取字节数)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        url, read = run(page)
+    return (time.perf_counter() - start) / repeat, url, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分享页提取基准测试")
+    parser.add_argument("--corpus", type=str, help="保存的分享页目录 (*.html)")
+    parser.add_argument("--count", type=int, default=50, help="合成页面数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个页面重复次数")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.count)
+    total_bytes = sum(len(p) for p in pages)
+    print(f"页面: {len(pages)}  平均大小 {total_bytes / len(pages) / 1024:.0f}KB")
+
+    both, legacy_only, stream_only, mismatched = [], 0, 0, 0
+    for page in pages:
+        legacy = measure(legacy_run, page, args.repeat)
+        stream = measure(stream_run, page, args.repeat)
+        if legacy[1] and stream[1]:
+            both.append((legacy, stream))
+            mismatched += legacy[1] != stream[1]
+        else:
+            legacy_only += bool(legacy[1])
+            stream_only += bool(stream[1])
+
+    print(f"两种实现都解析出视频地址: {len(both)}/{len(pages)}（地址不一致 {mismatched}）  "
+          f"只有旧实现: {legacy_only}  只有单遍提取: {stream_only}")
+    if not both:
+        print("没有两种实现都能解析的页面，无法比较耗时")
+        return
+
+    def summary(index: int) -> tuple:
+        seconds = sum(pair[index][0] for pair in both) / len(both)
+        read = sum(pair[index][2] for pair in both) / len(both)
+        return seconds, read
+
+    legacy_time, legacy_read = summary(0)
+    stream_time, stream_read = summary(1)
+    print(f"以下为这 {len(both)} 个页面的平均值（输入在内存中，不含网络传输）")
+    print(f"旧实现:   读取 {legacy_read / 1024:.0f}KB/次  {legacy_time * 1000:.2f}ms/次")
+    print(f"单遍提取: 读取 {stream_read / 1024:.0f}KB/次  {stream_time * 1000:.2f}ms/次")
+    ratio = stream_time / legacy_time
+    print(f"CPU 耗时: 单遍提取是旧实现的 {ratio:.2f} 倍（{'更快' if ratio < 1 else '更慢'}）；"
+          f"读取字节数减少 {1 - stream_read / legacy_read:.0%}")
+
+
+if __name__ == "__main__":
+    main()
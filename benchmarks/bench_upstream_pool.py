@@ -0,0 +1,78 @@
+"""
+上游连接池基准测试
+模拟 <video> 拖动时的一串 Range 请求，对比每次新建连接（urlopen）与连接池复用。
+直接调用 UpstreamPool.request，不经过 /proxy_video，避免视频磁盘缓存吸收大部分 Range 请求
+
+用法:
+    python benchmarks/bench_upstream_pool.py --requests 200
+"""
+import argparse
+import random
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from fake_cdn import FakeCDN  # noqa: E402
+from postwall.upstream import UpstreamPool  # noqa: E402
+
+VIDEO_SIZE = 16 << 20
+RANGE_SIZE = 256 << 10
+
+
+def random_ranges(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    ranges = []
+    for _ in range(count):
+        start = rng.randrange(0, VIDEO_SIZE - RANGE_SIZE)
+        ranges.append(f"bytes={start}-{start + RANGE_SIZE - 1}")
+    return ranges
+
+
+def run_requests(open_range, ranges: list) -> float:
+    start = time.perf_counter()
+    for byte_range in ranges:
+        with open_range(byte_range) as resp:
+            resp.read()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上游连接池基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="Range 请求数")
+    args = parser.parse_args()
+
+    ranges = random_ranges(args.requests)
+    cdn = FakeCDN({"/video.mp4": bytes(VIDEO_SIZE)}).start()
+    video_url = f"{cdn.base_url}/video.mp4"
+
+    # 基线：直接 urlopen，每个请求一条新连接
+    direct = run_requests(
+        lambda byte_range: urllib.request.urlopen(
+            urllib.request.Request(video_url, headers={"Range": byte_range}), timeout=10),
+        ranges)
+    direct_conns, direct_requests = len(cdn.connections), cdn.requests
+
+    # 连接池：同一 host 的 keep-alive 连接复用
+    cdn.connections.clear()
+    cdn.requests = 0
+    pool = UpstreamPool()
+    pooled = run_requests(lambda byte_range: pool.request("GET", video_url, {"Range": byte_range}), ranges)
+    pooled_conns, pooled_requests = len(cdn.connections), cdn.requests
+    stats = pool.stats()
+
+    pool.close()
+    cdn.stop()
+
+    print(f"请求数: {args.requests}  每次 {RANGE_SIZE >> 10}KB")
+    print(f"直连 urlopen: {direct:.2f}s  CDN 请求 {direct_requests}  连接数 {direct_conns}")
+    print(f"连接池:       {pooled:.2f}s  CDN 请求 {pooled_requests}  连接数 {pooled_conns}")
+    print(f"连接池: hits {stats['hits']}  misses {stats['misses']}  命中率 {stats['hit_rate']:.0%}  "
+          f"握手耗时 {stats['handshake_seconds'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+本地模拟 CDN
+提供带 Range 支持、可限速的视频/图片源，供基准测试和 tests/ 替代抖音 CDN
+"""
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeCDNHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cdn = self.server
+        cdn.count_request(self)
+        path = self.path.split("?", 1)[0]
+        body = cdn.files.get(path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, len(body) - 1
+        match = re.match(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), end)
+            else:
+                start = max(0, len(body) - int(match.group(2)))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        else:
+            self.send_response(200)
+        content_type = "image/jpeg" if path.endswith(".jpg") else "video/mp4"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        # 按 chunk 限速发送，模拟慢速视频流
+        chunk = cdn.chunk_size
+        for offset in range(start, end + 1, chunk):
+            try:
+                self.wfile.write(body[offset:min(offset + chunk, end + 1)])
+            except (ConnectionResetError, BrokenPipeError):
+                return
+            if cdn.chunk_delay:
+                time.sleep(cdn.chunk_delay)
+        if not cdn.keep_alive:
+            # 不发送 Connection: close 直接断开，模拟 CDN 关闭客户端以为仍可复用的空闲连接
+            self.close_connection = True
+
+
+class FakeCDN(ThreadingHTTPServer):
+    """
+    模拟 CDN 服务器
+
+    Args:
+        files: 路径 -> 内容 的映射，例如 {"/video.mp4": b"..."}
+        chunk_size: 每次写出的字节数
+        chunk_delay: 每个 chunk 之间的延迟（秒），用于模拟慢速连接
+        keep_alive: False 时每个响应后静默关闭连接
+    """
+
+    daemon_threads = True
+
+    def __init__(self, files: dict, chunk_size: int = 65536, chunk_delay: float = 0.0, keep_alive: bool = True):
+        self.files = files
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.keep_alive = keep_alive
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), FakeCDNHandler)
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        pass  # 代理提前断开连接（拖动 / 提前停止读取）属于正常情况
+
+    def count_request(self, handler):
+        with self._lock:
+            self.requests += 1
+            self.connections.add(handler.client_address)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
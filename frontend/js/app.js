@@ -8,8 +8,19 @@
 // ========================================
 const CONFIG = {
     metadataUrl: '/data/metadata.json',
+    metadataApi: '/api/metadata',   // 分页接口（run.py 服务器提供），不可用时回退到 metadataUrl
+    patchApi: '/api/metadata/patch', // 增量保存：按 ID 提交修改操作，携带版本号防止覆盖他处的修改
+    searchApi: '/api/search',
+    uploadApi: '/api/upload_image', // 截帧封面、头像、背景以文件形式存到服务器，数据里只保存路径
+    frameApi: '/api/frame',          // 服务端截帧（需要 ffmpeg），不可用时回退到浏览器内 <video> + canvas
+    frameStripApi: '/api/frame_strip',
+    frameStripCount: 12,
+    searchLimit: 20,
+    pageSize: 200,
     batchSize: 20,
     lazyLoadThreshold: 300,
+    autosaveDelay: 800,     // 停止修改多久后自动保存（毫秒）
+    autosaveMaxWait: 5000,  // 连续修改时最长多久保存一次
 };
 
 // 默认样式设置
@@ -19,6 +30,7 @@ const DEFAULT_SETTINGS = {
     radius: 12,
     showTitle: true,
     showAuthor: true,
+    virtualGrid: false, // 虚拟滚动：只渲染视口附近的卡片，适合上千张的收藏
     hero: {
         title: '2026看过影视',
         subtitle: 'DOUYIN WATCHED MEDIA LOG',
@@ -34,9 +46,25 @@ const state = {
     allCovers: [],
     currentCard: null,
     masonryInstance: null,
+    virtualGrid: null, // 虚拟滚动模式下的 VirtualGrid（与 masonryInstance 二选一）
     isLoading: false,
     loadedCount: 0,
     batchSize: 20,
+    metadataReady: Promise.resolve(), // 分页加载完成前保存会丢数据，保存前需等待
+    pagesPending: false,
+    version: null,     // 本地数据所基于的服务器版本
+    pendingOps: [],    // 尚未提交到服务器的修改操作（与 version 一起存在 IndexedDB）
+    frameSource: null, // 服务端截帧时的 { id, url, duration }，为 null 时使用 <video> 截帧
+    frameSeekTimer: null,
+    layoutKey: '',     // 上次布局时的 列数/间距，只有它变化时才重新排列
+    layoutFrame: 0,
+    changes: emptyChanges(), // 上次保存后修改过的卡片 ID（见 markDirty）
+    sendingOps: new Set(),   // 正在提交到服务器的操作，提交期间不再合并新字段
+    autosaveTimer: 0,
+    flushing: null,          // 进行中的保存
+    flushAgain: false,
+    saveStats: { local: null, server: null }, // 调试面板显示的最近一次保存
+    serverSyncPaused: false, // 用户拒绝把修改应用到服务器的新版本后，本页不再提交（刷新页面后重新询问）
     settings: {
         columns: 5,        // 统一使用 columns
         showStats: true,
@@ -52,6 +80,9 @@ const state = {
     }
 };
 
+// 本地数据（IndexedDB，解析 / 序列化 / 压缩在 Worker 中进行）
+const dataStore = new DataStore();
+
 // ========================================
 // DOM 元素
 // ========================================
@@ -82,6 +113,7 @@ const elements = {
     frameVideo: $('frame-video'),
     frameSlider: $('frame-slider'),
     frameTime: $('frame-time'),
+    frameStrip: $('frame-strip'),
     frameCanvas: $('frame-canvas'),
     framePreviewImg: $('frame-preview-img'),
     btnCaptureFrame: $('btn-capture-frame'),
@@ -93,32 +125,24 @@ const elements = {
     heroSubtitle: $('hero-subtitle'),
     inputAvatar: $('input-hero-avatar'),
     inputBg: $('input-hero-bg'),
+    searchInput: $('search-input'),
+    searchResults: $('search-results'),
 };
 
 // ========================================
 // 工具函数
 // ========================================
-function compressImage(base64, maxWidth = 1200, quality = 0.7) {
-    return new Promise((resolve) => {
-        const img = new Image();
-        img.src = base64;
-        img.onload = () => {
-            let width = img.width;
-            let height = img.height;
-
-            if (width > maxWidth) {
-                height = Math.round((height * maxWidth) / width);
-                width = maxWidth;
-            }
+// 缩放并压缩为 JPEG Blob（在数据 Worker 中完成，失败则返回原图）
+function compressImage(image, maxWidth = 1200, quality = 0.7) {
+    return dataStore.compress(image, maxWidth, quality);
+}
 
-            const canvas = document.createElement('canvas');
-            canvas.width = width;
-            canvas.height = height;
-            const ctx = canvas.getContext('2d');
-            ctx.drawImage(img, 0, 0, width, height);
-            resolve(canvas.toDataURL('image/jpeg', quality));
-        };
-        img.onerror = () => resolve(base64); // 失败则返回原图
+function blobToDataUrl(blob) {
+    return new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result);
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(blob);
     });
 }
 
@@ -367,8 +391,13 @@ async function init() {
     try {
         await loadMetadata();
         initScrollObserver(); // 初始化滚动动画
-        initMasonry();
-        loadNextBatch();
+        if (state.settings.virtualGrid) {
+            initVirtualGrid();
+        } else {
+            initMasonry();
+            loadNextBatch();
+        }
+        state.metadataReady.then(migrateInlineImages);
     } catch (error) {
         console.error('初始化失败:', error);
         alert('加载数据失败，请检查 metadata.json 是否存在。\n你可以尝试点击右上角 "+" 添加视频。');
@@ -378,58 +407,471 @@ async function init() {
 
     // 无论数据是否加载成功，都必须绑定事件监听器
     setupEventListeners();
+    initDebugPanel();
+
+    // ?bench：加载网格性能测试，在控制台运行 runGridBenchmark()
+    if (new URLSearchParams(location.search).has('bench')) {
+        const script = document.createElement('script');
+        script.src = 'js/grid-bench.js';
+        document.body.appendChild(script);
+    }
 }
 
 // ========================================
 // 数据加载与保存
 // ========================================
 async function loadMetadata() {
-    // 优先使用 localStorage 中的数据
-    const localData = localStorage.getItem('posterwall_data');
-    if (localData) {
-        try {
-            state.allCovers = JSON.parse(localData);
-            state.hasLocalChanges = true;
-            console.log('✅ 从本地存储加载了数据');
-        } catch (e) {
-            console.warn('本地数据解析失败，使用服务器数据');
-        }
+    // 优先使用本地保存的数据
+    const local = await dataStore.load();
+    restorePendingOps(local.sync);
+    if (Array.isArray(local.covers) && local.covers.length) {
+        state.allCovers = local.covers;
+        state.hasLocalChanges = true;
+        console.log('✅ 从本地存储加载了数据');
     }
 
-    // 如果没有本地数据，从服务器加载
+    // 如果没有本地数据，从服务器加载：先取第一页尽快渲染，其余页在后台继续加载
     if (!state.allCovers.length) {
+        const firstPage = await fetchMetadataPage(null);
+        if (firstPage) {
+            state.allCovers = firstPage.items;
+            state.version = firstPage.version;
+            state.pendingOps = [];
+            savePendingOps();
+            elements.totalCount.textContent = firstPage.total;
+            if (firstPage.next_cursor) {
+                state.pagesPending = true;
+                state.metadataReady = loadRemainingPages(firstPage.next_cursor);
+            }
+            return;
+        }
         const response = await fetch(CONFIG.metadataUrl);
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}`);
         }
         state.allCovers = await response.json();
+    } else {
+        await mergeServerLayoutFields();
+        if (state.version === null) {
+            // 旧版本地数据没有记录版本：视为基于服务器当前版本
+            const head = await fetchMetadataPage(null, 1);
+            if (head) state.version = head.version;
+        }
     }
 
     elements.totalCount.textContent = state.allCovers.length;
 }
 
-function saveToLocalStorage() {
-    localStorage.setItem('posterwall_data', JSON.stringify(state.allCovers));
+// 取一页元数据，接口不可用（如用静态服务器打开）时返回 null
+async function fetchMetadataPage(cursor, limit = CONFIG.pageSize) {
+    const params = new URLSearchParams({ limit });
+    if (cursor) params.set('cursor', cursor);
+    try {
+        const response = await fetch(`${CONFIG.metadataApi}?${params}`);
+        if (!response.ok) return null;
+        return await response.json();
+    } catch (e) {
+        return null;
+    }
+}
+
+async function loadRemainingPages(cursor) {
+    while (cursor) {
+        const page = await fetchMetadataPage(cursor);
+        if (!page) {
+            // 分页失败时整体加载一次，补上缺失的部分
+            console.warn('分页加载失败，改为加载完整 metadata.json');
+            try {
+                const response = await fetch(CONFIG.metadataUrl);
+                const known = new Set(state.allCovers.map(cover => cover.id));
+                state.allCovers.push(...(await response.json()).filter(cover => !known.has(cover.id)));
+            } catch (e) {
+                console.error('❌ 加载后续元数据失败:', e);
+            }
+            break;
+        }
+        state.allCovers.push(...page.items);
+        elements.totalCount.textContent = page.total;
+        cursor = page.next_cursor;
+
+        // 虚拟网格只需接着计算新卡片的位置；已渲染的卡片还填不满屏幕时继续渲染新到的数据
+        if (state.virtualGrid) {
+            state.virtualGrid.refresh({ appendOnly: true });
+        } else if (state.masonryInstance && document.body.scrollHeight <= window.innerHeight + CONFIG.lazyLoadThreshold) {
+            loadNextBatch();
+        }
+    }
+    state.pagesPending = false;
+}
+
+// 本地数据可能早于缩略图生成，从服务器数据补充尺寸 / 占位色 / 缩略图字段（封面未被替换时）
+const LAYOUT_FIELDS = ['width', 'height', 'aspect', 'placeholder', 'thumbs'];
+
+async function mergeServerLayoutFields() {
+    if (state.allCovers.every(cover => cover.aspect || !cover.local_cover)) return;
+    try {
+        const response = await fetch(CONFIG.metadataUrl);
+        if (!response.ok) return;
+        const byId = new Map((await response.json()).map(cover => [cover.id, cover]));
+        state.allCovers.forEach(cover => {
+            const server = byId.get(cover.id);
+            if (!server || !cover.local_cover || server.local_cover !== cover.local_cover) return;
+            LAYOUT_FIELDS.forEach(field => {
+                if (server[field] !== undefined) cover[field] = server[field];
+            });
+        });
+    } catch (e) {
+        console.warn('补充封面尺寸信息失败:', e);
+    }
+}
+
+// ========================================
+// 修改跟踪与自动保存
+// ========================================
+// 每次修改记下受影响的卡片 ID，一段时间内的连续修改（批量删除、拖拽排序、输入标题）合并为一次保存：
+// 本地只写入有变化的卡片，服务器只提交合并后的操作。停止修改 autosaveDelay 后保存，
+// 一直在修改时最多每 autosaveMaxWait 保存一次
+function emptyChanges() {
+    return { dirty: new Set(), removed: new Set(), order: false, all: false, since: 0 };
+}
+
+function markDirty(ids, { order = false } = {}) {
+    ids.forEach(id => {
+        state.changes.dirty.add(id);
+        state.changes.removed.delete(id);
+    });
+    if (order) state.changes.order = true;
+    scheduleAutosave();
+}
+
+function markRemoved(ids) {
+    ids.forEach(id => {
+        state.changes.dirty.delete(id);
+        state.changes.removed.add(id);
+    });
+    state.changes.order = true;
+    scheduleAutosave();
+}
+
+function scheduleAutosave() {
+    const now = Date.now();
+    if (!state.changes.since) state.changes.since = now;
+    const delay = Math.min(CONFIG.autosaveDelay, state.changes.since + CONFIG.autosaveMaxWait - now);
+    clearTimeout(state.autosaveTimer);
+    state.autosaveTimer = setTimeout(flushChanges, Math.max(0, delay));
+    updateDebugPanel();
+}
+
+// 立即保存所有修改（退出编辑模式、页面隐藏时也会调用）；保存进行中再调用时，完成后再保存一轮
+function flushChanges() {
+    clearTimeout(state.autosaveTimer);
+    state.autosaveTimer = 0;
+    if (state.flushing) {
+        state.flushAgain = true;
+        return state.flushing;
+    }
+    state.flushing = (async () => {
+        do {
+            state.flushAgain = false;
+            await state.metadataReady; // 分页加载完成前只有部分数据
+            const changes = state.changes;
+            state.changes = emptyChanges();
+            await saveLocalData(changes);
+            await saveToServer();
+        } while (state.flushAgain);
+    })().finally(() => {
+        state.flushing = null;
+        updateDebugPanel();
+    });
+    return state.flushing;
+}
+
+async function saveLocalData(changes) {
+    const { dirty, removed } = changes;
+    if (!changes.all && !changes.order && !dirty.size && !removed.size) return;
     state.hasLocalChanges = true;
-    console.log('💾 数据已保存到本地');
+    const start = performance.now();
+    try {
+        let order = null;
+        let full = changes.all;
+        if (changes.order) {
+            order = state.allCovers.map(cover => cover.id);
+            full = full || order.some(id => id == null); // 没有 ID 的卡片无法单独保存
+        }
+        const result = full
+            ? await dataStore.save(state.allCovers)
+            : await dataStore.saveChanges({
+                cards: dirty.size ? state.allCovers.filter(cover => dirty.has(cover.id)) : [],
+                removed: [...removed],
+                order,
+            }, state.allCovers);
+        state.saveStats.local = { ms: performance.now() - start, ...result };
+        console.log(`💾 数据已保存到本地（写入 ${result.written} 张，删除 ${result.deleted} 张）`);
+    } catch (e) {
+        console.error('❌ 保存到本地失败:', e);
+        // 没保存成功的修改留到下次
+        dirty.forEach(id => state.changes.dirty.add(id));
+        removed.forEach(id => state.changes.removed.add(id));
+        state.changes.order = state.changes.order || changes.order;
+        state.changes.all = state.changes.all || changes.all;
+    }
+}
+
+// 记录一次修改，等待自动保存提交；连续编辑同一卡片的字段合并为一个操作
+function recordOp(op) {
+    const last = state.pendingOps[state.pendingOps.length - 1];
+    if (op.op === 'update' && last && last.op === 'update' && last.id === op.id && !state.sendingOps.has(last)) {
+        Object.assign(last.fields, op.fields);
+    } else if (op.op === 'replace') {
+        state.pendingOps = [op];
+    } else {
+        state.pendingOps.push(op);
+    }
+    savePendingOps();
+
+    if (op.op === 'update') {
+        markDirty([op.id]);
+    } else if (op.op === 'insert') {
+        markDirty(op.cards.map(card => card.id), { order: true });
+    } else if (op.op === 'delete') {
+        markRemoved(op.ids);
+    } else if (op.op === 'replace') {
+        state.changes.all = true;
+        scheduleAutosave();
+    } else {
+        markDirty([], { order: true }); // move / reorder
+    }
+}
+
+function restorePendingOps(saved) {
+    if (saved) {
+        state.version = saved.version;
+        state.pendingOps = saved.ops || [];
+    }
+}
+
+function savePendingOps() {
+    dataStore.saveSync({ version: state.version, ops: state.pendingOps })
+        .catch(e => console.warn('保存未提交的修改记录失败:', e));
+}
+
+/**
+ * 合并待提交的操作，只提交每张卡片的最终修改：
+ * 同一卡片分散的多次 update 合并为一个；本批新插入卡片的 update 直接并入插入的卡片；
+ * 被删除卡片之前的 update 去掉；相邻的 delete 合并；同一卡片相邻的 move 只保留最后一次。
+ * move / insert 的位置依赖之前的顺序，不跨越它们调整先后
+ */
+function coalesceOps(ops) {
+    const out = [];
+    const inserted = new Map(); // ID -> 本批插入的卡片（副本）
+    const updates = new Map();  // ID -> out 中的 update
+    for (const op of ops) {
+        const last = out[out.length - 1];
+        if (op.op === 'update') {
+            const card = inserted.get(op.id);
+            if (card) {
+                Object.entries(op.fields).forEach(([key, value]) => {
+                    if (value === null) delete card[key];
+                    else card[key] = value;
+                });
+            } else if (updates.has(op.id)) {
+                Object.assign(updates.get(op.id).fields, op.fields);
+            } else {
+                const copy = { ...op, fields: { ...op.fields } };
+                updates.set(op.id, copy);
+                out.push(copy);
+            }
+        } else if (op.op === 'insert' || op.op === 'replace') {
+            if (op.op === 'replace') {
+                out.length = 0;
+                updates.clear();
+                inserted.clear();
+            }
+            const copy = { ...op, cards: op.cards.map(card => ({ ...card })) };
+            copy.cards.forEach(card => inserted.set(card.id, card));
+            out.push(copy);
+        } else if (op.op === 'delete') {
+            op.ids.forEach(id => {
+                const update = updates.get(id);
+                if (update) out.splice(out.indexOf(update), 1);
+                updates.delete(id);
+                inserted.delete(id);
+            });
+            const tail = out[out.length - 1];
+            if (tail && tail.op === 'delete') tail.ids.push(...op.ids);
+            else out.push({ ...op, ids: [...op.ids] });
+        } else if (op.op === 'move' && last && last.op === 'move' && last.id === op.id) {
+            last.to = op.to;
+        } else {
+            out.push({ ...op });
+        }
+    }
+    return out;
 }
 
 async function saveToServer() {
+    await state.metadataReady;
+    if (!state.pendingOps.length || state.sendingOps.size || state.serverSyncPaused) return;
+
+    const sent = state.pendingOps.slice();
+    const ops = coalesceOps(sent);
+    sent.forEach(op => state.sendingOps.add(op));
+    const start = performance.now();
     try {
-        const response = await fetch('/api/save_data', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(state.allCovers),
-        });
+        let version = state.version;
+        let response = await postPatch(ops, version);
+        if (response.status === 409) {
+            // 服务器数据在别处被修改过（批量导入、重新采集等）；操作按 ID 定位，可以叠加到新版本上
+            version = (await response.json()).version;
+            if (!confirm(`服务器上的数据已被其他地方修改（版本 ${state.version} → ${version}）。\n是否把本页的 ${ops.length} 项修改应用到最新数据上？\n取消则保留修改，刷新页面后再选择。`)) {
+                // 记住这次选择，之后的自动保存不再反复弹窗
+                state.serverSyncPaused = true;
+                showSyncNotice('服务器上的数据已被其他地方修改，本页的修改只保存在本地，刷新页面后可重新选择是否提交。');
+                return;
+            }
+            response = await postPatch(ops, version);
+        }
+        state.saveStats.server = { ...state.saveStats.server, ms: performance.now() - start, status: response.status };
+
         if (response.ok) {
-            console.log('✅ 数据已自动保存到服务器');
+            state.version = (await response.json()).version;
+            state.pendingOps = state.pendingOps.filter(op => !state.sendingOps.has(op)); // 提交期间新增的操作留到下次
+            savePendingOps();
+            console.log(`✅ 已提交 ${ops.length} 项修改到服务器（版本 ${state.version}）`);
+        } else if (response.status === 400) {
+            // 服务器整批提交、一项无效则全部拒绝（如修改了已在别处删除的卡片）：逐项重新提交，只丢弃被拒绝的操作
+            console.warn('⚠️ 服务器拒绝了整批修改，改为逐项提交:', (await response.json()).error);
+            const result = await postPatchEach(ops, version);
+            state.version = result.version;
+            state.pendingOps = state.pendingOps.filter(op => !state.sendingOps.has(op));
+            savePendingOps();
+            result.rejected.forEach(({ op, error }) => console.error('❌ 服务器拒绝了修改:', op, error));
+            showSyncNotice(`${result.rejected.length} 项修改被服务器拒绝（卡片可能已在别处删除），其余 ${ops.length - result.rejected.length} 项已保存。`);
         } else {
             console.error('❌ 保存到服务器失败:', response.status);
         }
     } catch (e) {
         console.error('❌ 保存到服务器出错:', e);
+    } finally {
+        state.sendingOps.clear();
+    }
+}
+
+/**
+ * 逐项提交操作，被拒绝（400）的操作跳过，期间服务器版本变化时叠加到新版本上
+ * @returns {Promise<{version, rejected: {op, error}[]}>}
+ */
+async function postPatchEach(ops, version) {
+    const rejected = [];
+    for (const op of ops) {
+        let response = await postPatch([op], version);
+        if (response.status === 409) response = await postPatch([op], (await response.json()).version);
+        if (response.ok) {
+            version = (await response.json()).version;
+        } else if (response.status === 400) {
+            rejected.push({ op, error: (await response.json()).error });
+        } else {
+            throw new Error(`HTTP ${response.status}`);
+        }
+    }
+    return { version, rejected };
+}
+
+// 页面底部的非模态提示，点击关闭
+function showSyncNotice(message) {
+    if (!elements.syncNotice) {
+        elements.syncNotice = document.createElement('div');
+        elements.syncNotice.className = 'sync-notice';
+        elements.syncNotice.title = '点击关闭';
+        elements.syncNotice.addEventListener('click', () => elements.syncNotice.classList.add('hidden'));
+        document.body.appendChild(elements.syncNotice);
+    }
+    elements.syncNotice.textContent = message;
+    elements.syncNotice.classList.remove('hidden');
+}
+
+function postPatch(ops, version) {
+    const body = JSON.stringify({ version, ops });
+    state.saveStats.server = { ops: ops.length, bytes: new TextEncoder().encode(body).length };
+    return fetch(CONFIG.patchApi, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body,
+    });
+}
+
+// 调试面板（?debug）：待保存的修改、最近一次本地 / 服务器保存的耗时和数据量
+function initDebugPanel() {
+    if (!new URLSearchParams(location.search).has('debug')) return;
+    elements.debugPanel = document.createElement('div');
+    elements.debugPanel.className = 'debug-panel';
+    document.body.appendChild(elements.debugPanel);
+    updateDebugPanel();
+}
+
+function updateDebugPanel() {
+    const panel = elements.debugPanel;
+    if (!panel) return;
+    const { dirty, removed, order } = state.changes;
+    const { local, server } = state.saveStats;
+    const ms = value => (value === undefined ? '-' : `${value.toFixed(1)} ms`);
+    const lines = [
+        `待保存：修改 ${dirty.size} · 删除 ${removed.size}${order ? ' · 顺序' : ''} · 未提交操作 ${state.pendingOps.length}${state.flushing ? ' · 保存中…' : ''}`,
+        local ? `本地：${ms(local.ms)} · 写入 ${local.written} 张 · ${formatBytes(local.bytes)}` : '本地：-',
+        server ? `服务器：${ms(server.ms)} · ${server.ops} 项操作 · ${formatBytes(server.bytes)} · ${server.status || '…'}` : '服务器：-',
+    ];
+    panel.textContent = lines.join('\n');
+}
+
+function formatBytes(bytes) {
+    if (!bytes) return '0 B';
+    if (bytes < 1024) return `${bytes} B`;
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+    return `${(bytes / 1024 / 1024).toFixed(2)} MB`;
+}
+
+// 上传图片（data URL 或 Blob），返回服务器上的相对路径；服务器不可用时返回 null
+async function uploadImage(image, params) {
+    try {
+        const blob = typeof image === 'string' ? await (await fetch(image)).blob() : image;
+        const response = await fetch(`${CONFIG.uploadApi}?${new URLSearchParams(params)}`, {
+            method: 'POST',
+            headers: { 'Content-Type': blob.type || 'application/octet-stream' },
+            body: blob,
+        });
+        if (!response.ok) return null;
+        return (await response.json()).path;
+    } catch (e) {
+        return null;
+    }
+}
+
+// 旧版本把截帧封面、头像、背景以 base64 存在数据和设置里：上传为文件，只保留路径
+const isInlineImage = (value) => typeof value === 'string' && value.startsWith('data:image/') && value.includes(';base64,');
+
+async function migrateInlineImages() {
+    let moved = 0;
+    for (const cover of state.allCovers) {
+        if (!isInlineImage(cover.cover_url)) continue;
+        const path = await uploadImage(cover.cover_url, { id: cover.id });
+        if (!path) return; // 服务器不可用，下次再试
+        cover.local_cover = path;
+        cover.cover_url = '';
+        delete cover.thumbs;
+        delete cover.aspect;
+        recordOp({ op: 'update', id: cover.id, fields: { local_cover: path, cover_url: '', thumbs: null, aspect: null } });
+        moved++;
+    }
+    for (const slot of ['avatar', 'background']) {
+        if (!isInlineImage(state.settings.hero[slot])) continue;
+        const path = await uploadImage(state.settings.hero[slot], { slot });
+        if (!path) return;
+        state.settings.hero[slot] = `/${path}`;
+        saveSettings();
+        moved++;
+    }
+    if (moved) {
+        console.log(`🗜️ 已把 ${moved} 张内嵌图片转存为文件`);
     }
 }
 
@@ -476,6 +918,7 @@ function loadSettings() {
     $('setting-radius').value = state.settings.radius;
     $('setting-show-title').checked = state.settings.showTitle;
     $('setting-show-author').checked = state.settings.showAuthor;
+    $('setting-virtual-grid').checked = state.settings.virtualGrid;
     updateSettingLabels();
 }
 
@@ -554,12 +997,27 @@ function applySettings() {
     document.body.classList.toggle('hide-titles', !state.settings.showTitle);
     document.body.classList.toggle('hide-authors', !state.settings.showAuthor);
 
-    // 触发 Masonry 重新布局
-    if (state.masonryInstance) {
+    if (state.virtualGrid) {
+        state.virtualGrid.setOptions({ columns: cols, gap });
+    }
+
+    // 只有列数 / 间距影响卡片位置（圆角、标题显示只改样式）；拖动滑块时每帧最多重新布局一次
+    const layoutKey = `${cols}/${gap}`;
+    if (state.masonryInstance && layoutKey !== state.layoutKey) {
+        scheduleMasonryLayout();
+    }
+    state.layoutKey = layoutKey;
+}
+
+function scheduleMasonryLayout() {
+    if (state.layoutFrame) return;
+    state.layoutFrame = requestAnimationFrame(() => {
+        state.layoutFrame = 0;
+        if (!state.masonryInstance) return;
         // 更新参数
-        state.masonryInstance.options.gutter = gap;
+        state.masonryInstance.options.gutter = state.settings.gap;
         state.masonryInstance.layout();
-    }
+    });
 }
 
 function updateSettingLabels() {
@@ -593,6 +1051,21 @@ function initMasonry() {
     state.masonryInstance.layout();
 }
 
+// ========================================
+// 虚拟滚动网格
+// ========================================
+function initVirtualGrid() {
+    state.virtualGrid = new VirtualGrid(elements.grid, {
+        columns: state.settings.columns,
+        gap: state.settings.gap,
+        aspectOf: coverAspect,
+        createNode: createPosterNode,
+        fillNode: fillPosterCard,
+    });
+    state.virtualGrid.setItems(state.allCovers);
+    elements.loading.classList.add('hidden');
+}
+
 // ========================================
 // 滚动动画 (Intersection Observer)
 // ========================================
@@ -654,7 +1127,7 @@ function initScrollObserver() {
 // 分批加载
 // ========================================
 function loadNextBatch() {
-    if (state.isLoading || state.loadedCount >= state.allCovers.length) {
+    if (state.virtualGrid || state.isLoading || state.loadedCount >= state.allCovers.length) {
         return;
     }
 
@@ -680,7 +1153,7 @@ function loadNextBatch() {
 
     const newItems = elements.grid.querySelectorAll('.grid-item:not(.loaded)');
 
-    imagesLoaded(newItems, () => {
+    const layoutBatch = () => {
         newItems.forEach(item => item.classList.add('loaded'));
         state.masonryInstance.appended(newItems);
         state.masonryInstance.layout();
@@ -696,16 +1169,23 @@ function loadNextBatch() {
         if (document.body.scrollHeight <= window.innerHeight + 100 && state.loadedCount < state.allCovers.length) {
             loadNextBatch();
         }
-    });
+    };
+
+    // 有预计算宽高比的卡片尺寸已确定，立即布局，图片随后加载；旧数据仍等待图片加载完成
+    if (batch.every(hasLayoutSize)) {
+        layoutBatch();
+    } else {
+        imagesLoaded(newItems, layoutBatch);
+    }
 }
 
 // ========================================
 // 创建海报卡片
 // ========================================
 function createPosterCard(cover, index) {
-    const item = document.createElement('div');
+    const item = createPosterNode();
     // 添加 reveal 类用于入场动画
-    item.className = 'grid-item reveal';
+    item.classList.add('reveal');
     // 移除行内延迟，改为 CSS 类控制或仅首屏 JS 控制
     // CSS 中已有 .stagger-x 类，这里随即分配一个 stagger 类给首屏元素
     // 但为了滚动时也有错落感，我们可以给所有元素一个随机的微小延迟
@@ -714,28 +1194,25 @@ function createPosterCard(cover, index) {
     const staggerIndex = (index % 5) + 1;
     item.classList.add(`stagger-${staggerIndex}`);
 
-    item.dataset.index = index;
-
-    const coverSrc = cover.local_cover
-        ? `/${cover.local_cover}`
-        : (cover.cover_url || 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="280" height="500"><rect fill="%231a1a25" width="100%" height="100%"/><text x="50%" y="50%" fill="%23666" text-anchor="middle">无封面</text></svg>');
+    fillPosterCard(item, cover, index);
+    return item;
+}
 
+// 卡片骨架：封面以外的部分与数据无关，虚拟网格回收节点时原样保留
+function createPosterNode() {
+    const item = document.createElement('div');
+    item.className = 'grid-item';
     item.innerHTML = `
-        <article class="poster-card" data-id="${cover.id}" data-url="${cover.video_url || ''}" data-index="${index}">
-            <img 
-                class="poster-image" 
-                src="${coverSrc}" 
-                alt="${escapeHtml(cover.title)}"
-                loading="lazy"
-            >
+        <article class="poster-card">
+            <img class="poster-image" alt="">
             <div class="play-icon">
                 <svg viewBox="0 0 24 24">
                     <polygon points="5,3 19,12 5,21"></polygon>
                 </svg>
             </div>
             <div class="poster-info">
-                <h3 class="poster-title">${escapeHtml(cover.title)}</h3>
-                <p class="poster-author">${escapeHtml(cover.author || '')}</p>
+                <h3 class="poster-title"></h3>
+                <p class="poster-author"></p>
             </div>
             <div class="edit-overlay">
                 <button class="btn btn-icon btn-edit" title="编辑">✏️</button>
@@ -743,17 +1220,75 @@ function createPosterCard(cover, index) {
             </div>
         </article>
     `;
-
     return item;
 }
 
+// 把卡片数据填入节点；封面没变时保留原有的 <img>，不重新加载图片
+function fillPosterCard(item, cover, index) {
+    const card = item.firstElementChild;
+    card.dataset.id = cover.id;
+    card.dataset.url = cover.video_url || '';
+
+    const media = coverPictureHtml(cover);
+    if (item.mediaHtml !== media) {
+        card.firstElementChild.outerHTML = media;
+        item.mediaHtml = media;
+    }
+    card.querySelector('.poster-title').textContent = cover.title || '';
+    card.querySelector('.poster-author').textContent = cover.author || '';
+}
+
+// 卡片封面的宽高比（宽 / 高），与 coverPictureHtml 输出的尺寸一致；虚拟网格据此直接计算卡片位置
+// 卡片是否带有可用的预计算尺寸（只对本地封面有效，封面被清空或替换后尺寸字段可能残留）
+function hasLayoutSize(cover) {
+    return Boolean(cover.aspect && cover.local_cover);
+}
+
+function coverAspect(cover) {
+    return hasLayoutSize(cover) ? cover.width / cover.height : 9 / 16;
+}
+
+// 封面原图地址（灯箱使用）
+function coverFullSrc(cover) {
+    return cover.local_cover
+        ? `/${cover.local_cover}`
+        : (cover.cover_url || 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="280" height="500"><rect fill="%231a1a25" width="100%" height="100%"/><text x="50%" y="50%" fill="%23666" text-anchor="middle">无封面</text></svg>');
+}
+
+// 卡片封面：有缩略图时输出 <picture>，浏览器按列宽和 DPR 从 srcset 中选择 AVIF/WebP/JPEG
+function coverPictureHtml(cover) {
+    const alt = escapeHtml(cover.title);
+    const thumbs = cover.thumbs;
+    // 预计算的尺寸与主色调：图片加载前卡片就有正确的高度和占位色
+    const layout = hasLayoutSize(cover)
+        ? ` width="${cover.width}" height="${cover.height}" style="aspect-ratio: ${cover.width} / ${cover.height}; background-color: ${cover.placeholder || ''}"`
+        : '';
+    if (!thumbs || !cover.local_cover) {
+        return `<img class="poster-image" src="${coverFullSrc(cover)}" alt="${alt}"${layout} loading="lazy">`;
+    }
+
+    const sizes = `calc(min(100vw, 1600px) / ${state.settings.columns})`;
+    const srcset = fmt => thumbs.sizes.map(([w]) => `/${thumbs.dir}/${w}.${fmt} ${w}w`).join(', ');
+    const sources = thumbs.formats
+        .filter(fmt => fmt !== 'jpg')
+        .map(fmt => `<source type="image/${fmt}" srcset="${srcset(fmt)}" sizes="${sizes}">`)
+        .join('');
+    return `<picture>${sources}<img class="poster-image" src="/${thumbs.dir}/${thumbs.sizes[0][0]}.jpg" srcset="${srcset('jpg')}" sizes="${sizes}" alt="${alt}"${layout} loading="lazy"></picture>`;
+}
+
 // ========================================
 // 事件监听
 // ========================================
 function setupEventListeners() {
+    // 切走或关闭页面前保存还在等待延时的修改
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden' && state.autosaveTimer) flushChanges();
+    });
+
     // 窗口调整重新布局
     window.addEventListener('resize', throttle(() => {
         if (state.masonryInstance) state.masonryInstance.layout();
+        if (state.virtualGrid) state.virtualGrid.scheduleRender();
     }, 100));
 
     // 无限滚动
@@ -790,7 +1325,7 @@ function setupEventListeners() {
                 e.stopPropagation();
                 const card = deleteBtn.closest('.poster-card');
                 if (confirm('确定删除这张海报？')) {
-                    deleteCard(parseInt(card.dataset.index));
+                    deleteCard(card.dataset.id);
                 }
                 return;
             }
@@ -862,6 +1397,15 @@ function setupEventListeners() {
         }
     });
 
+    const virtualInput = $('setting-virtual-grid');
+    if (virtualInput) {
+        virtualInput.addEventListener('change', (e) => {
+            state.settings.virtualGrid = e.target.checked;
+            saveSettings();
+            refreshGrid();
+        });
+    }
+
     if (elements.btnResetSettings) {
         elements.btnResetSettings.addEventListener('click', () => {
             state.settings = { ...DEFAULT_SETTINGS };
@@ -886,7 +1430,7 @@ function setupEventListeners() {
     if (elements.btnDeleteCard) {
         elements.btnDeleteCard.addEventListener('click', () => {
             if (state.currentCard && confirm('确定删除这张海报？')) {
-                deleteCard(state.currentCard.index);
+                deleteCard(state.currentCard.id);
                 closeLightbox();
             }
         });
@@ -916,41 +1460,105 @@ function setupEventListeners() {
             if (state.currentCard) {
                 const newTitle = elements.lightboxTitle.innerText;
                 state.currentCard.title = newTitle;
-                state.allCovers[state.currentCard.index].title = newTitle;
+                const cover = coverById(state.currentCard.id);
+                if (cover) cover.title = newTitle;
+                recordOp({ op: 'update', id: state.currentCard.id, fields: { title: newTitle } });
 
                 // 更新网格中的标题
-                const card = document.querySelector(`.poster-card[data-index="${state.currentCard.index}"]`);
+                const card = cardElement(state.currentCard.id);
                 if (card) {
                     const titleEl = card.querySelector('.poster-title');
                     if (titleEl) titleEl.innerText = newTitle;
                 }
-
-                state.hasLocalChanges = true;
-                // 防抖保存
-                if (state.saveTimer) clearTimeout(state.saveTimer);
-                state.saveTimer = setTimeout(saveToLocalStorage, 1000);
             }
         });
     }
 
+    // 搜索：输入停顿后查询服务器索引
+    if (elements.searchInput) {
+        let searchTimer = null;
+        elements.searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => runSearch(elements.searchInput.value.trim()), 150);
+        });
+        elements.searchInput.addEventListener('keydown', (e) => {
+            if (e.key === 'Escape') closeSearch();
+        });
+        elements.searchResults.addEventListener('click', (e) => {
+            const item = e.target.closest('.search-result');
+            if (!item) return;
+            if (coverById(item.dataset.id)) openLightbox({ dataset: { id: item.dataset.id } });
+            closeSearch();
+        });
+        document.addEventListener('click', (e) => {
+            if (!e.target.closest('.search-box')) elements.searchResults.classList.remove('active');
+        });
+    }
+
     // 初始化 Hero 区域交互（头像更换、标题编辑）
     setupHeroInteractions();
 }
 
+// ========================================
+// 搜索
+// ========================================
+let searchSeq = 0;
+
+async function runSearch(query) {
+    const seq = ++searchSeq;
+    if (!query) {
+        closeSearch();
+        return;
+    }
+    try {
+        const params = new URLSearchParams({ q: query, limit: CONFIG.searchLimit });
+        const response = await fetch(`${CONFIG.searchApi}?${params}`);
+        if (!response.ok || seq !== searchSeq) return;
+        renderSearchResults(await response.json());
+    } catch (e) {
+        console.warn('搜索不可用:', e);
+    }
+}
+
+function renderSearchResults(result) {
+    const byId = new Map(state.allCovers.map(cover => [cover.id, cover]));
+    const covers = result.ids.map(id => byId.get(id)).filter(Boolean);
+    elements.searchResults.innerHTML = covers.length
+        ? covers.map(cover => `
+            <div class="search-result" data-id="${escapeHtml(cover.id)}">
+                <span class="search-result-title">${escapeHtml(cover.title || '无标题')}</span>
+                <span class="search-result-author">@${escapeHtml(cover.author || '未知')}</span>
+            </div>`).join('') + (result.total > covers.length
+                ? `<div class="search-more">共 ${result.total} 条结果</div>` : '')
+        : '<div class="search-more">没有找到</div>';
+    elements.searchResults.classList.add('active');
+}
+
+function closeSearch() {
+    searchSeq++;
+    elements.searchResults.classList.remove('active');
+}
+
 // ========================================
 // 视频解析 & 添加
 // ========================================
 async function addVideoByUrl() {
-    const input = prompt('请粘贴抖音分享链接（可包含其他文字）：');
+    const input = prompt('请粘贴抖音分享链接（可包含其他文字，支持一次粘贴多个）：');
     if (!input) return;
 
     // 从分享文本中提取有效 URL
-    const urlMatch = input.match(/https?:\/\/[^\s]+/);
-    if (!urlMatch) {
+    const urlMatches = input.match(/https?:\/\/[^\s]+/g);
+    if (!urlMatches) {
         alert('未找到有效链接，请重新粘贴包含 https://v.douyin.com/... 的分享文本');
         return;
     }
-    const url = urlMatch[0].replace(/[。，！？、）】}]/g, ''); // 移除可能的中文标点
+
+    // 多个链接走批量接口
+    if (urlMatches.length > 1) {
+        await addVideosBatch(input);
+        return;
+    }
+    const url = urlMatches[0].replace(/[。，！？、）】}]/g, ''); // 移除可能的中文标点
 
     // 显示 loading
     const originalText = elements.btnAddVideo.innerHTML;
@@ -976,12 +1584,9 @@ async function addVideoByUrl() {
             local_cover: ''
         };
 
-        // 添加到列表最前
-        state.allCovers.unshift(newCard);
-        saveToLocalStorage();
-
-        // 刷新显示
-        refreshGrid();
+        // 添加到列表最前，只插入这一张卡片
+        insertCards([newCard], 0);
+        recordOp({ op: 'insert', index: 0, cards: [newCard] });
         elements.totalCount.textContent = state.allCovers.length;
 
         alert(`成功添加：${newCard.title}`);
@@ -994,6 +1599,80 @@ async function addVideoByUrl() {
     }
 }
 
+async function addVideosBatch(text) {
+    const originalText = elements.btnAddVideo.innerHTML;
+    const knownIds = new Set(state.allCovers.map(c => c.id));
+    const added = [];
+    const counts = { duplicate: 0, error: 0 };
+    let total = 0;
+
+    const showProgress = () => {
+        const done = added.length + counts.duplicate + counts.error;
+        elements.btnAddVideo.innerHTML = `<span style="font-size:12px;">${done}/${total || '?'}</span>`;
+    };
+    showProgress();
+
+    try {
+        const res = await fetch('/api/resolve_batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ text }),
+        });
+        if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+        // 逐行读取 NDJSON，解析完一个显示一个进度
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            const event = JSON.parse(line);
+            if (event.status === 'done') {
+                total = event.total;
+                // 服务器已直接写入新卡片；本地版本在写入前是最新的才能跟进，否则下次提交时按冲突处理
+                if (event.version !== undefined && event.version - (event.added ? 1 : 0) === state.version) {
+                    state.version = event.version;
+                    savePendingOps();
+                }
+            } else if (event.status === 'added' && !knownIds.has(event.card.id)) {
+                knownIds.add(event.card.id);
+                added.push(event);
+            } else if (event.status === 'error') {
+                counts.error++;
+                console.warn('解析失败:', event.url, event.error);
+            } else {
+                counts.duplicate++;
+            }
+            showProgress();
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer);
+
+        // 按粘贴顺序一次性插到最前面
+        added.sort((a, b) => a.index - b.index);
+        if (added.length) {
+            insertCards(added.map(e => e.card), 0);
+            // 服务器已写入这些卡片，不记录操作，只保存到本地
+            markDirty(added.map(e => e.card.id), { order: true });
+            elements.totalCount.textContent = state.allCovers.length;
+        }
+        alert(`批量导入完成：新增 ${added.length}，重复 ${counts.duplicate}，失败 ${counts.error}`);
+    } catch (e) {
+        alert('批量导入失败：' + e.message);
+        console.error(e);
+    } finally {
+        elements.btnAddVideo.innerHTML = originalText;
+    }
+}
+
 // ========================================
 // 帧选择器 (Backend Proxy Integration)
 // ========================================
@@ -1019,8 +1698,9 @@ async function openFrameSelector() {
                     videoUrl = data.real_video_url;
                     // 保存下来，下次不用再解析
                     state.currentCard.real_video_url = videoUrl;
-                    state.allCovers[state.currentCard.index].real_video_url = videoUrl;
-                    saveToLocalStorage();
+                    const cover = coverById(state.currentCard.id);
+                    if (cover) cover.real_video_url = videoUrl;
+                    recordOp({ op: 'update', id: state.currentCard.id, fields: { real_video_url: videoUrl } });
                 }
             }
         } catch (e) {
@@ -1036,14 +1716,74 @@ async function openFrameSelector() {
         videoUrl = prompt(hint, shareUrl);
     }
 
-    if (videoUrl) {
-        // 使用后端代理播放该 URL
-        const proxyUrl = `/proxy_video?url=${encodeURIComponent(videoUrl)}`;
-        elements.frameVideo.src = proxyUrl;
-        elements.frameSelectorModal.classList.add('active');
-        elements.frameVideo.play().catch(e => console.error(e));
-    } else {
+    if (!videoUrl) {
         alert('无法获取可播放的视频地址');
+        return;
+    }
+
+    elements.framePreviewImg.removeAttribute('src');
+    elements.framePreviewImg.style.display = 'none';
+    elements.frameSelectorModal.classList.add('active');
+
+    // 优先由服务器截帧：只拉取所需的视频片段，浏览器不用加载整段视频
+    if (await loadFrameStrip(state.currentCard.id, videoUrl)) return;
+
+    // 使用后端代理播放该 URL
+    const proxyUrl = `/proxy_video?url=${encodeURIComponent(videoUrl)}`;
+    elements.frameVideo.style.display = '';
+    elements.frameVideo.src = proxyUrl;
+    elements.frameVideo.play().catch(e => console.error(e));
+}
+
+// 请求缩略图条；服务器没有 ffmpeg 或截帧失败时返回 false
+async function loadFrameStrip(id, url) {
+    state.frameSource = null;
+    elements.frameStrip.classList.remove('active');
+    elements.frameStrip.innerHTML = '';
+    elements.frameVideo.style.display = 'none';
+    elements.frameTime.textContent = '加载中...';
+    try {
+        const params = new URLSearchParams({ id, url, n: CONFIG.frameStripCount });
+        const response = await fetch(`${CONFIG.frameStripApi}?${params}`);
+        if (!response.ok) return false;
+        const strip = await response.json();
+        if (!strip.frames.length) return false;
+
+        state.frameSource = { id, url, duration: strip.duration };
+        const fragment = document.createDocumentFragment();
+        for (const frame of strip.frames) {
+            const img = document.createElement('img');
+            img.src = frame.src;
+            img.dataset.t = frame.t;
+            img.alt = formatFrameTime(frame.t);
+            img.addEventListener('click', () => selectServerFrame(frame.t));
+            fragment.appendChild(img);
+        }
+        elements.frameStrip.appendChild(fragment);
+        elements.frameStrip.classList.add('active');
+        selectServerFrame(strip.frames[0].t);
+        return true;
+    } catch (e) {
+        return false;
+    } finally {
+        elements.frameTime.textContent = '0:00';
+    }
+}
+
+const formatFrameTime = (seconds) => `${Math.floor(seconds / 60)}:${Math.floor(seconds % 60).toString().padStart(2, '0')}`;
+
+// 预览服务端截取的原尺寸帧，并同步滑块与缩略图高亮
+function selectServerFrame(t) {
+    const source = state.frameSource;
+    if (!source) return;
+    t = Math.round(Math.min(Math.max(t, 0), source.duration) * 10) / 10;
+    const params = new URLSearchParams({ id: source.id, url: source.url, t });
+    elements.framePreviewImg.src = `${CONFIG.frameApi}?${params}`;
+    elements.framePreviewImg.style.display = 'block';
+    elements.frameSlider.value = (t / source.duration) * 100;
+    elements.frameTime.textContent = formatFrameTime(t);
+    for (const img of elements.frameStrip.children) {
+        img.classList.toggle('active', Number(img.dataset.t) === t);
     }
 }
 
@@ -1051,6 +1791,10 @@ function closeFrameSelector() {
     elements.frameSelectorModal.classList.remove('active');
     elements.frameVideo.pause();
     elements.frameVideo.src = '';
+    clearTimeout(state.frameSeekTimer);
+    state.frameSource = null;
+    elements.frameStrip.classList.remove('active');
+    elements.frameStrip.innerHTML = '';
 }
 
 function updateFrameSlider() {
@@ -1066,6 +1810,14 @@ function updateFrameSlider() {
 }
 
 function seekVideo() {
+    if (state.frameSource) {
+        // 服务端截帧：拖动停下后再请求，避免每个中间位置都解码一次
+        const t = (parseFloat(elements.frameSlider.value) / 100) * state.frameSource.duration;
+        elements.frameTime.textContent = formatFrameTime(t);
+        clearTimeout(state.frameSeekTimer);
+        state.frameSeekTimer = setTimeout(() => selectServerFrame(t), 150);
+        return;
+    }
     const video = elements.frameVideo;
     if (video.duration) {
         const percent = parseFloat(elements.frameSlider.value);
@@ -1074,6 +1826,12 @@ function seekVideo() {
 }
 
 function captureFrame() {
+    if (state.frameSource) {
+        // 预览图已是服务器截取的当前帧
+        clearTimeout(state.frameSeekTimer);
+        selectServerFrame((parseFloat(elements.frameSlider.value) / 100) * state.frameSource.duration);
+        return;
+    }
     const video = elements.frameVideo;
     const canvas = elements.frameCanvas;
 
@@ -1092,29 +1850,44 @@ function captureFrame() {
     }
 }
 
-function applyFrameAsCover() {
-    const dataUrl = elements.framePreviewImg.src;
-    if (!dataUrl || dataUrl.length < 100) {
+async function applyFrameAsCover() {
+    const preview = elements.framePreviewImg;
+    const dataUrl = preview.getAttribute('src');
+    if (!dataUrl || !preview.complete || !preview.naturalWidth) {
         alert('请先截取帧');
         return;
     }
 
-    const index = state.currentCard.index;
-    const cover = state.allCovers[index];
-
-    cover.cover_url = dataUrl;
-    cover.local_cover = ''; // 清除旧的本地封面引用
-
-    saveToLocalStorage();
-
-    // 刷新界面
-    // 找到对应的 DOM 元素更新图片，避免全量刷新
-    const card = document.querySelector(`.poster-card[data-index="${index}"]`);
-    if (card) {
-        const img = card.querySelector('.poster-image');
-        img.src = dataUrl;
+    const cover = coverById(state.currentCard.id);
+    if (!cover) return;
+    const width = preview.naturalWidth;
+    const height = preview.naturalHeight;
+
+    // 截帧（浏览器截取的 data URL 或服务器截帧地址）上传到封面库，数据里只保存路径；
+    // 尺寸取自预览图，卡片无需等图片加载即可布局
+    const path = await uploadImage(dataUrl, { id: cover.id });
+    if (path) {
+        Object.assign(cover, { local_cover: path, width, height, aspect: +(width / height).toFixed(4) });
+        delete cover.thumbs;
+        delete cover.placeholder;
+        recordOp({ op: 'update', id: cover.id, fields: { local_cover: path, width: cover.width, height: cover.height,
+            aspect: cover.aspect, thumbs: null, placeholder: null } });
+    } else if (!isInlineImage(dataUrl)) {
+        alert('封面上传失败，请稍后重试');
+        return;
+    } else {
+        // 没有服务器（静态方式打开）时只能内嵌在数据里
+        console.warn('上传失败，封面以 base64 形式保存在本地数据中');
+        cover.cover_url = dataUrl;
+        cover.local_cover = ''; // 清除旧的本地封面引用
+        delete cover.thumbs;
+        delete cover.aspect;
+        recordOp({ op: 'update', id: cover.id, fields: { cover_url: dataUrl, local_cover: '', thumbs: null, aspect: null } });
     }
 
+    // 只更新这一张卡片，尺寸变化时从它开始重新排列
+    updateCard(cover.id);
+
     closeFrameSelector();
     alert('封面已更新');
 }
@@ -1123,12 +1896,12 @@ function applyFrameAsCover() {
 
 // ... (UI Helper functions)
 function openLightbox(card) {
-    const index = parseInt(card.dataset.index);
-    const cover = state.allCovers[index];
-    state.currentCard = { ...cover, index };
+    const cover = coverById(card.dataset.id);
+    if (!cover) return;
+    state.currentCard = { ...cover };
 
-    const img = card.querySelector('.poster-image');
-    elements.lightboxImg.src = img.src;
+    // 灯箱使用原图而不是卡片上的缩略图
+    elements.lightboxImg.src = coverFullSrc(cover);
     elements.lightboxTitle.innerText = cover.title || '无标题';
     elements.lightboxAuthor.textContent = state.settings.showAuthor ? `@${cover.author || '未知'}` : '';
     elements.lightboxLink.href = cover.video_url || '#';
@@ -1184,8 +1957,8 @@ function toggleEditMode() {
             elements.heroSubtitle.dataset.text = newSubtitle;
         }
         saveSettings();
-        // 自动保存到服务器 JSON 文件
-        saveToServer();
+        // 不等自动保存的延时，立即保存到本地和服务器
+        flushChanges();
     }
 }
 
@@ -1232,16 +2005,13 @@ function setupHeroInteractions() {
         elements.inputAvatar.addEventListener('change', function () {
             const file = this.files[0];
             if (file) {
-                const reader = new FileReader();
-                reader.onload = async function (e) {
-                    let base64 = e.target.result;
-                    // 压缩头像
-                    base64 = await compressImage(base64, 300, 0.7);
-                    state.settings.hero.avatar = base64;
-                    if (elements.heroAvatar) elements.heroAvatar.src = base64;
+                // 压缩头像（服务器不可用时以 data URL 存在设置中）
+                compressImage(file, 300, 0.7).then(async (blob) => {
+                    const path = await uploadImage(blob, { slot: 'avatar' });
+                    state.settings.hero.avatar = path ? `/${path}` : await blobToDataUrl(blob);
+                    if (elements.heroAvatar) elements.heroAvatar.src = state.settings.hero.avatar;
                     saveSettings();
-                };
-                reader.readAsDataURL(file);
+                });
             }
         });
     }
@@ -1259,16 +2029,13 @@ function setupHeroInteractions() {
         elements.inputBg.addEventListener('change', function () {
             const file = this.files[0];
             if (file) {
-                const reader = new FileReader();
-                reader.onload = async function (e) {
-                    let base64 = e.target.result;
-                    // 压缩背景图
-                    base64 = await compressImage(base64, 1920, 0.6);
-                    state.settings.hero.background = base64;
+                // 压缩背景图
+                compressImage(file, 1920, 0.6).then(async (blob) => {
+                    const path = await uploadImage(blob, { slot: 'background' });
+                    state.settings.hero.background = path ? `/${path}` : await blobToDataUrl(blob);
                     applyHeroBackground();
                     saveSettings();
-                };
-                reader.readAsDataURL(file);
+                });
             }
         });
     }
@@ -1285,13 +2052,158 @@ function applyHeroBackground() {
     }
 }
 
-function deleteCard(index) {
-    // 实际上 splice 会改变后续元素的 index，所以需要谨慎
-    // 最好的方式是给每个 item 一个唯一 id，通过 id 查找删除
-    // 但简单起见，我们只能全量刷新
-    state.allCovers.splice(index, 1);
-    saveToLocalStorage();
-    refreshGrid();
+// ========================================
+// 增量更新：按 ID 删除 / 移动 / 插入单张卡片
+// ========================================
+// Masonry 模式下已渲染的是 state.allCovers 的前 state.loadedCount 张，顺序与 masonry.items 一致；
+// 修改后只从受影响的位置开始重新排列，之前的卡片既不测量也不移动。这里只改数据和网格，
+// 记录同步操作、保存由调用方负责（deleteCard、addVideoByUrl 等）
+function coverById(id) {
+    return state.allCovers.find(cover => cover.id === id);
+}
+
+function coverIndex(id) {
+    return state.allCovers.findIndex(cover => cover.id === id);
+}
+
+function cardElement(id) {
+    return elements.grid.querySelector(`.poster-card[data-id="${CSS.escape(String(id))}"]`);
+}
+
+// 第 index 张卡片之前的列高保持不变，只重新排列它及之后的卡片
+// （用到 Masonry 4 的 _resetLayout / colYs / layoutItems / _postLayout，页面固定引用 masonry-layout@4）
+function relayoutFrom(index) {
+    const msnry = state.masonryInstance;
+    const columnWidth = msnry.columnWidth;
+    msnry._resetLayout();
+    if (index <= 0 || msnry.columnWidth !== columnWidth) {
+        msnry.layout();  // 列宽变了，之前的位置都不能用
+        return;
+    }
+    const items = msnry.items;
+    for (let i = 0; i < index && i < items.length; i++) {
+        // item.position 是像素坐标；columnWidth 已包含间距
+        const item = items[i];
+        const col = Math.round(item.position.x / msnry.columnWidth);
+        msnry.colYs[col] = Math.max(msnry.colYs[col], item.position.y + item.size.outerHeight);
+    }
+    msnry.layoutItems(items.slice(index), true);
+    msnry._postLayout();  // 更新容器高度
+}
+
+// 网格中还有批次在等待图片加载时下标会对不上，只能整体重建
+function gridBusy() {
+    return !state.virtualGrid && (!state.masonryInstance || state.isLoading);
+}
+
+function mountCards(covers, index) {
+    const msnry = state.masonryInstance;
+    const elems = covers.map((cover, k) => {
+        const item = createPosterCard(cover, index + k);
+        item.classList.add('loaded');
+        if (state.observer) state.observer.observe(item);
+        return item;
+    });
+    const next = msnry.items[index];
+    elements.grid.insertBefore(createFragment(elems), next ? next.element : null);
+    msnry.items.splice(index, 0, ...msnry._itemize(elems));
+    state.loadedCount += covers.length;
+}
+
+function unmountCard(index) {
+    const msnry = state.masonryInstance;
+    const [item] = msnry.items.splice(index, 1);
+    if (state.observer) state.observer.unobserve(item.element);
+    item.element.remove();
+    state.loadedCount--;
+}
+
+function createFragment(nodes) {
+    const fragment = document.createDocumentFragment();
+    nodes.forEach(node => fragment.appendChild(node));
+    return fragment;
+}
+
+function removeCard(id) {
+    const index = coverIndex(id);
+    if (index < 0) return null;
+    const [removed] = state.allCovers.splice(index, 1);
+    if (state.virtualGrid) {
+        state.virtualGrid.refresh({ from: index });
+    } else if (gridBusy()) {
+        refreshGrid();
+    } else if (index < state.loadedCount) {
+        unmountCard(index);
+        relayoutFrom(index);
+    }
+    return removed;
+}
+
+function insertCards(covers, index) {
+    state.allCovers.splice(index, 0, ...covers);
+    if (state.virtualGrid) {
+        state.virtualGrid.refresh({ from: index });
+    } else if (gridBusy()) {
+        refreshGrid();
+    } else if (index <= state.loadedCount) {
+        // 插入到尚未渲染的部分时不用处理，滚动到那里时照常分批渲染
+        mountCards(covers, index);
+        relayoutFrom(index);
+    }
+}
+
+// 把卡片移到第 to 张的位置（拖拽排序等调用；调用方记录 { op: 'move', id, to }）
+function moveCard(id, to) {
+    const from = coverIndex(id);
+    if (from < 0) return false;
+    to = Math.max(0, Math.min(to, state.allCovers.length - 1));
+    if (from === to) return true;
+    const [cover] = state.allCovers.splice(from, 1);
+    state.allCovers.splice(to, 0, cover);
+    if (state.virtualGrid) {
+        state.virtualGrid.refresh({ from: Math.min(from, to) });
+        return true;
+    }
+    if (gridBusy()) {
+        refreshGrid();
+        return true;
+    }
+    const msnry = state.masonryInstance;
+    const loaded = state.loadedCount;
+    if (from < loaded && to < loaded) {
+        const [item] = msnry.items.splice(from, 1);
+        msnry.items.splice(to, 0, item);
+        const next = msnry.items[to + 1];
+        elements.grid.insertBefore(item.element, next ? next.element : null);
+    } else if (from < loaded) {
+        unmountCard(from);  // 移到了未渲染的部分
+    } else if (to < loaded) {
+        mountCards([cover], to);
+    } else {
+        return true;
+    }
+    relayoutFrom(Math.min(from, to));
+    return true;
+}
+
+// 卡片数据被原地修改（如更换封面）后重新填充，尺寸可能变化，从它开始重新排列
+function updateCard(id) {
+    const index = coverIndex(id);
+    if (index < 0) return;
+    if (state.virtualGrid) {
+        state.virtualGrid.refresh({ from: index });
+        return;
+    }
+    const card = cardElement(id);
+    if (!card || gridBusy()) return;
+    fillPosterCard(card.parentElement, state.allCovers[index], index);
+    relayoutFrom(index);
+}
+
+function deleteCard(id) {
+    // 按 ID 只移除这一张卡片，其余卡片原地重新排列，滚动位置不变
+    if (!removeCard(id)) return;
+    recordOp({ op: 'delete', ids: [id] });
     elements.totalCount.textContent = state.allCovers.length;
 }
 
@@ -1308,10 +2220,19 @@ function refreshGrid() {
 
     if (state.masonryInstance) {
         state.masonryInstance.destroy();
+        state.masonryInstance = null;
+    }
+    if (state.virtualGrid) {
+        state.virtualGrid.destroy();
+        state.virtualGrid = null;
     }
 
-    initMasonry();
-    loadNextBatch();
+    if (state.settings.virtualGrid) {
+        initVirtualGrid();
+    } else {
+        initMasonry();
+        loadNextBatch();
+    }
     applySettings(); // 重新应用样式
 }
 
@@ -1329,22 +2250,16 @@ function exportData() {
 function importData(e) {
     const file = e.target.files[0];
     if (!file) return;
-    const reader = new FileReader();
-    reader.onload = (event) => {
-        try {
-            const data = JSON.parse(event.target.result);
-            if (Array.isArray(data)) {
-                state.allCovers = data;
-                saveToLocalStorage();
-                refreshGrid();
-                elements.totalCount.textContent = state.allCovers.length;
-                alert('导入成功');
-            }
-        } catch (err) {
-            alert('导入失败');
+    // 大文件在 Worker 中解析，不阻塞页面
+    file.text().then(text => dataStore.parse(text)).then((data) => {
+        if (Array.isArray(data)) {
+            state.allCovers = data;
+            recordOp({ op: 'replace', cards: data });
+            refreshGrid();
+            elements.totalCount.textContent = state.allCovers.length;
+            alert('导入成功');
         }
-    };
-    reader.readAsText(file);
+    }).catch(() => alert('导入失败'));
     e.target.value = '';
 }
 
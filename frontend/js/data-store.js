@@ -0,0 +1,194 @@
+/**
+ * 本地数据存储（主线程一侧）
+ * 解析、序列化、对比和图片压缩都交给 data-worker.js，数据存在 IndexedDB；
+ * 浏览器不支持 Worker / IndexedDB（如直接用 file:// 打开、部分隐私模式）时退回主线程 + localStorage
+ */
+const LEGACY_DATA_KEY = 'posterwall_data';
+const LEGACY_SYNC_KEY = 'posterwall_sync';
+
+class DataStore {
+    constructor(workerUrl = 'js/data-worker.js') {
+        this.calls = new Map();
+        this.nextId = 1;
+        this.persistent = false; // true：数据存在 IndexedDB；false：退回 localStorage
+        this.hasSnapshot = false; // IndexedDB 中已有完整数据，之后可以只保存变化的卡片
+        this.saving = null;      // 正在进行的保存
+        this.queued = null;      // 保存期间又有新的保存请求时，只保留最新的一份
+        try {
+            this.worker = new Worker(workerUrl);
+            this.worker.onmessage = (event) => this.onMessage(event.data);
+            this.worker.onerror = (event) => {
+                console.warn('数据 Worker 出错，改用主线程:', event.message);
+                this.disableWorker();
+            };
+        } catch (e) {
+            this.worker = null;
+        }
+    }
+
+    call(type, params = {}) {
+        if (!this.worker) return Promise.reject(new Error('Worker 不可用'));
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.calls.set(id, { resolve, reject });
+            this.worker.postMessage({ id, type, ...params });
+        });
+    }
+
+    onMessage({ id, result, error }) {
+        const call = this.calls.get(id);
+        if (!call) return;
+        this.calls.delete(id);
+        if (error !== undefined) call.reject(new Error(error));
+        else call.resolve(result);
+    }
+
+    disableWorker() {
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        this.persistent = false;
+        this.calls.forEach(call => call.reject(new Error('Worker 不可用')));
+        this.calls.clear();
+    }
+
+    /**
+     * 读取本地数据（首次使用时把旧版 localStorage 数据迁移到 IndexedDB）
+     * @returns {Promise<{covers: object[]|null, sync: {version, ops}|null}>}
+     */
+    async load() {
+        const legacyData = localStorage.getItem(LEGACY_DATA_KEY);
+        const legacySync = localStorage.getItem(LEGACY_SYNC_KEY);
+        try {
+            const { covers, sync, migrated } = await this.call('load', { legacyData, legacySync });
+            this.persistent = true;
+            this.hasSnapshot = Array.isArray(covers) && covers.length > 0;
+            if (migrated) {
+                localStorage.removeItem(LEGACY_DATA_KEY);
+                localStorage.removeItem(LEGACY_SYNC_KEY);
+                console.log('📦 本地数据已从 localStorage 迁移到 IndexedDB');
+            }
+            return { covers, sync };
+        } catch (e) {
+            if (this.worker) console.warn('IndexedDB 不可用，本地数据改存 localStorage:', e.message);
+            return { covers: parseJson(legacyData), sync: parseJson(legacySync) };
+        }
+    }
+
+    /**
+     * 保存卡片列表；上一次保存未完成时排队，排队期间的多次调用合并为一次（保存最新的一份）
+     * @returns {Promise<{written, deleted, bytes, total}>}
+     */
+    save(covers) {
+        if (this.saving) {
+            if (this.queued) this.queued.covers = covers;
+            else this.queued = { covers, done: this.saving.catch(() => {}).then(() => this.flushQueued()) };
+            return this.queued.done;
+        }
+        this.saving = this.write(covers).finally(() => { this.saving = null; });
+        return this.saving;
+    }
+
+    flushQueued() {
+        const { covers } = this.queued;
+        this.queued = null;
+        return this.save(covers);
+    }
+
+    async write(covers) {
+        if (this.persistent) {
+            try {
+                const result = await this.call('save', { covers });
+                this.hasSnapshot = true;
+                return result;
+            } catch (e) {
+                console.warn('写入 IndexedDB 失败，改存 localStorage:', e.message);
+                this.persistent = false;
+            }
+        }
+        const json = JSON.stringify(covers);
+        localStorage.setItem(LEGACY_DATA_KEY, json);
+        return { written: covers.length, deleted: 0, bytes: json.length, total: covers.length };
+    }
+
+    /**
+     * 只保存变化的部分；本地还没有完整数据或不能使用 IndexedDB 时保存全部 covers
+     * @param {{cards: object[], removed: string[], order: string[]|null}} changes
+     *   cards: 修改或新增的卡片；removed: 删除的卡片 ID；order: 顺序有变化时为全部卡片 ID
+     * @param {object[]} covers 全部卡片
+     */
+    async saveChanges(changes, covers) {
+        if (this.saving) await this.saving.catch(() => {});
+        if (!this.persistent || !this.hasSnapshot) return this.save(covers);
+        try {
+            return await this.call('saveChanges', changes);
+        } catch (e) {
+            console.warn('增量写入 IndexedDB 失败，改为整体保存:', e.message);
+            return this.save(covers);
+        }
+    }
+
+    async saveSync(sync) {
+        if (this.persistent) {
+            try {
+                return await this.call('saveSync', sync);
+            } catch (e) {
+                this.persistent = false;
+            }
+        }
+        localStorage.setItem(LEGACY_SYNC_KEY, JSON.stringify(sync));
+    }
+
+    // 在 Worker 中解析 JSON 文本（如导入的文件），格式错误时 reject
+    parse(text) {
+        if (!this.worker) return Promise.resolve().then(() => JSON.parse(text));
+        return this.call('parse', { text });
+    }
+
+    /**
+     * 缩放并压缩为 JPEG；Worker 不支持 OffscreenCanvas 时在主线程用 canvas 压缩，都失败时返回原图
+     * @param {Blob} image
+     * @returns {Promise<Blob>}
+     */
+    async compress(image, maxWidth, quality) {
+        try {
+            return await this.call('compress', { image, maxWidth, quality });
+        } catch (e) {
+            return compressOnMainThread(image, maxWidth, quality);
+        }
+    }
+}
+
+function parseJson(text) {
+    try {
+        return text ? JSON.parse(text) : null;
+    } catch (e) {
+        console.warn('本地数据解析失败:', e);
+        return null;
+    }
+}
+
+function compressOnMainThread(image, maxWidth, quality) {
+    return new Promise((resolve) => {
+        const url = URL.createObjectURL(image);
+        const img = new Image();
+        img.onload = () => {
+            URL.revokeObjectURL(url);
+            let width = img.width;
+            let height = img.height;
+            if (width > maxWidth) {
+                height = Math.round((height * maxWidth) / width);
+                width = maxWidth;
+            }
+            const canvas = document.createElement('canvas');
+            canvas.width = width;
+            canvas.height = height;
+            canvas.getContext('2d').drawImage(img, 0, 0, width, height);
+            canvas.toBlob(blob => resolve(blob || image), 'image/jpeg', quality);
+        };
+        img.onerror = () => {
+            URL.revokeObjectURL(url);
+            resolve(image); // 失败则返回原图
+        };
+        img.src = url;
+    });
+}
@@ -0,0 +1,211 @@
+/**
+ * 数据层 Worker
+ * 在后台线程完成元数据的 JSON 解析 / 序列化、与上次保存内容的对比、图片压缩，
+ * 本地数据存在 IndexedDB（每张卡片一条记录，只写入有变化的卡片），不占用主线程也不受 localStorage 5MB 限制。
+ * 消息格式：{ id, type, ...参数 }，回复 { id, result } 或 { id, error }
+ */
+const DB_NAME = 'posterwall';
+const DB_VERSION = 1;
+const COVERS = 'covers'; // 卡片记录，键为卡片 ID
+const META = 'meta';     // order：卡片 ID 顺序；sync：{ version, ops } 未提交的修改
+
+let dbPromise = null;
+let lastSaved = new Map(); // 卡片 ID -> 上次保存的 JSON，用于对比
+let lastOrder = [];
+let queue = Promise.resolve(); // 写操作依次执行
+
+function serial(task) {
+    queue = queue.catch(() => {}).then(task); // 上一次失败不影响之后的写入
+    return queue;
+}
+
+function request(req) {
+    return new Promise((resolve, reject) => {
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = tx.onabort = () => reject(tx.error || new Error('IndexedDB 事务被中止'));
+    });
+}
+
+function openDb() {
+    if (!dbPromise) {
+        const req = indexedDB.open(DB_NAME, DB_VERSION);
+        req.onupgradeneeded = () => {
+            const db = req.result;
+            if (!db.objectStoreNames.contains(COVERS)) db.createObjectStore(COVERS);
+            if (!db.objectStoreNames.contains(META)) db.createObjectStore(META);
+        };
+        dbPromise = request(req);
+    }
+    return dbPromise;
+}
+
+// 没有 ID 的卡片（如手工导入的数据）按位置生成键，保证每张卡片都能存下
+const coverKey = (cover, index) => (cover && cover.id != null ? String(cover.id) : `#${index}`);
+
+function sameOrder(a, b) {
+    if (a.length !== b.length) return false;
+    for (let i = 0; i < a.length; i++) {
+        if (a[i] !== b[i]) return false;
+    }
+    return true;
+}
+
+async function writeCovers(covers) {
+    const db = await openDb();
+    const tx = db.transaction([COVERS, META], 'readwrite');
+    const store = tx.objectStore(COVERS);
+    const saved = new Map();
+    const order = new Array(covers.length);
+    let written = 0;
+    let bytes = 0;
+    covers.forEach((cover, i) => {
+        const key = coverKey(cover, i);
+        const json = JSON.stringify(cover);
+        order[i] = key;
+        saved.set(key, json);
+        if (lastSaved.get(key) !== json) {
+            store.put(cover, key);
+            written++;
+            bytes += json.length;
+        }
+    });
+    let deleted = 0;
+    for (const key of lastSaved.keys()) {
+        if (!saved.has(key)) {
+            store.delete(key);
+            deleted++;
+        }
+    }
+    if (!sameOrder(order, lastOrder)) tx.objectStore(META).put(order, 'order');
+    await transactionDone(tx);
+    lastSaved = saved;
+    lastOrder = order;
+    return { written, deleted, bytes, total: covers.length };
+}
+
+// 只写入变化的卡片；order 为 null 表示顺序没变
+async function writeChanges({ cards, removed, order }) {
+    const db = await openDb();
+    const tx = db.transaction([COVERS, META], 'readwrite');
+    const store = tx.objectStore(COVERS);
+    const written = new Map();
+    let bytes = 0;
+    for (const cover of cards) {
+        const key = String(cover.id);
+        const json = JSON.stringify(cover);
+        if (lastSaved.get(key) !== json) {
+            store.put(cover, key);
+            written.set(key, json);
+            bytes += json.length;
+        }
+    }
+    const deleted = removed.map(String).filter(key => lastSaved.has(key));
+    deleted.forEach(key => store.delete(key));
+    if (order) {
+        order = order.map(String);
+        if (!sameOrder(order, lastOrder)) tx.objectStore(META).put(order, 'order');
+    }
+    await transactionDone(tx);
+    // 事务提交后才更新对比基准，写入失败时下次还会重写
+    written.forEach((json, key) => lastSaved.set(key, json));
+    deleted.forEach(key => lastSaved.delete(key));
+    if (order) lastOrder = order;
+    return { written: written.size, deleted: deleted.length, bytes, total: lastOrder.length };
+}
+
+async function readCovers() {
+    const db = await openDb();
+    const tx = db.transaction([COVERS, META], 'readonly');
+    const store = tx.objectStore(COVERS);
+    const [keys, records, order, sync] = await Promise.all([
+        request(store.getAllKeys()),
+        request(store.getAll()),
+        request(tx.objectStore(META).get('order')),
+        request(tx.objectStore(META).get('sync')),
+    ]);
+    if (!order) return { covers: null, sync: sync || null };
+    const byKey = new Map(keys.map((key, i) => [key, records[i]]));
+    const covers = [];
+    lastSaved = new Map();
+    lastOrder = [];
+    for (const key of order) {
+        const cover = byKey.get(key);
+        if (cover === undefined) continue;
+        covers.push(cover);
+        lastOrder.push(key);
+        lastSaved.set(key, JSON.stringify(cover));
+    }
+    return { covers, sync: sync || null };
+}
+
+const handlers = {
+    /**
+     * 读取本地数据；IndexedDB 为空时迁移旧版 localStorage 中的数据（由主线程读出字符串传入）
+     * 返回 { covers（无本地数据时为 null）, sync, migrated }
+     */
+    async load({ legacyData, legacySync }) {
+        const loaded = await readCovers();
+        if (loaded.covers || (!legacyData && !legacySync)) return { ...loaded, migrated: false };
+        let covers = null;
+        let sync = null;
+        try { covers = legacyData ? JSON.parse(legacyData) : null; } catch (e) { covers = null; }
+        try { sync = legacySync ? JSON.parse(legacySync) : null; } catch (e) { sync = null; }
+        if (Array.isArray(covers)) await writeCovers(covers);
+        else covers = null;
+        if (sync) await handlers.saveSync(sync);
+        return { covers, sync, migrated: true };
+    },
+
+    // 保存整个卡片列表，只写入与上次保存不同的卡片
+    save({ covers }) {
+        return serial(() => writeCovers(covers));
+    },
+
+    saveChanges(changes) {
+        return serial(() => writeChanges(changes));
+    },
+
+    saveSync({ version, ops }) {
+        return serial(async () => {
+            const db = await openDb();
+            const tx = db.transaction(META, 'readwrite');
+            tx.objectStore(META).put({ version, ops }, 'sync');
+            await transactionDone(tx);
+        });
+    },
+
+    parse({ text }) {
+        return JSON.parse(text);
+    },
+
+    // 缩放并编码为 JPEG，返回 Blob
+    async compress({ image, maxWidth, quality }) {
+        const bitmap = await createImageBitmap(image);
+        let { width, height } = bitmap;
+        if (width > maxWidth) {
+            height = Math.round((height * maxWidth) / width);
+            width = maxWidth;
+        }
+        const canvas = new OffscreenCanvas(width, height);
+        canvas.getContext('2d').drawImage(bitmap, 0, 0, width, height);
+        bitmap.close();
+        return canvas.convertToBlob({ type: 'image/jpeg', quality });
+    },
+};
+
+self.onmessage = async (event) => {
+    const { id, type, ...params } = event.data;
+    try {
+        const result = await handlers[type](params);
+        self.postMessage({ id, result });
+    } catch (error) {
+        self.postMessage({ id, error: String((error && error.message) || error) });
+    }
+};
@@ -0,0 +1,142 @@
+/**
+ * 网格增量更新性能测试（打开 /?bench 后在控制台运行 runGridBenchmark()）
+ * 用合成卡片临时替换墙上数据（不保存、不记录同步操作），分别测量 500 / 2000 张卡片时
+ * 删除 / 插入 / 移动单张卡片的耗时：增量更新、Masonry 全量 layout()、虚拟滚动，以及整体重建一次的耗时。
+ * 每次操作后读取 offsetHeight 强制浏览器完成布局，计入样式计算与重排。结束后恢复原数据
+ */
+(function () {
+    const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+
+    // 可复现的伪随机数（mulberry32）
+    function random(seed) {
+        return () => {
+            seed = (seed + 0x6D2B79F5) | 0;
+            let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+            t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+            return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+        };
+    }
+
+    // 高度不一的纯色 SVG 封面，不发网络请求
+    function syntheticCovers(count, rand) {
+        return Array.from({ length: count }, (_, i) => {
+            const height = Math.round(90 * (1.1 + rand() * 0.9));
+            const color = Math.floor(rand() * 0xffffff).toString(16).padStart(6, '0');
+            return {
+                id: `bench-${count}-${i}`,
+                title: `测试卡片 ${i}`,
+                author: 'bench',
+                video_url: '',
+                cover_url: `data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' width='90' height='${height}'><rect width='100%' height='100%' fill='%23${color}'/></svg>`,
+            };
+        });
+    }
+
+    // 分批渲染直到所有卡片都在 DOM 中
+    async function renderAll() {
+        while (state.loadedCount < state.allCovers.length || state.isLoading) {
+            if (!state.isLoading) loadNextBatch();
+            await nextFrame();
+        }
+    }
+
+    function time(fn) {
+        const start = performance.now();
+        fn();
+        void elements.grid.offsetHeight;
+        return performance.now() - start;
+    }
+
+    function median(values) {
+        const sorted = [...values].sort((a, b) => a - b);
+        return sorted.length ? sorted[sorted.length >> 1] : NaN;
+    }
+
+    // 随机位置的 删除 -> 原位插入 -> 移动，卡片总数保持不变；after 在每次操作后调用（计入耗时）
+    function runOps(count, rounds, rand, op, after) {
+        const timings = { remove: [], insert: [], move: [] };
+        for (let r = 0; r < rounds; r++) {
+            const index = Math.floor(rand() * count);
+            const cover = state.allCovers[index];
+            timings.remove.push(time(() => { op.remove(cover.id); after(index); }));
+            timings.insert.push(time(() => { op.insert(cover, index); after(index); }));
+            const to = Math.floor(rand() * count);
+            timings.move.push(time(() => { op.move(cover.id, to); after(Math.min(index, to)); }));
+        }
+        return timings;
+    }
+
+    async function benchSize(count, rounds) {
+        const covers = syntheticCovers(count, random(count));
+        const rows = [];
+        const report = (mode, timings) => {
+            for (const [name, values] of Object.entries(timings)) {
+                rows.push({ 卡片数: count, 模式: mode, 操作: name, '中位数 ms': +median(values).toFixed(2), '最大 ms': +Math.max(...values).toFixed(2) });
+            }
+        };
+
+        // 整体重建：旧的删除 / 插入方式（refreshGrid 后重新渲染全部卡片）
+        state.settings.virtualGrid = false;
+        state.allCovers = covers.slice();
+        const start = performance.now();
+        refreshGrid();
+        await renderAll();
+        rows.push({ 卡片数: count, 模式: 'refreshGrid 重建', 操作: '任意', '中位数 ms': +(performance.now() - start).toFixed(2), '最大 ms': NaN });
+
+        // 增量：只从变化位置开始重新排列
+        const incremental = { remove: removeCard, insert: (cover, index) => insertCards([cover], index), move: moveCard };
+        report('Masonry 增量', runOps(count, rounds, random(1), incremental, () => {}));
+
+        // 全量：同样的 DOM 修改，重新排列时整体 layout()（app.js 的全局函数可以临时替换）
+        const relayout = window.relayoutFrom;
+        window.relayoutFrom = () => state.masonryInstance.layout();
+        try {
+            report('Masonry 全量 layout', runOps(count, rounds, random(1), incremental, () => {}));
+        } finally {
+            window.relayoutFrom = relayout;
+        }
+
+        // 虚拟滚动：数据修改 + 同步渲染一帧
+        state.settings.virtualGrid = true;
+        state.allCovers = covers.slice();
+        refreshGrid();
+        await nextFrame();
+        report('虚拟滚动', runOps(count, rounds, random(1), incremental, () => state.virtualGrid.render()));
+        return rows;
+    }
+
+    function showResults(rows) {
+        const panel = document.createElement('div');
+        panel.style.cssText = 'position:fixed;right:16px;bottom:16px;z-index:99999;max-height:70vh;overflow:auto;'
+            + 'background:rgba(0,0,0,.85);color:#eee;font:12px monospace;padding:12px;border-radius:8px';
+        const head = Object.keys(rows[0]);
+        panel.innerHTML = `<table><tr>${head.map(h => `<th style="text-align:left;padding:2px 8px">${h}</th>`).join('')}</tr>`
+            + rows.map(row => `<tr>${head.map(h => `<td style="padding:2px 8px">${row[h]}</td>`).join('')}</tr>`).join('')
+            + '</table>';
+        panel.addEventListener('click', () => panel.remove());
+        document.body.appendChild(panel);
+    }
+
+    /**
+     * @param {number[]} sizes 测试的卡片数
+     * @param {number} rounds 每种操作重复次数
+     */
+    window.runGridBenchmark = async function (sizes = [500, 2000], rounds = 20) {
+        const saved = { covers: state.allCovers, virtualGrid: state.settings.virtualGrid };
+        const rows = [];
+        try {
+            for (const count of sizes) {
+                rows.push(...await benchSize(count, rounds));
+            }
+        } finally {
+            state.allCovers = saved.covers;
+            state.settings.virtualGrid = saved.virtualGrid;
+            refreshGrid();
+        }
+        console.table(rows);
+        showResults(rows);
+        return rows;
+    };
+
+    console.log('📏 网格性能测试已加载，运行 runGridBenchmark() 开始');
+})();
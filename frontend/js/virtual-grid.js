@@ -0,0 +1,231 @@
+/**
+ * 虚拟滚动网格
+ * 卡片位置由预计算的宽高比直接算出（与 Masonry 相同：每张卡片放进当前最短的一列），
+ * DOM 中只保留视口上下 overscan 范围内的卡片；滚出范围的节点隐藏后放回节点池，给新进入的卡片复用。
+ * DOM 节点数和每次滚动的开销只与视口大小有关，不随收藏数量增长
+ */
+class VirtualGrid {
+    /**
+     * @param {HTMLElement} container 网格容器
+     * @param {object} options
+     *   columns / gap: 列数与间距（px）
+     *   overscan: 视口上下额外渲染的像素
+     *   aspectOf(item): 卡片宽高比（宽 / 高）
+     *   createNode(): 新建一个空卡片节点
+     *   fillNode(node, item, index): 把数据填入（可能是回收来的）节点
+     */
+    constructor(container, options) {
+        this.container = container;
+        this.columns = options.columns;
+        this.gap = options.gap;
+        this.overscan = options.overscan ?? 800;
+        this.aspectOf = options.aspectOf;
+        this.createNode = options.createNode;
+        this.fillNode = options.fillNode;
+
+        this.items = [];
+        this.width = 0;
+        this.columnWidth = 0;
+        this.tops = new Float64Array(0);
+        this.heights = new Float64Array(0);
+        this.cols = new Uint16Array(0);
+        this.columnItems = [];   // 每列的卡片下标，按 top 递增
+        this.columnHeights = [];
+        this.laidOut = 0;        // 已计算位置的卡片数
+
+        this.nodes = new Map();  // 卡片下标 -> 正在显示的节点
+        this.pool = [];          // 隐藏待复用的节点
+        this.frame = 0;
+
+        this.container.classList.add('virtual-grid');
+        this.onScroll = () => this.scheduleRender();
+        window.addEventListener('scroll', this.onScroll, { passive: true });
+    }
+
+    setOptions({ columns, gap }) {
+        if (columns === this.columns && gap === this.gap) return;
+        this.columns = columns;
+        this.gap = gap;
+        this.laidOut = 0;
+        this.scheduleRender();
+    }
+
+    // 整体换一组数据（导入、切换模式）
+    setItems(items) {
+        this.items = items;
+        this.laidOut = 0;
+        this.scheduleRender();
+    }
+
+    /**
+     * 数据数组被原地修改后调用
+     * @param {object} options
+     *   from: 第一个有变化的下标，之前的卡片位置不变、不重新计算（省略时从头计算）
+     *   appendOnly: 只在末尾追加了卡片，已显示的卡片内容不变
+     */
+    refresh({ from = 0, appendOnly = false } = {}) {
+        if (!appendOnly) {
+            this.laidOut = Math.min(this.laidOut, from);
+            // 卡片对象可能被原地修改（如更换封面），可见卡片都重新填充；填充函数自行跳过没变的图片
+            for (const node of this.nodes.values()) node.vgStale = true;
+        }
+        this.scheduleRender();
+    }
+
+    scheduleRender() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = 0;
+            this.render();
+        });
+    }
+
+    layout() {
+        const count = this.items.length;
+        const columns = Math.max(1, this.columns);
+        const gap = this.gap;
+        const width = this.container.clientWidth;
+        if (width !== this.width) {
+            this.width = width;
+            this.laidOut = 0;
+        }
+        // 每帧都会调用：没有变化时下面只是检查各列末尾，开销与卡片总数无关
+        const start = Math.min(this.laidOut, count);
+        if (start === 0 || this.columnItems.length !== columns) {
+            this.laidOut = 0;
+            return this.layoutFromStart(count, columns, gap, width);
+        }
+        // 从 start 开始重新排列：去掉各列中 start 之后的卡片，列高回到第 start 张之前的状态
+        this.columnItems.forEach((list, c) => {
+            while (list.length && list[list.length - 1] >= start) list.pop();
+            const last = list[list.length - 1];
+            this.columnHeights[c] = last === undefined ? 0 : this.tops[last] + this.heights[last] + gap;
+        });
+        this.placeItems(start, count, columns, gap);
+    }
+
+    layoutFromStart(count, columns, gap, width) {
+        this.columnWidth = (width - (columns - 1) * gap) / columns;
+        this.columnItems = Array.from({ length: columns }, () => []);
+        this.columnHeights = new Array(columns).fill(0);
+        this.placeItems(0, count, columns, gap);
+    }
+
+    placeItems(start, count, columns, gap) {
+        if (this.tops.length < count) {
+            // 按 1.5 倍扩容，追加卡片时不必每次重新分配
+            const capacity = Math.max(count, Math.ceil(this.tops.length * 1.5), 64);
+            const grow = (old, Type) => { const next = new Type(capacity); next.set(old.subarray(0, start)); return next; };
+            this.tops = grow(this.tops, Float64Array);
+            this.heights = grow(this.heights, Float64Array);
+            this.cols = grow(this.cols, Uint16Array);
+        }
+
+        const { tops, heights, cols, columnItems, columnHeights, columnWidth } = this;
+        for (let i = start; i < count; i++) {
+            let col = 0;
+            for (let c = 1; c < columns; c++) {
+                if (columnHeights[c] < columnHeights[col]) col = c;
+            }
+            const height = columnWidth / (this.aspectOf(this.items[i]) || 9 / 16);
+            tops[i] = columnHeights[col];
+            heights[i] = height;
+            cols[i] = col;
+            columnItems[col].push(i);
+            columnHeights[col] += height + gap;
+        }
+        this.laidOut = count;
+        this.container.style.height = `${Math.max(0, Math.max(...columnHeights) - gap)}px`;
+    }
+
+    // 某一列中第一个底边不在 viewTop 之上的卡片（二分查找）
+    firstVisible(list, viewTop) {
+        let lo = 0, hi = list.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            const i = list[mid];
+            if (this.tops[i] + this.heights[i] < viewTop) lo = mid + 1;
+            else hi = mid;
+        }
+        return lo;
+    }
+
+    render() {
+        this.layout();
+        const items = this.items;
+
+        const offset = -this.container.getBoundingClientRect().top;
+        const viewTop = offset - this.overscan;
+        const viewBottom = offset + window.innerHeight + this.overscan;
+        const visible = new Set();
+        for (const list of this.columnItems) {
+            for (let k = this.firstVisible(list, viewTop); k < list.length; k++) {
+                const i = list[k];
+                if (this.tops[i] > viewBottom) break;
+                visible.add(i);
+            }
+        }
+
+        // 仍在视口内的卡片沿用原节点（按数据对象匹配，删除 / 插入使下标整体移动时不必重新加载图片），
+        // 离开视口的节点回收，再分配给新进入的卡片
+        const byItem = new Map();
+        for (const node of this.nodes.values()) byItem.set(node.vgItem, node);
+        const next = new Map();
+        const entering = [];
+        for (const i of visible) {
+            const node = byItem.get(items[i]);
+            if (node) {
+                byItem.delete(items[i]);
+                next.set(i, node);
+            } else {
+                entering.push(i);
+            }
+        }
+        for (const node of byItem.values()) {
+            node.hidden = true;
+            node.vgItem = null;
+            this.pool.push(node);
+        }
+        const added = [];
+        for (const i of entering) {
+            let node = this.pool.pop();
+            if (!node) {
+                node = this.createNode();
+                added.push(node);
+            }
+            next.set(i, node);
+        }
+        this.nodes = next;
+
+        for (const [i, node] of next) {
+            const item = items[i];
+            if (node.vgItem !== item || node.vgIndex !== i || node.vgStale) {
+                this.fillNode(node, item, i);
+                node.vgItem = item;
+                node.vgIndex = i;
+                node.vgStale = false;
+            }
+            const x = this.cols[i] * (this.columnWidth + this.gap);
+            node.style.transform = `translate(${x}px, ${this.tops[i]}px)`;
+            node.style.width = `${this.columnWidth}px`;
+            node.style.height = `${this.heights[i]}px`;
+            node.hidden = false;
+        }
+        if (added.length) this.container.append(...added);
+    }
+
+    // 当前在 DOM 中的卡片数（调试用）
+    get renderedCount() {
+        return this.nodes.size;
+    }
+
+    destroy() {
+        if (this.frame) cancelAnimationFrame(this.frame);
+        window.removeEventListener('scroll', this.onScroll);
+        for (const node of [...this.nodes.values(), ...this.pool]) node.remove();
+        this.nodes.clear();
+        this.pool = [];
+        this.container.classList.remove('virtual-grid');
+        this.container.style.height = '';
+    }
+}
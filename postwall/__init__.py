@@ -0,0 +1,4 @@
+"""
+海报墙服务端组件
+run.py 与 scraper/ 下的脚本共用的服务器、缓存与存储模块
+"""
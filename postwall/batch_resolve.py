@@ -0,0 +1,82 @@
+"""
+批量解析分享链接
+有界线程池并发解析，按完成顺序产出结果事件（供 NDJSON 流式返回）
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .resolve_cache import normalize_share_url
+
+
+SHARE_URL_PATTERN = re.compile(r"https?://[^\s，。！？、）】}\"'<>]+")
+
+
+def extract_share_urls(text: str) -> list:
+    """从聊天记录等文本中提取所有分享链接（去重，保持原顺序）"""
+    urls = []
+    seen = set()
+    for url in SHARE_URL_PATTERN.findall(text or ""):
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+def make_card(info: dict) -> dict:
+    """解析结果 -> 海报卡片（字段与前端 addVideoByUrl 一致）"""
+    return {
+        "id": info["id"],
+        "title": info.get("title") or "新添加视频",
+        "author": info.get("author") or "未知",
+        "video_url": info.get("video_url", ""),
+        "real_video_url": info.get("real_video_url", ""),
+        "cover_url": info.get("cover_url", ""),
+        "local_cover": "",
+    }
+
+
+def resolve_batch(urls: list, resolver, known_ids: set, max_workers: int = 6):
+    """
+    并发解析一批链接，每完成一个产出一条事件
+
+    Args:
+        urls: 分享链接列表
+        resolver: 解析函数 share_url -> dict（通常为带缓存的 RESOLVE_CACHE.get）
+        known_ids: 已存在的视频 ID（会加入新解析出的 ID），重复的视频不会再添加
+        max_workers: 并发解析数
+
+    Yields:
+        {"index", "url", "status": added|duplicate|error, "card"|"id"|"error"}
+    """
+    pending = []
+    seen_keys = set()
+    for index, url in enumerate(urls):
+        key = normalize_share_url(url)
+        # 视频页链接可以不抓取直接判重
+        known = key.startswith("video:") and key[len("video:"):] in known_ids
+        if key in seen_keys or known:
+            yield {"index": index, "url": url, "status": "duplicate", "id": key.split(":", 1)[-1]}
+            continue
+        seen_keys.add(key)
+        pending.append((index, url))
+
+    if not pending:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-resolve") as pool:
+        futures = {pool.submit(resolver, url): (index, url) for index, url in pending}
+        for future in as_completed(futures):
+            index, url = futures[future]
+            try:
+                info = future.result()
+            except Exception as e:
+                yield {"index": index, "url": url, "status": "error", "error": str(e)}
+                continue
+
+            if not info.get("real_video_url") and not info.get("id"):
+                yield {"index": index, "url": url, "status": "error", "error": "未找到视频信息"}
+            elif info["id"] in known_ids:
+                yield {"index": index, "url": url, "status": "duplicate", "id": info["id"]}
+            else:
+                known_ids.add(info["id"])
+                yield {"index": index, "url": url, "status": "added", "card": make_card(info)}
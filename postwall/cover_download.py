@@ -0,0 +1,226 @@
+"""
+封面下载引擎
+run.py 与 scraper/export_covers.py 共用：流式分块写入临时文件后原子改名，
+429/5xx 与网络错误按抖动退避有限重试，失败记录到清单文件供下次只重试失败项，结束时汇报吞吐
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+BACKOFF_CAP = 10.0  # 单次重试前的最长等待（秒），Retry-After 超过时按此截断
+
+
+class CoverDownloadError(Exception):
+    """
+    单张封面下载失败
+
+    Args:
+        message: 错误描述
+        retryable: 是否值得重试（429/5xx、网络错误、内容不完整）
+        retry_after: 服务端要求的等待秒数（Retry-After）
+    """
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: float = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class FailureManifest:
+    """
+    下载失败清单（JSON：id -> {url, error, attempts, failed_at}）
+
+    Args:
+        path: 清单文件路径，None 表示不持久化
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def __contains__(self, cover_id) -> bool:
+        return cover_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def record(self, cover_id: str, url: str, error: str, attempts: int):
+        self.entries[cover_id] = {"url": url, "error": error, "attempts": attempts, "failed_at": int(time.time())}
+
+    def discard(self, cover_id: str):
+        self.entries.pop(cover_id, None)
+
+    def save(self):
+        """原子写入清单，没有失败项时删除文件"""
+        if not self.path:
+            return
+        if not self.entries:
+            self.path.unlink(missing_ok=True)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class DownloadReport:
+    """一批下载的结果与吞吐统计"""
+
+    def __init__(self):
+        self.succeeded = set()  # 下载成功的 id
+        self.failed = {}        # id -> 错误描述
+        self.bytes = 0
+        self.retries = 0
+        self.elapsed = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / (1 << 20) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def covers_per_s(self) -> float:
+        return len(self.succeeded) / self.elapsed if self.elapsed else 0.0
+
+    def describe(self) -> str:
+        return (f"成功 {len(self.succeeded)}, 失败 {len(self.failed)}, 重试 {self.retries} 次, "
+                f"{self.bytes / (1 << 20):.1f}MB / {self.elapsed:.1f}s "
+                f"({self.mb_per_s:.2f} MB/s, {self.covers_per_s:.1f} 张/s)")
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = BACKOFF_CAP) -> float:
+    """第 attempt 次重试前的等待：指数退避 + 全抖动"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def fetch_to_file(session, url: str, dest: Path = None, timeout: float = 30,
+                        chunk_size: int = CHUNK_SIZE, tmp_path: Path = None, commit=None) -> int:
+    """
+    流式下载到临时文件，校验长度后原子改名为 dest，或交给 commit 入库
+
+    Args:
+        dest: 最终保存路径（未指定 commit 时使用，临时文件放在同目录）
+        tmp_path: 临时文件路径，默认在 dest 同目录
+        commit: 回调 (tmp_path, sha256) ，负责校验并移走临时文件，校验失败抛出 ValueError
+
+    Returns:
+        写入的字节数
+
+    Raises:
+        CoverDownloadError: 状态码异常、内容不完整、校验失败或网络错误
+    """
+    import aiohttp
+    import aiofiles
+
+    tmp_path = tmp_path or dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.part")
+    sha = hashlib.sha256()
+    written = 0
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            if resp.status != 200:
+                retry_after = resp.headers.get("Retry-After", "")
+                raise CoverDownloadError(
+                    f"HTTP {resp.status}",
+                    retryable=resp.status in RETRY_STATUS,
+                    retry_after=float(retry_after) if retry_after.isdigit() else None,
+                )
+            expected = resp.content_length
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    await f.write(chunk)
+                    sha.update(chunk)
+                    written += len(chunk)
+            if expected is not None and written != expected:
+                raise CoverDownloadError(f"内容不完整 {written}/{expected}", retryable=True)
+            if written == 0:
+                raise CoverDownloadError("空响应", retryable=True)
+        if commit:
+            try:
+                commit(tmp_path, sha.hexdigest())
+            except ValueError as e:
+                raise CoverDownloadError(f"图片校验失败: {e}", retryable=True) from e
+        else:
+            os.replace(tmp_path, dest)
+        return written
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise CoverDownloadError(f"{type(e).__name__}: {e}", retryable=True) from e
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+async def download_batch(jobs: list, concurrency: int = 10, retries: int = 3, timeout: float = 30,
+                         manifest_path=None, on_success=None, store=None) -> DownloadReport:
+    """
+    并发下载一批封面
+
+    Args:
+        jobs: [{"id", "url", "path"}]，path 为最终保存路径（使用 store 时不需要）
+        concurrency: 并发下载数
+        retries: 可重试错误的最大重试次数
+        timeout: 单次请求超时（秒）
+        manifest_path: 失败清单路径；成功的 id 会从清单移除，失败的写入
+        on_success: 回调 (job, size)，每张下载成功后调用
+        store: CoverStore，指定时校验后按内容哈希入库，结束时写回索引
+
+    Returns:
+        DownloadReport
+    """
+    import aiohttp
+
+    report = DownloadReport()
+    manifest = FailureManifest(manifest_path)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def download_one(session, job):
+        attempt = 0
+        while True:
+            try:
+                # 只在请求期间占用并发名额，退避等待时让给其他封面
+                async with semaphore:
+                    if store is not None:
+                        size = await fetch_to_file(session, job["url"], timeout=timeout,
+                                                   tmp_path=store.new_temp_path(),
+                                                   commit=lambda tmp, digest: store.commit(job["id"], tmp, digest))
+                    else:
+                        size = await fetch_to_file(session, job["url"], Path(job["path"]), timeout=timeout)
+            except CoverDownloadError as e:
+                if not e.retryable or attempt >= retries:
+                    report.failed[job["id"]] = str(e)
+                    manifest.record(job["id"], job["url"], str(e), attempt + 1)
+                    return
+                delay = min(e.retry_after, BACKOFF_CAP) if e.retry_after is not None else backoff_delay(attempt)
+                attempt += 1
+                report.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            report.succeeded.add(job["id"])
+            report.bytes += size
+            manifest.discard(job["id"])
+            if on_success:
+                on_success(job, size)
+            return
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(download_one(session, job) for job in jobs))
+    report.elapsed = time.perf_counter() - started
+    manifest.save()
+    if store is not None:
+        store.save()
+    return report
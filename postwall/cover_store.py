@@ -0,0 +1,264 @@
+"""
+内容寻址封面存储
+封面按 SHA-256 存为 blobs/ab/<hash>.<ext>，index.json 记录 视频ID -> 哈希；
+相同图片（转发、占位图）只存一份，入库前校验 JPEG/WebP/PNG 文件头与长度，截断的文件不会入库
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+
+HASH_READ_SIZE = 1 << 20
+
+
+def sniff_image(path: Path) -> str:
+    """
+    校验图片完整性并返回扩展名
+
+    Raises:
+        ValueError: 不是支持的格式，或文件被截断
+    """
+    size = path.stat().st_size
+    if size < 16:
+        raise ValueError(f"文件过小 ({size} 字节)")
+    with open(path, "rb") as f:
+        head = f.read(16)
+        f.seek(max(0, size - 64))
+        tail = f.read()
+
+    if head.startswith(b"\xff\xd8\xff"):
+        # JPEG 以 EOI (FFD9) 结尾，部分编码器会在其后补少量填充字节
+        if b"\xff\xd9" not in tail:
+            raise ValueError("JPEG 缺少结束标记，文件可能被截断")
+        return "jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        riff_size = int.from_bytes(head[4:8], "little") + 8
+        if riff_size != size:
+            raise ValueError(f"WebP 长度不符 ({size}/{riff_size})")
+        return "webp"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        if not tail.endswith(b"IEND\xaeB`\x82"):
+            raise ValueError("PNG 缺少 IEND，文件可能被截断")
+        return "png"
+    raise ValueError("不支持的图片格式")
+
+
+def decode_data_url(data_url: str) -> bytes:
+    """
+    解码 data:image/...;base64,... 形式的内嵌图片
+
+    Raises:
+        ValueError: 不是 base64 图片 data URL
+    """
+    header, _, payload = (data_url or "").partition(",")
+    if not header.startswith("data:image/") or not header.endswith(";base64"):
+        raise ValueError("不是 base64 图片 data URL")
+    try:
+        return base64.b64decode(payload, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"base64 解码失败: {e}") from e
+
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class CoverStore:
+    """
+    封面存储（单进程使用，索引在 save() 时原子写回）
+
+    Args:
+        root: 存储目录（通常为 data/covers）
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.tmp_dir = self.root / ".tmp"
+        self.thumbs_dir = self.root / "thumbs"  # 缩略图：thumbs/<hash>/<宽度>.<格式>
+        self.index_path = self.root / "index.json"
+        self.index = {}  # 视频ID -> {"hash", "ext", "size"}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        self._dirty = False
+
+    def blob_path(self, digest: str, ext: str) -> Path:
+        return self.blobs_dir / digest[:2] / f"{digest}.{ext}"
+
+    def path(self, cover_id: str):
+        """已入库且文件存在、大小一致时返回 blob 路径，否则 None"""
+        entry = self.index.get(cover_id)
+        if not entry:
+            return None
+        blob = self.blob_path(entry["hash"], entry["ext"])
+        try:
+            if blob.stat().st_size == entry["size"]:
+                return blob
+        except OSError:
+            pass
+        return None
+
+    def relative_path(self, cover_id: str, base) -> str:
+        """blob 相对 base 的路径（写入 metadata.json 的 local_cover）"""
+        return self.path(cover_id).relative_to(Path(base)).as_posix()
+
+    def new_temp_path(self) -> Path:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return self.tmp_dir / f"{uuid.uuid4().hex}.part"
+
+    def commit(self, cover_id: str, tmp_path: Path, digest: str = None) -> dict:
+        """
+        校验临时文件并入库（已有相同内容时直接复用），tmp_path 会被移走或删除
+
+        Raises:
+            ValueError: 图片校验失败
+        """
+        tmp_path = Path(tmp_path)
+        try:
+            ext = sniff_image(tmp_path)
+            digest = digest or file_digest(tmp_path)
+            size = tmp_path.stat().st_size
+            blob = self.blob_path(digest, ext)
+            if blob.exists() and blob.stat().st_size == size:
+                tmp_path.unlink()
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        entry = {"hash": digest, "ext": ext, "size": size}
+        self.index[cover_id] = entry
+        self._dirty = True
+        return entry
+
+    def put_bytes(self, cover_id: str, data: bytes) -> dict:
+        """
+        把内存中的图片（上传的截帧、解码后的 data URL）校验后入库
+
+        Raises:
+            ValueError: 图片校验失败
+        """
+        tmp_path = self.new_temp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return self.commit(cover_id, tmp_path, hashlib.sha256(data).hexdigest())
+
+    def adopt(self, cover_id: str, legacy_path: Path):
+        """
+        把旧版按 ID 命名的封面（covers/{id}.jpg）迁移入库
+
+        Returns:
+            入库后的 blob 路径；文件不存在或校验失败（截断）时删除旧文件并返回 None
+        """
+        legacy_path = Path(legacy_path)
+        if not legacy_path.exists():
+            return None
+        try:
+            self.commit(cover_id, legacy_path)
+        except ValueError:
+            return None
+        return self.path(cover_id)
+
+    def save(self):
+        """原子写回索引"""
+        if not self._dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def verify(self) -> dict:
+        """
+        重新计算每个 blob 的哈希并校验格式，损坏或丢失的条目从索引移除（下次运行会重新下载）
+
+        Returns:
+            {"ok": 数量, "corrupt": [ID], "missing": [ID]}
+        """
+        result = {"ok": 0, "corrupt": [], "missing": []}
+        checked = {}  # blob -> 是否完好，多个 ID 共享同一 blob 时只校验一次
+        for cover_id, entry in list(self.index.items()):
+            blob = self.blob_path(entry["hash"], entry["ext"])
+            if blob not in checked:
+                if not blob.exists():
+                    checked[blob] = None
+                else:
+                    try:
+                        checked[blob] = sniff_image(blob) == entry["ext"] and file_digest(blob) == entry["hash"]
+                    except (OSError, ValueError):
+                        checked[blob] = False
+                    if not checked[blob]:
+                        blob.unlink(missing_ok=True)
+            status = checked[blob]
+            if status:
+                result["ok"] += 1
+                continue
+            result["missing" if status is None else "corrupt"].append(cover_id)
+            del self.index[cover_id]
+            self._dirty = True
+        self.save()
+        return result
+
+    def gc(self, live_ids=None) -> dict:
+        """
+        清理未被引用的 blob 及其缩略图、残留的临时文件和已迁移的旧版文件
+
+        Args:
+            live_ids: 仍在使用的视频 ID（通常来自 metadata.json），None 表示保留所有索引条目
+
+        Returns:
+            {"dropped_ids", "removed_files", "freed_bytes"}
+        """
+        dropped = 0
+        if live_ids is not None:
+            live_ids = set(live_ids)
+            for cover_id in [i for i in self.index if i not in live_ids]:
+                del self.index[cover_id]
+                dropped += 1
+            self._dirty = self._dirty or dropped > 0
+        self.save()
+
+        referenced = {self.blob_path(e["hash"], e["ext"]) for e in self.index.values()}
+        removed = 0
+        freed = 0
+        candidates = []
+        if self.blobs_dir.exists():
+            candidates += [p for p in self.blobs_dir.rglob("*") if p.is_file() and p not in referenced]
+        if self.tmp_dir.exists():
+            candidates += [p for p in self.tmp_dir.iterdir() if p.is_file()]
+        # 旧版 covers/{id}.* 文件：已入库的可以删除
+        candidates += [p for p in self.root.glob("*.*") if p.is_file() and p != self.index_path
+                       and p.stem in self.index and p.suffix.lstrip(".") in ("jpg", "jpeg", "webp", "png")]
+        live_hashes = {e["hash"] for e in self.index.values()}
+        if self.thumbs_dir.exists():
+            for folder in self.thumbs_dir.iterdir():
+                if folder.is_dir() and folder.name not in live_hashes:
+                    candidates += [p for p in folder.iterdir() if p.is_file()]
+        for path in candidates:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        if self.thumbs_dir.exists():
+            for folder in self.thumbs_dir.iterdir():
+                if folder.is_dir() and not any(folder.iterdir()):
+                    folder.rmdir()
+        return {"dropped_ids": dropped, "removed_files": removed, "freed_bytes": freed}
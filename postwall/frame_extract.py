@@ -0,0 +1,166 @@
+"""
+服务端视频截帧
+ffmpeg 通过本机 /proxy_video（Range 代理 + 磁盘缓存）读取视频，输入端 seek 只请求目标时间附近的数据；
+解码在有上限的工作池中进行，结果按 (视频ID, 时间, 宽度) 缓存为 JPEG，同一帧的并发请求只解码一次。
+需要系统安装 ffmpeg
+"""
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+TIME_STEP_MS = 100  # 时间戳按 0.1 秒取整，拖动时相近位置共享缓存
+JPEG_QUALITY = 3  # ffmpeg -q:v，2（最好）~ 31
+DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+class FrameError(Exception):
+    """截帧失败（ffmpeg 不可用、视频无法读取或时间超出范围）"""
+
+
+def quantize(t: float) -> float:
+    """时间戳取整到 TIME_STEP_MS，截帧与缓存文件名使用同一时间"""
+    return max(0, int(round(t * 1000 / TIME_STEP_MS))) * TIME_STEP_MS / 1000
+
+
+def frame_times(duration: float, count: int) -> list:
+    """均匀分布的 count 个时间点（取每段中点，避开片头黑场和片尾）"""
+    count = max(1, count)
+    return [round(duration * (i + 0.5) / count, 1) for i in range(count)]
+
+
+class FrameExtractor:
+    """
+    截帧器（线程安全）
+
+    Args:
+        cache_dir: 帧缓存目录，文件为 <视频ID>/<毫秒>_<宽度>.jpg
+        workers: 同时运行的 ffmpeg 进程数
+        ffmpeg: ffmpeg 可执行文件
+        timeout: 单次 ffmpeg 超时（秒）
+    """
+
+    def __init__(self, cache_dir, workers: int = 4, ffmpeg: str = "ffmpeg", timeout: float = 30):
+        self.cache_dir = Path(cache_dir)
+        self.ffmpeg = shutil.which(ffmpeg)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame")
+        self._lock = threading.Lock()
+        self._inflight = {}   # 缓存文件 -> Future
+        self._durations = {}  # 视频ID -> 秒
+
+    @property
+    def available(self) -> bool:
+        return self.ffmpeg is not None
+
+    def cache_path(self, video_id: str, t: float, width: int) -> Path:
+        t_ms = int(round(quantize(t) * 1000))
+        safe_id = re.sub(r"[^0-9A-Za-z_-]", "_", video_id)
+        return self.cache_dir / safe_id / f"{t_ms}_{width}.jpg"
+
+    def _run(self, args: list) -> subprocess.CompletedProcess:
+        if not self.available:
+            raise FrameError("未找到 ffmpeg")
+        try:
+            return subprocess.run([self.ffmpeg, "-nostdin", "-hide_banner"] + args,
+                                  capture_output=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired as e:
+            raise FrameError(f"ffmpeg 超时 ({self.timeout}s)") from e
+
+    def _submit(self, key, func, *args):
+        """同一 key 的并发请求共享一个任务"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._pool.submit(func, *args)
+                future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def duration(self, video_id: str, source_url: str) -> float:
+        """
+        视频时长（秒），只读取文件头（moov）
+
+        Raises:
+            FrameError: 无法读取视频
+        """
+        if video_id in self._durations:
+            return self._durations[video_id]
+        value = self._submit(("duration", video_id), self._probe, source_url).result()
+        self._durations[video_id] = value
+        return value
+
+    def _probe(self, source_url: str) -> float:
+        # 不指定输出时 ffmpeg 打印输入信息后以非零状态退出，时长从 stderr 解析
+        result = self._run(["-i", source_url])
+        match = DURATION_RE.search(result.stderr.decode("utf-8", "replace"))
+        if not match:
+            raise FrameError("无法读取视频时长")
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def frame(self, video_id: str, source_url: str, t: float, width: int = 0) -> Path:
+        """
+        取一帧（缓存命中时直接返回），width 为 0 表示原始宽度
+
+        Returns:
+            JPEG 文件路径
+
+        Raises:
+            FrameError: 截帧失败
+        """
+        t = quantize(t)
+        path = self.cache_path(video_id, t, width)
+        if path.exists():
+            return path
+        return self._submit(path, self._extract, source_url, t, width, path).result()
+
+    def _extract(self, source_url: str, t: float, width: int, path: Path) -> Path:
+        if path.exists():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{threading.get_ident()}.jpg")
+        args = ["-v", "error", "-ss", f"{t:.3f}", "-i", source_url, "-frames:v", "1"]
+        if width:
+            args += ["-vf", f"scale={width}:-2"]
+        args += ["-q:v", str(JPEG_QUALITY), "-f", "image2", "-y", str(tmp_path)]
+        result = self._run(args)
+        if result.returncode != 0 or not tmp_path.exists() or tmp_path.stat().st_size == 0:
+            tmp_path.unlink(missing_ok=True)
+            message = result.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise FrameError(message[-1] if message else "时间点超出视频范围")
+        os.replace(tmp_path, path)
+        return path
+
+    def strip(self, video_id: str, source_url: str, count: int, width: int) -> dict:
+        """
+        均匀分布的 count 帧缩略图，并行解码
+
+        Returns:
+            {"duration", "times": [秒, ...]}，对应的帧已在缓存中（失败的时间点被略去）
+        """
+        duration = self.duration(video_id, source_url)
+        times = [quantize(t) for t in frame_times(duration, count)]
+        futures = []
+        for t in times:
+            path = self.cache_path(video_id, t, width)
+            futures.append(None if path.exists() else self._submit(path, self._extract, source_url, t, width, path))
+        done = []
+        for t, future in zip(times, futures):
+            try:
+                if future is not None:
+                    future.result()
+                done.append(t)
+            except FrameError:
+                continue
+        return {"duration": duration, "times": done}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,87 @@
+"""
+并发 HTTP 服务器
+用有界线程池替代单线程 HTTPServer，慢速的视频流不再阻塞封面和 API 请求
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    每个连接交给线程池中的工作线程处理的 HTTPServer
+
+    Args:
+        server_address: 监听地址 (host, port)
+        handler_class: 请求处理类
+        max_workers: 最大工作线程数，超出的连接在队列中等待
+    """
+
+    allow_reuse_address = True  # 允许地址重用，避免重启频繁时报错
+    request_queue_size = 128    # listen backlog，应对上百个并发封面请求
+
+    def __init__(self, server_address, handler_class, max_workers: int = 32):
+        self.max_workers = max_workers
+        # 处理器中的长循环（视频流）应检查该事件以便及时退出
+        self.stopping = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-worker")
+        self._active = 0
+        self._queued = set()  # 已接受、尚未被工作线程取走的连接
+        self._idle = threading.Condition()
+        super().__init__(server_address, handler_class)
+
+    @property
+    def active_requests(self) -> int:
+        """当前正在处理（含排队）的连接数"""
+        with self._idle:
+            return self._active
+
+    def process_request(self, request, client_address):
+        if self.stopping.is_set():
+            self.shutdown_request(request)
+            return
+        with self._idle:
+            self._active += 1
+            self._queued.add(request)
+        self._pool.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        with self._idle:
+            if request not in self._queued:
+                return  # 关闭时已被丢弃（连接已关闭、计数已减）
+            self._queued.discard(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+
+    def graceful_shutdown(self, timeout: float = 5.0) -> bool:
+        """
+        停止接收新连接，等待进行中的请求完成后关闭
+
+        超时后仍在队列中的连接直接关闭，不再处理。必须在 serve_forever 以外的线程调用。
+
+        Args:
+            timeout: 等待进行中请求的最长秒数
+
+        Returns:
+            是否所有请求都在超时前完成
+        """
+        self.stopping.set()
+        self.shutdown()
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._active == 0, timeout)
+            dropped = list(self._queued)
+            self._queued.clear()
+            self._active -= len(dropped)
+            self._idle.notify_all()
+        for request in dropped:
+            self.shutdown_request(request)
+        self._pool.shutdown(wait=drained, cancel_futures=True)
+        self.server_close()
+        return drained
@@ -0,0 +1,155 @@
+"""
+分页元数据接口
+/api/metadata 按游标分页返回元数据，支持字段投影、ETag/304 与 gzip/brotli 压缩；
+数据来自 MetadataStore 的快照，版本号不变时复用位置索引和已编码的响应体
+"""
+import base64
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+MIN_COMPRESS_SIZE = 1024
+
+# fields=grid：海报墙卡片需要的字段；有本地封面时省略冗长的签名 cover_url
+GRID_FIELDS = ("id", "title", "author", "video_url", "local_cover", "cover_url",
+               "width", "height", "aspect", "placeholder", "thumbs")
+
+
+def parse_fields(value: str):
+    """fields 参数 -> 字段元组，None 表示全部字段"""
+    if not value or value == "all":
+        return None
+    if value == "grid":
+        return GRID_FIELDS
+    return tuple(f for f in (part.strip() for part in value.split(",")) if f)
+
+
+def project(cover: dict, fields) -> dict:
+    if fields is None:
+        return cover
+    item = {f: cover[f] for f in fields if f in cover}
+    if fields is GRID_FIELDS and item.get("local_cover"):
+        item.pop("cover_url", None)
+    return item
+
+
+def encode_cursor(offset: int, last_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{offset}:{last_id}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """游标 -> (offset, last_id)，格式错误时抛出 ValueError"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    offset, _, last_id = base64.urlsafe_b64decode(padded).decode("utf-8").partition(":")
+    return int(offset), last_id
+
+
+def pick_encoding(accept_encoding: str):
+    """按 Accept-Encoding 选择压缩方式：优先 br（需要 brotli 模块），其次 gzip"""
+    accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").split(",")}
+    if "br" in accepted:
+        try:
+            import brotli  # noqa: F401
+            return "br"
+        except ImportError:
+            pass
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class MetadataView:
+    """
+    元数据的只读分页视图（线程安全）
+
+    Args:
+        source: 无参函数，返回 (covers, version)，通常为 MetadataStore.snapshot
+        cache_size: 缓存多少个已编码的响应体（按 ETag + 压缩方式）
+    """
+
+    def __init__(self, source, cache_size: int = 64):
+        self.source = source
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._covers = []
+        self._positions = {}
+        self._version = None
+        self._bodies = OrderedDict()
+
+    def snapshot(self):
+        """返回 (covers, positions, version)，版本变化时重建位置索引"""
+        covers, version = self.source()
+        with self._lock:
+            if version != self._version or covers is not self._covers:
+                self._covers = covers
+                self._positions = {c.get("id"): i for i, c in enumerate(covers)}
+                self._version = version
+                self._bodies.clear()
+            return self._covers, self._positions, self._version
+
+    def page(self, cursor: str = None, limit: int = DEFAULT_LIMIT, fields=None) -> dict:
+        """
+        取一页数据
+
+        游标记录上一页的末尾位置和 ID：数据被重排 / 删除后，从该 ID 的新位置之后继续，
+        ID 已不存在时退回到原位置。
+
+        Raises:
+            ValueError: 游标无效
+        """
+        covers, positions, version = self.snapshot()
+        start = 0
+        if cursor:
+            offset, last_id = decode_cursor(cursor)
+            position = positions.get(last_id)
+            start = position + 1 if position is not None else max(0, offset)
+        limit = max(1, min(MAX_LIMIT, limit))
+        end = min(start + limit, len(covers))
+        items = [project(c, fields) for c in covers[start:end]]
+        next_cursor = encode_cursor(end - 1, covers[end - 1].get("id", "")) if end < len(covers) else None
+        return {"items": items, "next_cursor": next_cursor, "total": len(covers), "version": version}
+
+    def render(self, query: str, cursor: str, limit: int, fields, accept_encoding: str):
+        """
+        生成响应：(ETag, 响应体, Content-Encoding)，相同版本 + 查询 + 压缩方式的结果会被缓存
+
+        Raises:
+            ValueError: 游标无效
+        """
+        _, _, version = self.snapshot()
+        query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        etag = f'"{version}-{query_hash}"'
+        encoding = pick_encoding(accept_encoding)
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is not None:
+                self._bodies.move_to_end(key)
+                return etag, cached[0], cached[1]
+
+        data = self.page(cursor, limit, fields)
+        if data["version"] != version:  # 期间文件被更新，以实际返回的版本为准
+            etag = f'"{data["version"]}-{query_hash}"'
+            key = (etag, encoding)
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if encoding and len(body) >= MIN_COMPRESS_SIZE:
+            body = compress(body, encoding)
+        else:
+            encoding = None
+        with self._lock:
+            self._bodies[key] = (body, encoding)
+            while len(self._bodies) > self.cache_size:
+                self._bodies.popitem(last=False)
+        return etag, body, encoding
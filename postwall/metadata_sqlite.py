@@ -0,0 +1,253 @@
+"""
+SQLite 元数据存储（可选后端）
+与 MetadataStore 接口相同，数据存在 metadata.db（WAL 模式）：按 ID 查找 / 更新只触及一行，
+插入和移动使用浮点排序位置（只写被移动的卡片），作者 / 发布时间 / 排序位置都有索引。
+卡片完整内容以 JSON 存在 data 列，前端看到的字段与 metadata.json 完全一致
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from postwall.metadata_store import StaleVersionError, apply_op, atomic_write, replace_cards
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS covers (
+    id          TEXT PRIMARY KEY,
+    position    REAL NOT NULL,
+    author      TEXT,
+    create_time INTEGER,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS covers_position ON covers(position);
+CREATE INDEX IF NOT EXISTS covers_author ON covers(author);
+CREATE INDEX IF NOT EXISTS covers_create_time ON covers(create_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+POSITION_STEP = 1024.0  # 重新编号时相邻卡片的位置间隔
+MIN_POSITION_GAP = 1e-6  # 插入位置的间隔小于此值时重新编号
+SQL_VARIABLES = 500  # 单条 IN (...) 语句的参数上限
+ANONYMOUS_KEY = "~anon-"  # 没有 id 的卡片的主键前缀（只存在于 id 列，data 中的卡片不变）
+
+
+def _key(cover_id):
+    """按 ID 定位卡片时使用的主键；没有 id 的卡片的生成主键不能被引用（与 JSON 存储一致）"""
+    return None if isinstance(cover_id, str) and cover_id.startswith(ANONYMOUS_KEY) else cover_id
+
+
+def _row(cover: dict, position: float, key: str = None) -> tuple:
+    return (key or cover["id"], position, cover.get("author"), cover.get("create_time"),
+            json.dumps(cover, ensure_ascii=False, separators=(",", ":")))
+
+
+class SqliteMetadataStore:
+    """
+    SQLite 元数据存储（线程安全；其他进程写入后，下次访问时按版本号重新加载）
+
+    Args:
+        db_path: 数据库路径（metadata.db）
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL 下断电最多丢最后一次提交，不会损坏
+        self._conn.executescript(SCHEMA)
+        self._covers = None
+        self._cached_version = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _read_version(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM covers LIMIT 1").fetchone() is None
+
+    def snapshot(self):
+        """
+        返回 (卡片列表, 版本号)；版本号未变时复用上次读取的列表，调用方不应修改它
+
+        本进程的提交在 apply 中按写时复制同步到缓存的列表，只有其他进程写入后才重新读取全部行
+        """
+        with self._lock:
+            version = self._read_version()
+            if version != self._cached_version:
+                rows = self._conn.execute("SELECT data FROM covers ORDER BY position").fetchall()
+                self._covers = [json.loads(data) for data, in rows]
+                self._cached_version = version
+            return self._covers, version
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._read_version()
+
+    def get(self, cover_id: str):
+        """按 ID 读取一张卡片（走主键索引），不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM covers WHERE id = ?", (cover_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_author(self, author: str) -> list:
+        """某作者的全部卡片（按墙上顺序）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM covers WHERE author = ? ORDER BY position",
+                                      (author,)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def apply(self, ops: list, base_version: int = None) -> int:
+        """
+        在一个事务内提交一组操作（操作格式见 postwall/metadata_store.py）
+
+        Returns:
+            新版本号
+
+        Raises:
+            StaleVersionError: base_version 不是当前版本
+            ValueError: 操作无效（事务回滚，不产生任何修改）
+        """
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")  # 立即取得写锁，版本检查与写入之间不会被其他进程插入
+            try:
+                version = self._read_version()
+                if base_version is not None and base_version != version:
+                    raise StaleVersionError(version)
+                covers = self._covers if self._cached_version == version else None
+                for op in ops:
+                    self._apply_op(op)
+                version += 1
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(version),))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._update_cache(covers, ops, version)
+            return version
+
+    def _update_cache(self, covers, ops: list, version: int):
+        """
+        把已提交的操作应用到缓存的列表（apply_op 只复制被修改的卡片，未修改的卡片仍是同一个对象，
+        搜索索引据此跳过它们）；提交前缓存已过期时丢弃，下次 snapshot 重新读取
+        """
+        if covers is not None:
+            try:
+                for op in ops:
+                    covers = apply_op(covers, op)
+            except ValueError:
+                covers = None
+        self._covers = covers
+        self._cached_version = version if covers is not None else None
+
+    def replace(self, covers: list) -> int:
+        """整体替换（批量采集结果、导入 JSON 等）"""
+        return self.apply([{"op": "replace", "cards": covers}])
+
+    def _apply_op(self, op: dict):
+        conn = self._conn
+        kind = op.get("op")
+        if kind == "update":
+            row = conn.execute("SELECT data FROM covers WHERE id = ?", (_key(op.get("id")),)).fetchone()
+            if row is None:
+                raise ValueError(f"不存在的 ID: {op.get('id')}")
+            cover = apply_op([json.loads(row[0])], op)[0]
+            conn.execute("UPDATE covers SET author = ?, create_time = ?, data = ? WHERE id = ?",
+                         _row(cover, 0)[2:] + (cover["id"],))
+        elif kind == "delete":
+            ids = [cover_id for cover_id in op.get("ids") or [] if _key(cover_id) is not None]
+            for start in range(0, len(ids), SQL_VARIABLES):
+                chunk = ids[start:start + SQL_VARIABLES]
+                conn.execute(f"DELETE FROM covers WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        elif kind == "insert":
+            cards, seen = [], set()
+            for card in op.get("cards") or []:
+                if not isinstance(card, dict) or not card.get("id"):
+                    raise ValueError("insert 的卡片必须包含 id")
+                if card["id"] in seen:
+                    continue
+                seen.add(card["id"])
+                if conn.execute("SELECT 1 FROM covers WHERE id = ?", (card["id"],)).fetchone() is None:
+                    cards.append(card)
+            if cards:
+                positions = self._slots(int(op.get("index", 0)), len(cards))
+                conn.executemany("INSERT INTO covers (id, position, author, create_time, data) VALUES (?, ?, ?, ?, ?)",
+                                 [_row(card, pos) for card, pos in zip(cards, positions)])
+        elif kind == "move":
+            if conn.execute("SELECT 1 FROM covers WHERE id = ?", (_key(op.get("id")),)).fetchone() is None:
+                raise ValueError(f"不存在的 ID: {op.get('id')}")
+            position, = self._slots(int(op.get("to", 0)), 1, exclude=op["id"])
+            conn.execute("UPDATE covers SET position = ? WHERE id = ?", (position, op["id"]))
+        elif kind == "reorder":
+            # 列出的卡片排到当前最前面之前，其余卡片位置不变，只写被重排的行
+            ids = list(dict.fromkeys(op.get("ids") or []))
+            first = conn.execute("SELECT MIN(position) FROM covers").fetchone()[0] or 0.0
+            conn.executemany("UPDATE covers SET position = ? WHERE id = ?",
+                             [(first - len(ids) + i, cover_id) for i, cover_id in enumerate(ids)])
+        elif kind == "replace":
+            cards = op.get("cards")
+            if not isinstance(cards, list):
+                raise ValueError("replace 需要 cards 数组")
+            conn.execute("DELETE FROM covers")
+            # 与 JSON 存储相同的规则（见 replace_cards）；没有 id 的卡片按位置生成主键
+            rows = [_row(card, i * POSITION_STEP, None if card.get("id") else f"{ANONYMOUS_KEY}{i}")
+                    for i, card in enumerate(replace_cards(cards))]
+            conn.executemany("INSERT INTO covers (id, position, author, create_time, data) VALUES (?, ?, ?, ?, ?)",
+                             rows)
+        else:
+            raise ValueError(f"未知操作: {kind}")
+
+    def _slots(self, index: int, count: int, exclude: str = None) -> list:
+        """第 index 张卡片之前的 count 个新位置（不计 exclude），间隔过小时先重新编号"""
+        index = max(0, index)
+        where = "WHERE id != ?" if exclude is not None else ""
+        params = (exclude,) if exclude is not None else ()
+        for _ in range(2):
+            rows = self._conn.execute(f"SELECT position FROM covers {where} ORDER BY position LIMIT 2 OFFSET ?",
+                                      params + (max(0, index - 1),)).fetchall()
+            if index == 0:
+                before, after = None, rows[0][0] if rows else None
+            elif rows:
+                before = rows[0][0]
+                after = rows[1][0] if len(rows) > 1 else None
+            else:  # index 超出末尾：追加到最后
+                before = self._conn.execute(f"SELECT MAX(position) FROM covers {where}", params).fetchone()[0]
+                after = None
+            if before is None and after is None:
+                return [i * POSITION_STEP for i in range(count)]
+            if after is None:
+                return [before + (i + 1) * POSITION_STEP for i in range(count)]
+            if before is None:
+                return [after - (count - i) * POSITION_STEP for i in range(count)]
+            gap = (after - before) / (count + 1)
+            if gap >= MIN_POSITION_GAP:
+                return [before + (i + 1) * gap for i in range(count)]
+            self._renumber()
+        raise ValueError("无法分配排序位置")
+
+    def _renumber(self):
+        ids = [cover_id for cover_id, in self._conn.execute("SELECT id FROM covers ORDER BY position")]
+        self._conn.executemany("UPDATE covers SET position = ? WHERE id = ?",
+                               [(i * POSITION_STEP, cover_id) for i, cover_id in enumerate(ids)])
+
+    def import_json(self, path) -> int:
+        """从 metadata.json 格式的文件整体导入，返回新版本号"""
+        with open(path, "r", encoding="utf-8") as f:
+            return self.replace(json.load(f))
+
+    def export_json(self, path):
+        """导出为 metadata.json 格式（临时文件 + 原子改名）"""
+        covers, _ = self.snapshot()
+        atomic_write(path, json.dumps(covers, ensure_ascii=False, indent=2).encode("utf-8"))
@@ -0,0 +1,303 @@
+"""
+元数据存储：快照 + 追加式操作日志
+metadata.json 是快照（格式不变，其他读取方可以继续直接读），修改以补丁操作追加到 metadata.oplog，
+累计一定条数后压缩为新快照（原子改名）。每次修改递增版本号，携带旧版本号的写入会被拒绝。
+
+日志格式（NDJSON）：
+    {"base": 快照版本, "sha": 快照内容 sha1}      第一行
+    {"v": 版本, "ops": [操作, ...]}               每次提交一行
+
+操作：
+    {"op": "update", "id": ID, "fields": {...}}       更新字段，值为 null 时删除该字段
+    {"op": "delete", "ids": [ID, ...]}
+    {"op": "insert", "cards": [...], "index": 0}      插入新卡片（已存在的 ID 跳过）
+    {"op": "move", "id": ID, "to": 位置}
+    {"op": "reorder", "ids": [ID, ...]}               按给定顺序重排，未列出的保持原相对顺序排在后面
+    {"op": "replace", "cards": [...]}                 整体替换
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+
+class StaleVersionError(Exception):
+    """提交的基准版本不是当前版本"""
+
+    def __init__(self, current: int):
+        super().__init__(f"版本已过期，当前版本 {current}")
+        self.current = current
+
+
+def replace_cards(cards: list) -> list:
+    """
+    整体替换时的卡片列表：重复 ID 只保留第一张；没有 id 的卡片（手工整理的导入文件）原样保留，
+    它们不能被按 ID 的操作引用
+
+    Raises:
+        ValueError: 卡片不是对象
+    """
+    result, seen = [], set()
+    for card in cards:
+        if not isinstance(card, dict):
+            raise ValueError("replace 的卡片必须是对象")
+        cover_id = card.get("id")
+        if cover_id:
+            if cover_id in seen:
+                continue
+            seen.add(cover_id)
+        result.append(card)
+    return result
+
+
+def atomic_write(path, data: bytes):
+    """
+    写入同目录下唯一命名的临时文件，fsync 后原子改名为 path
+
+    快照、日志头和导出可能并发写入同一目录（另一个线程或采集进程），固定的 .tmp 文件名会互相覆盖
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as f:
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def apply_op(covers: list, op: dict) -> list:
+    """
+    把一个操作应用到卡片列表，返回新列表（不修改传入的列表和卡片）
+
+    Raises:
+        ValueError: 操作格式错误或引用了不存在的 ID
+    """
+    kind = op.get("op")
+    if kind == "update":
+        fields = op.get("fields")
+        if not isinstance(fields, dict) or "id" in fields:
+            raise ValueError("update 需要 fields 对象，且不能修改 id")
+        result = list(covers)
+        for i, cover in enumerate(result):
+            if op.get("id") is not None and cover.get("id") == op.get("id"):
+                cover = dict(cover)
+                for key, value in fields.items():
+                    if value is None:
+                        cover.pop(key, None)
+                    else:
+                        cover[key] = value
+                result[i] = cover
+                return result
+        raise ValueError(f"不存在的 ID: {op.get('id')}")
+    if kind == "delete":
+        ids = set(op.get("ids") or []) - {None}
+        return [c for c in covers if c.get("id") not in ids]
+    if kind == "insert":
+        existing = {c.get("id") for c in covers}
+        cards = []
+        for card in op.get("cards") or []:
+            if not isinstance(card, dict) or not card.get("id"):
+                raise ValueError("insert 的卡片必须包含 id")
+            if card["id"] not in existing:
+                existing.add(card["id"])
+                cards.append(card)
+        index = max(0, min(int(op.get("index", 0)), len(covers)))
+        return covers[:index] + cards + covers[index:]
+    if kind == "move":
+        result = [c for c in covers if op.get("id") is None or c.get("id") != op.get("id")]
+        if len(result) == len(covers):
+            raise ValueError(f"不存在的 ID: {op.get('id')}")
+        moved = next(c for c in covers if c.get("id") == op.get("id"))
+        index = max(0, min(int(op.get("to", 0)), len(result)))
+        result.insert(index, moved)
+        return result
+    if kind == "reorder":
+        order = {cover_id: i for i, cover_id in enumerate(op.get("ids") or [])}
+        listed = sorted((c for c in covers if c.get("id") in order), key=lambda c: order[c["id"]])
+        return listed + [c for c in covers if c.get("id") not in order]
+    if kind == "replace":
+        cards = op.get("cards")
+        if not isinstance(cards, list):
+            raise ValueError("replace 需要 cards 数组")
+        return replace_cards(cards)
+    raise ValueError(f"未知操作: {kind}")
+
+
+class MetadataStore:
+    """
+    快照 + 操作日志的元数据存储（线程安全；另一个进程写入后会在下次访问时重新加载）
+
+    Args:
+        snapshot_path: 快照路径（metadata.json）
+        log_path: 操作日志路径
+        compact_every: 日志累计多少次提交后压缩为快照
+    """
+
+    def __init__(self, snapshot_path, log_path, compact_every: int = 200):
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = Path(log_path)
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._covers = []
+        self._version = 0
+        self._log_entries = 0
+        self._pending_header = None  # 尚未写入的日志头 (版本, 快照 sha)，第一次提交时写入
+        self._stamp = None
+        self._load()
+
+    def _file_stamp(self):
+        stamps = []
+        for path in (self.snapshot_path, self.log_path):
+            try:
+                stat = path.stat()
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _load(self):
+        """读取快照并重放日志；快照与日志头不匹配（压缩中途崩溃或被外部改写）时以快照为准"""
+        raw = b"[]"
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as f:
+                raw = f.read()
+        covers = json.loads(raw.decode("utf-8"))
+        sha = hashlib.sha1(raw).hexdigest()
+
+        header, commits = None, []
+        if self.log_path.exists():
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # 写到一半的最后一行
+                    if header is None:
+                        header = record
+                    else:
+                        commits.append(record)
+
+        version = header.get("base", 0) if header else 0
+        if header and header.get("sha") == sha:
+            for commit in commits:
+                if commit.get("v", 0) <= version:
+                    continue
+                for op in commit.get("ops", []):
+                    try:
+                        covers = apply_op(covers, op)
+                    except ValueError:
+                        pass
+                version = commit["v"]
+            self._log_entries = len(commits)
+            self._pending_header = None
+        else:
+            # 快照已包含或覆盖了日志中的修改：版本号继续递增（旧客户端的版本随之失效）。
+            # 日志头等第一次提交时再写，只读的调用方（导出、export_covers --input）不会留下 .oplog 文件
+            if header is not None:
+                version = max([version] + [c.get("v", 0) for c in commits]) + 1
+            if self._stamp is not None:
+                version = max(version, self._version + 1)  # 运行中快照被外部改写
+            self._pending_header = (version, sha)
+            self._log_entries = 0
+
+        self._covers = covers
+        self._version = version
+        self._stamp = self._file_stamp()
+
+    def _refresh(self):
+        if self._file_stamp() != self._stamp:
+            self._load()
+
+    def _write_log_header(self, version: int, sha: str):
+        atomic_write(self.log_path, (json.dumps({"base": version, "sha": sha}) + "\n").encode("utf-8"))
+
+    def snapshot(self):
+        """返回 (卡片列表, 版本号)；列表在后续修改时不会被原地改动，但调用方不应修改它"""
+        with self._lock:
+            self._refresh()
+            return self._covers, self._version
+
+    @property
+    def version(self) -> int:
+        return self.snapshot()[1]
+
+    def get(self, cover_id: str):
+        """按 ID 读取一张卡片，不存在时返回 None"""
+        covers, _ = self.snapshot()
+        return next((c for c in covers if c.get("id") == cover_id), None)
+
+    def apply(self, ops: list, base_version: int = None) -> int:
+        """
+        原子提交一组操作（全部成功才写日志）
+
+        Args:
+            ops: 操作列表
+            base_version: 客户端所基于的版本，None 表示不检查（服务端内部写入）
+
+        Returns:
+            新版本号
+
+        Raises:
+            StaleVersionError: base_version 不是当前版本
+            ValueError: 操作无效
+        """
+        with self._lock:
+            self._refresh()
+            if base_version is not None and base_version != self._version:
+                raise StaleVersionError(self._version)
+            covers = self._covers
+            for op in ops:
+                covers = apply_op(covers, op)
+            version = self._version + 1
+
+            if self._pending_header is not None:
+                self._write_log_header(*self._pending_header)
+                self._pending_header = None
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"v": version, "ops": ops}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._covers = covers
+            self._version = version
+            self._log_entries += 1
+            self._stamp = self._file_stamp()
+            if self._log_entries >= self.compact_every:
+                self.compact()
+            return version
+
+    def replace(self, covers: list) -> int:
+        """整体替换并立即写快照（批量采集结果等）"""
+        with self._lock:
+            self._refresh()
+            self._covers = replace_cards(covers)
+            self._version += 1
+            self.compact()
+            return self._version
+
+    def compact(self):
+        """把当前状态写成快照（临时文件 + 原子改名），然后重置日志"""
+        with self._lock:
+            raw = json.dumps(self._covers, ensure_ascii=False, indent=2).encode("utf-8")
+            atomic_write(self.snapshot_path, raw)
+            # 崩溃在这里：日志头的 sha 与新快照不符，加载时以快照为准
+            self._write_log_header(self._version, hashlib.sha1(raw).hexdigest())
+            self._pending_header = None
+            self._log_entries = 0
+            self._stamp = self._file_stamp()
+
+    def import_json(self, path) -> int:
+        """从 metadata.json 格式的文件整体导入，返回新版本号"""
+        with open(path, "r", encoding="utf-8") as f:
+            return self.replace(json.load(f))
+
+    def export_json(self, path):
+        """导出为 metadata.json 格式（临时文件 + 原子改名）"""
+        covers, _ = self.snapshot()
+        atomic_write(path, json.dumps(covers, ensure_ascii=False, indent=2).encode("utf-8"))
@@ -0,0 +1,287 @@
+"""
+视频 Range 磁盘缓存
+按固定大小的 chunk 缓存代理过的视频字节，重复 / 重叠的 Range 请求直接从本地读取
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.error
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+# 签名类参数每次解析都会变化，不参与缓存 key
+VOLATILE_PARAMS = {"x-expires", "x-signature", "expires", "signature", "sign", "ts", "logid"}
+MAX_FETCH_RUN = 8  # 一次上游请求最多连续补齐的 chunk 数
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+)")
+
+
+def cache_key(url: str) -> str:
+    """去掉签名参数后的 URL 摘要"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k.lower() not in VOLATILE_PARAMS)
+    normalized = f"{parts.netloc}{parts.path}?{urlencode(query)}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def parse_range(range_header: str, size: int):
+    """
+    解析单段 Range 头
+
+    Returns:
+        (start, end) 闭区间；无 Range 头返回整个文件；无法满足返回 None
+    """
+    if not range_header:
+        return 0, size - 1
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:
+        start = max(0, size - int(match.group(2)))
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+class CachedVideo:
+    """一个视频在缓存中的描述（总大小、类型、chunk 目录）"""
+
+    def __init__(self, key: str, directory: Path, size: int, content_type: str):
+        self.key = key
+        self.directory = directory
+        self.size = size
+        self.content_type = content_type
+
+    def chunk_path(self, index: int) -> Path:
+        return self.directory / f"{index}.chunk"
+
+
+class VideoRangeCache:
+    """
+    chunk 对齐的视频字节缓存，总大小超出预算时按 LRU 淘汰 chunk；正在发送的 chunk 不会被淘汰
+
+    Args:
+        cache_dir: 缓存目录
+        pool: 用于回源的 UpstreamPool
+        max_bytes: 缓存总大小上限
+        chunk_size: chunk 大小（字节）
+    """
+
+    def __init__(self, cache_dir, pool, max_bytes: int = 2 << 30, chunk_size: int = 1 << 20):
+        self.cache_dir = Path(cache_dir)
+        self.pool = pool
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._videos = {}         # key -> CachedVideo
+        self._lru = OrderedDict() # (key, index) -> 字节数
+        self._total = 0
+        self._pins = {}           # (key, index) -> 正在发送该 chunk 的请求数
+        self._stats = {"chunk_hits": 0, "chunk_misses": 0, "bytes_hit": 0, "bytes_fetched": 0, "evicted": 0}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["videos"] = len(self._videos)
+            stats["chunks"] = len(self._lru)
+            stats["total_bytes"] = self._total
+        return stats
+
+    def open(self, url: str, headers: dict):
+        """
+        查找或探测视频，首次访问时向上游请求第 0 个 chunk 以获取总大小
+
+        Returns:
+            CachedVideo；上游不支持 Range 时返回 None（调用方应直接透传）
+        """
+        key = cache_key(url)
+        with self._lock:
+            video = self._videos.get(key)
+        if video is not None:
+            return video
+
+        probe = dict(headers, Range=f"bytes=0-{self.chunk_size - 1}")
+        with self.pool.request("GET", url, probe) as response:
+            match = CONTENT_RANGE_PATTERN.search(response.headers.get("Content-Range", ""))
+            if response.status != 206 or not match:
+                return None
+            directory = self.cache_dir / key
+            directory.mkdir(exist_ok=True)
+            video = CachedVideo(key, directory, int(match.group(3)),
+                                response.headers.get("Content-Type", "video/mp4"))
+            self._store_chunk(video, 0, response)
+
+        meta = {"size": video.size, "content_type": video.content_type}
+        (directory / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        with self._lock:
+            self._videos[key] = video
+        return video
+
+    def segments(self, video: CachedVideo, start: int, end: int, url: str, headers: dict):
+        """
+        依次产出覆盖 [start, end] 的 (chunk 文件, 偏移, 长度)，缺失的 chunk 即时回源补齐
+
+        回源时连续缺失的 chunk 合并为一次上游请求，边下载边产出。
+        产出的 chunk 在调用方取下一段（或关闭生成器）之前保持固定，不会被其他请求触发的淘汰删除。
+        """
+        index = start // self.chunk_size
+        last = end // self.chunk_size
+        pinned = None
+        try:
+            while index <= last:
+                if self._hit(video, index):
+                    pinned = (video.key, index)
+                    yield self._slice(video, index, start, end)
+                    self._unpin(pinned)
+                    pinned = None
+                    index += 1
+                    continue
+
+                run_end = index
+                while run_end < last and run_end - index + 1 < MAX_FETCH_RUN and not self._cached(video, run_end + 1):
+                    run_end += 1
+                for fetched in self._fetch_run(video, index, run_end, url, headers):
+                    pinned = (video.key, fetched)
+                    yield self._slice(video, fetched, start, end)
+                    self._unpin(pinned)
+                    pinned = None
+                index = run_end + 1
+        finally:
+            if pinned is not None:
+                self._unpin(pinned)
+
+    def _slice(self, video, index, start, end):
+        chunk_start = index * self.chunk_size
+        chunk_end = min(chunk_start + self.chunk_size, video.size) - 1
+        offset = max(start, chunk_start) - chunk_start
+        length = min(end, chunk_end) - chunk_start - offset + 1
+        return video.chunk_path(index), offset, length
+
+    def _cached(self, video, index) -> bool:
+        with self._lock:
+            return (video.key, index) in self._lru
+
+    def _hit(self, video, index) -> bool:
+        """命中时同时固定该 chunk，调用方用完后 _unpin"""
+        entry = (video.key, index)
+        with self._lock:
+            size = self._lru.get(entry)
+            if size is None:
+                return False
+            self._lru.move_to_end(entry)
+            self._pins[entry] = self._pins.get(entry, 0) + 1
+            self._stats["chunk_hits"] += 1
+            self._stats["bytes_hit"] += size
+        try:
+            os.utime(video.chunk_path(index))  # 重启后按 mtime 恢复 LRU 顺序
+        except FileNotFoundError:
+            self._unpin(entry)
+            self._forget(entry)
+            return False
+        return True
+
+    def _unpin(self, entry):
+        with self._lock:
+            count = self._pins.pop(entry) - 1
+            if count:
+                self._pins[entry] = count
+
+    def _fetch_run(self, video, first, last, url, headers):
+        range_end = min((last + 1) * self.chunk_size, video.size) - 1
+        fetch = dict(headers, Range=f"bytes={first * self.chunk_size}-{range_end}")
+        with self.pool.request("GET", url, fetch) as response:
+            if response.status != 206:
+                raise urllib.error.URLError(f"upstream ignored Range (status {response.status})")
+            for index in range(first, last + 1):
+                self._store_chunk(video, index, response, pin=True)
+                yield index
+
+    def _store_chunk(self, video, index, response, pin: bool = False):
+        expected = min(self.chunk_size, video.size - index * self.chunk_size)
+        path = video.chunk_path(index)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        written = 0
+        with open(tmp_path, "wb") as f:
+            while written < expected:
+                data = response.read(min(65536, expected - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+        if written != expected:
+            tmp_path.unlink(missing_ok=True)
+            raise urllib.error.URLError(f"upstream closed early ({written}/{expected} bytes)")
+        os.replace(tmp_path, path)
+
+        entry = (video.key, index)
+        with self._lock:
+            self._stats["chunk_misses"] += 1
+            self._stats["bytes_fetched"] += written
+            self._total += written - self._lru.pop(entry, 0)
+            self._lru[entry] = written
+            if pin:
+                self._pins[entry] = self._pins.get(entry, 0) + 1
+            evict = self._pop_over_budget(keep=entry)
+        self._remove_chunks(evict)
+
+    def _pop_over_budget(self, keep):
+        """按 LRU 顺序选出要淘汰的 chunk（跳过 keep 与正在发送的 chunk），调用方持有锁"""
+        evict = []
+        excess = self._total - self.max_bytes
+        for entry, size in self._lru.items():
+            if excess <= 0:
+                break
+            if entry == keep or entry in self._pins:
+                continue
+            evict.append(entry)
+            excess -= size
+        for entry in evict:
+            self._total -= self._lru.pop(entry)
+        self._stats["evicted"] += len(evict)
+        return evict
+
+    def _remove_chunks(self, entries):
+        for key, index in entries:
+            try:
+                (self.cache_dir / key / f"{index}.chunk").unlink()
+            except OSError:
+                pass  # Windows 下正在发送的文件无法删除，下次启动重新计入
+
+    def _forget(self, entry):
+        with self._lock:
+            self._total -= self._lru.pop(entry, 0)
+
+    def _load_index(self):
+        """从磁盘恢复视频元数据与 chunk 的 LRU 顺序"""
+        chunks = []
+        for directory in self.cache_dir.iterdir():
+            meta_path = directory / "meta.json"
+            if not meta_path.is_file():
+                continue
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            key = directory.name
+            self._videos[key] = CachedVideo(key, directory, meta["size"], meta["content_type"])
+            for path in directory.glob("*.chunk"):
+                stat = path.stat()
+                chunks.append((stat.st_mtime, key, int(path.stem), stat.st_size))
+            for tmp in directory.glob("*.tmp"):
+                tmp.unlink(missing_ok=True)
+        for _, key, index, size in sorted(chunks):
+            self._lru[(key, index)] = size
+            self._total += size
+        self._remove_chunks(self._pop_over_budget(keep=None))
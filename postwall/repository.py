@@ -0,0 +1,54 @@
+"""
+元数据仓库
+run.py、scraper/ 下的脚本和服务器都通过这里读写元数据，存储后端可选：
+    json:   metadata.json 快照 + metadata.oplog 操作日志（MetadataStore，默认）
+    sqlite: metadata.db，WAL 模式，按 ID / 作者 / 发布时间 / 排序位置建索引（SqliteMetadataStore）
+
+两种后端提供相同的接口：
+    snapshot() -> (covers, version)    全部卡片（按墙上顺序）与版本号，调用方不应修改返回的列表
+    version                            当前版本号
+    get(id)                            按 ID 读取一张卡片
+    apply(ops, base_version=None)      原子提交一组修改操作，返回新版本号
+    replace(covers)                    整体替换
+    import_json(path) / export_json(path)
+"""
+from pathlib import Path
+
+from postwall.metadata_sqlite import SqliteMetadataStore
+from postwall.metadata_store import MetadataStore
+
+
+METADATA_BACKENDS = ("json", "sqlite")
+
+
+def open_repository(data_dir, backend: str = "json", compact_every: int = 200):
+    """
+    打开 data_dir 下的元数据仓库
+
+    sqlite 后端首次打开（数据库为空）时自动导入已有的 metadata.json。
+
+    Args:
+        data_dir: 数据目录（包含 metadata.json / metadata.db）
+        backend: "json" 或 "sqlite"
+        compact_every: json 后端的日志压缩间隔
+
+    Raises:
+        ValueError: 未知的后端
+    """
+    data_dir = Path(data_dir)
+    if backend == "json":
+        return MetadataStore(data_dir / "metadata.json", data_dir / "metadata.oplog", compact_every=compact_every)
+    if backend == "sqlite":
+        repo = SqliteMetadataStore(data_dir / "metadata.db")
+        legacy = data_dir / "metadata.json"
+        if repo.is_empty() and legacy.exists():
+            repo.import_json(legacy)
+            print(f"📦 已从 {legacy.name} 导入 {len(repo.snapshot()[0])} 条元数据到 {repo.db_path.name}")
+        return repo
+    raise ValueError(f"未知的元数据后端: {backend}（可选 {', '.join(METADATA_BACKENDS)}）")
+
+
+def load_covers(repo) -> list:
+    """读取全部卡片的副本（可以随意修改后再 replace 回去）"""
+    covers, _ = repo.snapshot()
+    return [dict(cover) for cover in covers]
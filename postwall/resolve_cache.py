@@ -0,0 +1,174 @@
+"""
+视频解析结果缓存
+/api/resolve_video 的内存 + 磁盘缓存，过期时间跟随签名 URL 的 x-expires，
+同一链接的并发请求合并为一次上游抓取
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+VIDEO_ID_PATTERN = re.compile(r"/video/(\d+)")
+EXPIRY_MARGIN = 120  # 提前失效秒数，避免返回马上就过期的签名链接
+
+
+def normalize_share_url(share_url: str) -> str:
+    """
+    生成缓存 key：视频页链接归一为 video:<id>，短链去掉查询参数与末尾斜杠
+    """
+    share_url = share_url.strip()
+    match = VIDEO_ID_PATTERN.search(share_url)
+    if match:
+        return f"video:{match.group(1)}"
+    parts = urlsplit(share_url)
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def signed_expiry(result: dict):
+    """返回结果中各签名 URL 的最早 x-expires（Unix 时间戳），没有则返回 None"""
+    expiries = []
+    for field in ("real_video_url", "cover_url"):
+        query = parse_qs(urlsplit(result.get(field) or "").query)
+        for value in query.get("x-expires", []):
+            if value.isdigit():
+                expiries.append(int(value))
+    return min(expiries) if expiries else None
+
+
+class _Inflight:
+    """一次进行中的上游抓取，等待者共享结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResolveCache:
+    """
+    解析结果缓存
+
+    Args:
+        resolver: 实际抓取函数 share_url -> dict
+        cache_path: 持久化 JSON 路径，None 表示仅内存
+        default_ttl: 结果中没有 x-expires 时的缓存秒数
+        max_ttl: 缓存秒数上限
+    """
+
+    def __init__(self, resolver, cache_path=None, default_ttl: int = 3600, max_ttl: int = 86400):
+        self.resolver = resolver
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> {"expires": ts, "result": dict}
+        self._inflight = {}  # key -> _Inflight
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "errors": 0}
+        if self.cache_path:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["inflight"] = len(self._inflight)
+        return stats
+
+    def get(self, share_url: str) -> dict:
+        """
+        返回解析结果，命中缓存直接返回，否则抓取（并发请求只抓取一次）
+
+        Raises:
+            resolver 抛出的异常（所有等待者都会收到）
+        """
+        key = normalize_share_url(share_url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires"] > time.time():
+                    self._stats["hits"] += 1
+                    return dict(entry["result"])
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self._stats["coalesced"] += 1
+                owner = False
+            else:
+                inflight = self._inflight[key] = _Inflight()
+                self._stats["misses"] += 1
+                owner = True
+
+        if not owner:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return dict(inflight.result)
+
+        try:
+            inflight.result = self.resolver(share_url)
+        except Exception as e:
+            inflight.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.done.set()
+
+        self._store(key, inflight.result)
+        return dict(inflight.result)
+
+    def invalidate(self, share_url: str):
+        """删除某个链接的缓存（例如签名链接提前失效时）"""
+        with self._lock:
+            self._entries.pop(normalize_share_url(share_url), None)
+        self._save()
+
+    def _store(self, key: str, result: dict):
+        # 没解析出视频地址的结果不缓存，下次重新抓取
+        if not result.get("real_video_url"):
+            return
+        now = time.time()
+        expires = signed_expiry(result)
+        if expires is None:
+            expires = now + self.default_ttl
+        expires = min(expires - EXPIRY_MARGIN, now + self.max_ttl)
+        if expires <= now:
+            return
+
+        entry = {"expires": expires, "result": result}
+        with self._lock:
+            self._entries[key] = entry
+            # 短链解析后同时以视频 ID 为 key 存一份，视频页链接也能命中
+            if result.get("id", "").isdigit():
+                self._entries[f"video:{result['id']}"] = entry
+        self._save()
+
+    def _load(self):
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self._entries = {k: v for k, v in entries.items() if v.get("expires", 0) > now}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+        tmp_path = self.cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,47 @@
+"""
+收藏接口响应捕获
+监听 Playwright 页面的网络响应，直接拿到收藏列表 JSON（aweme_list），不必解析 DOM
+"""
+import asyncio
+import re
+
+
+# 收藏夹（listcollection）与喜欢（favorite）列表接口
+FAVORITES_API_PATTERN = re.compile(r"/aweme/v\d+/web/aweme/(?:listcollection|favorite)/")
+
+
+class FavoritesCapture:
+    """
+    收集收藏接口的响应，用法：page.on("response", capture.on_response)
+
+    Args:
+        url_pattern: 匹配收藏接口 URL 的正则
+    """
+
+    def __init__(self, url_pattern=FAVORITES_API_PATTERN):
+        self.url_pattern = url_pattern
+        self.queue = asyncio.Queue()
+        self.has_more = True  # 最近一页的 has_more
+        self.pages = 0        # 已处理的接口响应数
+
+    async def on_response(self, response):
+        if not self.url_pattern.search(response.url):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            return  # 预检请求、空响应或非 JSON
+        if isinstance(data, dict) and "aweme_list" in data:
+            self.queue.put_nowait(data)
+
+    async def next_page(self, timeout: float) -> list:
+        """
+        等待下一页接口数据
+
+        Raises:
+            asyncio.TimeoutError: timeout 秒内没有新响应
+        """
+        data = await asyncio.wait_for(self.queue.get(), timeout)
+        self.pages += 1
+        self.has_more = bool(data.get("has_more"))
+        return data.get("aweme_list") or []
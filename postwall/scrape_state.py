@@ -0,0 +1,101 @@
+"""
+收藏夹采集进度
+维护已采集视频的 ID 索引，支持增量模式（遇到连续已知视频即停止）和断点续采
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+
+class ScrapeProgress:
+    """
+    采集进度与断点
+
+    Args:
+        known_ids: metadata.json 中已有的视频 ID（增量模式下用于判断何时停止）
+        checkpoint_path: 断点文件路径，None 表示不保存断点
+        checkpoint_every: 每新增多少个视频写一次断点
+        stop_after_known: 连续遇到多少个已知视频后认为已追上旧数据，None 表示不启用增量模式
+    """
+
+    def __init__(self, known_ids=(), checkpoint_path=None, checkpoint_every: int = 50,
+                 stop_after_known: int = None):
+        self.known_ids = set(known_ids)
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+        self.stop_after_known = stop_after_known
+        self.videos = []
+        self.ids = set()         # 本次已采集（含断点恢复）的 ID 索引
+        self.page_ids = set()    # 本次运行在页面上出现过的 ID（含已知 / 断点中的）
+        self.last_seen = 0       # 最近一批中首次在页面上出现的视频数，用于判断页面是否还在加载
+        self.known_run = 0       # 当前连续遇到的已知视频数
+        self.reached_known = False
+        self._since_checkpoint = 0
+
+    @property
+    def incremental(self) -> bool:
+        return self.stop_after_known is not None
+
+    def resume(self) -> int:
+        """从断点恢复已采集的视频，返回恢复数量（模式不一致的断点会被忽略）"""
+        if not self.checkpoint_path or not self.checkpoint_path.exists():
+            return 0
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get("incremental") != self.incremental:
+            return 0
+        for video in checkpoint.get("videos", []):
+            if video.get("id") and video["id"] not in self.ids:
+                self.videos.append(video)
+                self.ids.add(video["id"])
+        return len(self.videos)
+
+    def add(self, videos: list) -> int:
+        """
+        按页面顺序合并一批视频，返回新增数量
+
+        增量模式下已知视频不会加入结果，连续遇到 stop_after_known 个时置 reached_known。
+        断点恢复的视频不计入新增，但计入 last_seen，快速滚过已采集部分时不会被误判为没有新数据。
+        """
+        new_count = 0
+        self.last_seen = 0
+        for video in videos:
+            video_id = video.get("id")
+            if not video_id or video_id in self.page_ids:
+                continue
+            self.page_ids.add(video_id)
+            self.last_seen += 1
+            if video_id in self.ids:
+                continue
+            if video_id in self.known_ids:
+                self.known_run += 1
+                if self.incremental and self.known_run >= self.stop_after_known:
+                    self.reached_known = True
+                if self.incremental:
+                    continue
+            else:
+                self.known_run = 0
+            self.videos.append(video)
+            self.ids.add(video_id)
+            new_count += 1
+
+        self._since_checkpoint += new_count
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+        return new_count
+
+    def checkpoint(self):
+        """原子写入断点文件"""
+        self._since_checkpoint = 0
+        if not self.checkpoint_path:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"incremental": self.incremental, "saved_at": int(time.time()), "videos": self.videos},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
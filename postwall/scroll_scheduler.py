@@ -0,0 +1,115 @@
+"""
+自适应滚动调度
+根据"滚动后多久出现新视频"的实测耗时调整等待时间：网络快时缩短等待，无新数据时指数退避；
+无新数据的一轮中检测到"没有更多"或页面高度稳定时立即停止，并记录每轮的耗时指标
+"""
+import asyncio
+import time
+
+
+class ScrollScheduler:
+    """
+    滚动等待调度器（与 Playwright 无关，页面状态通过 probe 回调获取）
+
+    Args:
+        min_wait: 单轮等待下限（秒）
+        max_wait: 单轮等待上限（秒）
+        initial_wait: 尚未测得加载耗时时的等待时间
+        headroom: 等待时间 = 平均加载耗时 × headroom
+        backoff: 无新数据时等待时间的放大倍数
+        stable_rounds: 连续多少轮无新数据且页面高度不变时停止
+        max_idle_rounds: 页面高度仍在变化（如加载动画）但始终无新数据时，最多等待的轮数
+        poll_interval: 等待期间探测页面状态的间隔
+    """
+
+    def __init__(self, min_wait: float = 0.2, max_wait: float = 8.0, initial_wait: float = 1.5,
+                 headroom: float = 3.0, backoff: float = 2.0, stable_rounds: int = 2,
+                 max_idle_rounds: int = 5, poll_interval: float = 0.1, smoothing: float = 0.3):
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.headroom = headroom
+        self.backoff = backoff
+        self.stable_rounds = stable_rounds
+        self.max_idle_rounds = max_idle_rounds
+        self.poll_interval = poll_interval
+        self.smoothing = smoothing
+        self.budget = initial_wait   # 下一轮的等待上限
+        self.load_time = None        # 新视频出现耗时的指数移动平均
+        self.idle_rounds = 0
+        self.metrics = []            # 每轮一条 {iteration, new, wait, budget, height, stop}
+        self._last_height = None
+
+    def _clamp(self, seconds: float) -> float:
+        return max(self.min_wait, min(self.max_wait, seconds))
+
+    async def wait_for_change(self, probe, before: dict):
+        """
+        滚动后轮询页面，出现新视频、"没有更多"或超过本轮等待上限时返回
+
+        Args:
+            probe: 异步回调，返回 {"count": 视频链接数, "height": 页面高度, "no_more": bool}
+            before: 滚动前的页面状态
+
+        Returns:
+            (最新页面状态, 实际等待秒数)
+        """
+        budget = self.budget
+        started = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            state = await probe()
+            elapsed = time.perf_counter() - started
+            if state["count"] != before["count"] or state.get("no_more") or elapsed >= budget:
+                return state, elapsed
+
+    def record(self, new_items: int, elapsed: float, height=None, no_more: bool = False):
+        """
+        记录一轮结果并更新下一轮的等待上限
+
+        Args:
+            new_items: 本轮页面上新出现的视频数
+            elapsed: 本轮实际等待秒数
+            height: 页面滚动高度，None 表示不可用（不做高度稳定判断）
+            no_more: 是否已到底（列表末尾提示"没有更多"或接口 has_more=0），只在没有新数据的一轮中停止
+
+        Returns:
+            停止原因 no_more / stable / idle，继续滚动时返回 None
+        """
+        stable = height is not None and height == self._last_height
+        self._last_height = height
+        if new_items:
+            self.idle_rounds = 0
+            self.load_time = elapsed if self.load_time is None else (
+                self.smoothing * elapsed + (1 - self.smoothing) * self.load_time)
+            self.budget = self._clamp(self.load_time * self.headroom)
+        else:
+            self.idle_rounds += 1
+            self.budget = self._clamp(self.budget * self.backoff)
+
+        stop = None
+        if no_more and not new_items:
+            stop = "no_more"
+        elif self.idle_rounds and stable and self.idle_rounds >= self.stable_rounds:
+            stop = "stable"
+        elif self.idle_rounds >= self.max_idle_rounds:
+            stop = "idle"
+
+        self.metrics.append({
+            "iteration": len(self.metrics) + 1,
+            "new": new_items,
+            "wait": round(elapsed, 3),
+            "budget": round(self.budget, 3),
+            "height": height,
+            "stop": stop,
+        })
+        return stop
+
+    def summary(self) -> dict:
+        """汇总指标：轮数、总等待、有新数据轮的平均等待、无新数据轮的总等待"""
+        productive = [m["wait"] for m in self.metrics if m["new"]]
+        return {
+            "iterations": len(self.metrics),
+            "total_wait": round(sum(m["wait"] for m in self.metrics), 3),
+            "avg_load_time": round(sum(productive) / len(productive), 3) if productive else None,
+            "idle_wait": round(sum(m["wait"] for m in self.metrics if not m["new"]), 3),
+        }
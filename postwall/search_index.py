@@ -0,0 +1,241 @@
+"""
+元数据全文搜索
+标题 / 作者 / #话题 的倒排索引：中文按相邻两字切分（bigram），英文和数字按整词，#话题 整体作为一个词。
+元数据版本变化时按 ID 对比标题和作者，只重新切分有变化的卡片
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+
+
+HASHTAG_RE = re.compile(r"#([^\s#@,.!?;:，。！？、；：]+)")
+CJK_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# 命中字段的权重：话题 > 作者 > 标题
+TAG_WEIGHT = 3.0
+AUTHOR_WEIGHT = 2.0
+TITLE_WEIGHT = 1.0
+
+
+def normalize(text: str) -> str:
+    """全角转半角（＃ -> #）并转小写"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def text_tokens(text: str) -> list:
+    """
+    中文连续段切成相邻两字（单字段保留单字），英文 / 数字按整词
+
+    >>> text_tokens("今天吃火锅 vlog")
+    ['今天', '天吃', '吃火', '火锅', 'vlog']
+    """
+    tokens = []
+    for run in CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(WORD_RE.findall(text))
+    return tokens
+
+
+def hashtags(text: str) -> list:
+    return HASHTAG_RE.findall(text)
+
+
+def cjk_bigram(term: str):
+    """标题 / 作者索引词中的中文 bigram（去掉 @ 前缀），其他词返回 None"""
+    body = term[1:] if term.startswith("@") else term
+    return body if len(body) == 2 and CJK_RE.fullmatch(body) else None
+
+
+def document_terms(cover: dict) -> set:
+    """一张卡片的索引词：标题词原样，作者词加 @ 前缀，话题加 # 前缀"""
+    title = normalize(cover.get("title"))
+    terms = set(text_tokens(title))
+    terms.update("@" + token for token in text_tokens(normalize(cover.get("author"))))
+    terms.update("#" + tag for tag in hashtags(title) if tag)
+    return terms
+
+
+class SearchIndex:
+    """
+    倒排索引（线程安全）
+
+    sync() 传入最新的 (covers, version)，版本不变时不做任何事；
+    search() 返回按相关度排序的 ID，相关度相同的按墙上顺序
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = {}     # 词 -> {文档号}
+        self._char_terms = {}   # 汉字 -> 包含该字的 bigram，用于单字查询
+        self._docs = {}         # 视频 ID -> (文档号, (标题, 作者), 卡片对象)
+        self._doc_terms = {}    # 文档号 -> 索引词
+        self._doc_ids = {}      # 文档号 -> 视频 ID
+        self._order = []        # 墙上顺序的文档号
+        self._positions = {}    # 文档号 -> 墙上位置
+        self._next_doc = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, cover_id: str, cover: dict, signature: tuple):
+        doc = self._next_doc
+        self._next_doc += 1
+        terms = document_terms(cover)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = set()
+                bigram = cjk_bigram(term)
+                if bigram:
+                    for char in set(bigram):
+                        self._char_terms.setdefault(char, set()).add(bigram)
+            posting.add(doc)
+        self._docs[cover_id] = (doc, signature, cover)
+        self._doc_terms[doc] = terms
+        self._doc_ids[doc] = cover_id
+
+    def _remove(self, cover_id: str):
+        doc = self._docs.pop(cover_id)[0]
+        for term in self._doc_terms.pop(doc):
+            posting = self._postings[term]
+            posting.discard(doc)
+            if not posting:
+                del self._postings[term]
+                bigram = cjk_bigram(term)
+                if bigram and bigram not in self._postings and "@" + bigram not in self._postings:
+                    for char in set(bigram):
+                        related = self._char_terms.get(char)
+                        if related is not None:
+                            related.discard(bigram)
+                            if not related:
+                                del self._char_terms[char]
+        del self._doc_ids[doc]
+
+    def sync(self, covers: list, version) -> dict:
+        """
+        与最新元数据同步：新增 / 删除的卡片增删索引，标题或作者变化的重新切分
+
+        Returns:
+            {"added", "updated", "removed"}，版本未变时全为 0
+        """
+        with self._lock:
+            stats = {"added": 0, "updated": 0, "removed": 0}
+            if version == self._version and version is not None:
+                return stats
+            docs = self._docs
+            seen = set()
+            order = []
+            for cover in covers:
+                cover_id = cover.get("id")
+                known = docs.get(cover_id)
+                # 存储按写时复制更新卡片，同一个对象说明内容没变
+                if known is not None and known[2] is cover and cover_id not in seen:
+                    seen.add(cover_id)
+                    order.append(known[0])
+                    continue
+                if not cover_id or cover_id in seen:
+                    continue
+                seen.add(cover_id)
+                signature = (cover.get("title"), cover.get("author"))
+                if known is None:
+                    self._add(cover_id, cover, signature)
+                    stats["added"] += 1
+                elif known[1] != signature:
+                    self._remove(cover_id)
+                    self._add(cover_id, cover, signature)
+                    stats["updated"] += 1
+                else:
+                    docs[cover_id] = (known[0], signature, cover)
+                order.append(self._docs[cover_id][0])
+            for cover_id in [i for i in docs if i not in seen] if len(docs) > len(seen) else ():
+                self._remove(cover_id)
+                stats["removed"] += 1
+            self._order = order
+            self._positions = {doc: i for i, doc in enumerate(order)}
+            self._version = version
+            return stats
+
+    def _idf(self, size: int) -> float:
+        return math.log(1 + len(self._docs) / (1 + size))
+
+    def _token_matches(self, token: str):
+        """查询词 -> (标题命中, 作者命中)；单个汉字展开为标题 / 作者中包含它的所有 bigram"""
+        if len(token) == 1 and CJK_RE.fullmatch(token):
+            title = set(self._postings.get(token, ()))
+            author = set(self._postings.get("@" + token, ()))
+            for term in self._char_terms.get(token, ()):
+                title |= self._postings.get(term, set())
+                author |= self._postings.get("@" + term, set())
+            return title, author
+        return self._postings.get(token, set()), self._postings.get("@" + token, set())
+
+    def search(self, query: str, limit: int = 50) -> dict:
+        """
+        查询：所有查询词都要命中（标题或作者中任一处）；#话题 精确匹配话题，不存在该话题时按普通文字匹配
+
+        Returns:
+            {"ids": [...], "total": 命中总数, "version", "took_ms"}
+        """
+        start = time.perf_counter()
+        query = normalize(query)
+        with self._lock:
+            candidates = None
+            boosts = []  # (文档集合, 加分)
+            required = []
+            for tag in hashtags(query):
+                posting = self._postings.get("#" + tag)
+                if posting:
+                    required.append(posting)
+                    boosts.append((posting, TAG_WEIGHT * self._idf(len(posting))))
+            text = HASHTAG_RE.sub(lambda m: " " if self._postings.get("#" + m.group(1)) else m.group(1), query)
+            for token in dict.fromkeys(text_tokens(text)):
+                title, author = self._token_matches(token)
+                matched = title | author if author else title
+                required.append(matched)
+                if author:
+                    boosts.append((author, (AUTHOR_WEIGHT - TITLE_WEIGHT) * self._idf(len(matched))))
+
+            if required:
+                required.sort(key=len)
+                candidates = set(required[0])
+                for posting in required[1:]:
+                    candidates &= posting
+                    if not candidates:
+                        break
+            candidates = candidates or set()
+
+            # AND 语义下只命中标题的文档得分相同：只给命中作者 / 话题的文档单独打分，其余按墙上顺序
+            scores = {}
+            for posting, weight in boosts:
+                boosted = posting & candidates
+                if len(boosted) == len(candidates):
+                    continue  # 所有结果都命中，不影响排序
+                for doc in boosted:
+                    scores[doc] = scores.get(doc, 0.0) + weight
+            positions = self._positions
+            ranked = sorted(scores, key=positions.__getitem__)
+            ranked.sort(key=scores.__getitem__, reverse=True)  # 稳定排序：同分的保持墙上顺序
+            del ranked[limit:]
+            if len(ranked) < limit and len(candidates) > len(ranked):
+                picked = set(ranked)
+                if len(candidates) * 8 < len(self._order):
+                    # 结果较少：直接按位置排序
+                    ranked += sorted(candidates - picked, key=positions.get)[:limit - len(ranked)]
+                else:
+                    # 结果很多：按墙上顺序扫描，取满即停
+                    for doc in self._order:
+                        if doc in candidates and doc not in picked:
+                            ranked.append(doc)
+                            if len(ranked) >= limit:
+                                break
+            ids = [self._doc_ids[doc] for doc in ranked]
+            version = self._version
+        return {"ids": ids, "total": len(candidates), "version": version,
+                "took_ms": round((time.perf_counter() - start) * 1000, 3)}
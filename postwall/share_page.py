@@ -0,0 +1,259 @@
+"""
+抖音分享页单遍提取器
+在字节流上用 bytes.find 查找各字段的字面量前缀，只在命中位置运行预编译正则；
+每个前缀记住已查找到的位置，新数据到达时不重复扫描。所需字段齐全后立即停止读取上游响应
+"""
+import binascii
+import json
+import re
+from urllib.parse import unquote
+
+
+READ_SIZE = 16384
+OVERLAP = 4096  # 前缀命中但值尚未读完时最多等待的字节数（签名 URL 较长）
+
+# 字段 -> (字面量前缀, 从前缀处匹配的正则)；已找到的字段不再查找
+FIELDS = {
+    "title": (b"<title>", re.compile(rb'<title>([^<]*)</title>')),
+    "src": (b'"src":"', re.compile(rb'"src":"(https?://[^"]+?)"')),
+    "cover": (b'"cover":"', re.compile(rb'"cover":"(https?://[^"]+?)"')),
+    "render": (b'<script id="RENDER_DATA" type="application/json">', None),
+}
+# "src" 紧跟在该前缀之后时按 playAddr 处理（允许 // 开头的地址，优先于普通 src 的过滤规则）
+PLAY_PREFIX = b'"playAddr":[{'
+PLAY_PATTERN = re.compile(rb'"playAddr":\[\{"src":"((?:https?:)?//[^"]+?)"')
+RENDER_CLOSE = b"</script>"
+TITLE_SUFFIX = re.compile(r" - 抖音.*")
+VIDEO_ID_PATTERN = re.compile(r"/video/(\d+)")
+
+
+def _text(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="ignore").replace(r"\u0026", "&").replace(r"\u002F", "/")
+
+
+def _unquote(raw: bytes) -> str:
+    """
+    URL 解码 RENDER_DATA
+
+    RENDER_DATA 是 encodeURIComponent 的结果，% 转义密集，urllib.parse.unquote 要在 Python 中逐段处理；
+    把 %XX 换成 quoted-printable 的 =XX 后由 C 实现的 binascii.a2b_qp 一次解码。
+    原文含 = 或存在无效转义（解码后长度不等于 原长 - 2 × 转义数）时回退到 unquote
+    """
+    if b"=" not in raw:
+        decoded = binascii.a2b_qp(raw.replace(b"%", b"="))
+        if len(decoded) == len(raw) - 2 * raw.count(b"%"):
+            return decoded.decode("utf-8", errors="replace")
+    return unquote(raw.decode("utf-8", errors="ignore"))
+
+
+def _absolute(url: str) -> str:
+    return f"https:{url}" if url.startswith("//") else url
+
+
+def _first_url(value) -> str:
+    """兼容 playAddr / play_addr / cover 的多种结构：字符串、[{src}]、{url_list: []}"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list) and value:
+        return _first_url(value[0])
+    if isinstance(value, dict):
+        for key in ("src", "url_list", "urlList", "uri"):
+            if key in value:
+                return _first_url(value[key])
+    return ""
+
+
+def _find_aweme(node, depth: int = 0):
+    """在 RENDER_DATA 中查找视频详情节点（同时带 awemeId 与 video 字段的对象）"""
+    if depth > 8:
+        return None
+    if isinstance(node, dict):
+        if ("awemeId" in node or "aweme_id" in node) and isinstance(node.get("video"), dict):
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_aweme(child, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+
+class ShareExtractor:
+    """
+    增量提取器：逐块 feed 响应体，feed 返回 True 表示字段已齐全可以停止读取
+
+    Args:
+        final_url: 重定向后的最终 URL，用于提取视频 ID
+    """
+
+    def __init__(self, final_url: str = ""):
+        self.final_url = final_url
+        self.title = ""
+        self.author = ""
+        self.cover_url = ""
+        self.real_video_url = ""
+        self.aweme_id = ""
+        self.bytes_read = 0
+        self._buffer = bytearray()
+        self._from = {field: 0 for field in FIELDS}  # 各前缀下次从缓冲区的哪个位置开始查找
+        self._render_start = None  # RENDER_DATA 内容在缓冲区中的起点（已读到开始标签时）
+        self._render_from = 0      # 结束标签下次开始查找的位置
+
+    @property
+    def done(self) -> bool:
+        return bool(self.title and self.cover_url and self.real_video_url)
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        self._buffer += chunk
+        self._scan(final=False)
+        return self.done
+
+    def finish(self):
+        """响应体读完后处理缓冲区中剩余的内容"""
+        self._scan(final=True)
+
+    def result(self) -> dict:
+        """组装与 /api/resolve_video 一致的结果字典"""
+        video_id = self.aweme_id
+        if not video_id:
+            match = VIDEO_ID_PATTERN.search(self.final_url)
+            video_id = match.group(1) if match else ""
+        return {
+            "id": video_id,
+            "title": self.title or "未命名视频",
+            "author": self.author or "未知作者",
+            "cover_url": self.cover_url,
+            "video_url": self.final_url,  # 网页链接
+            "real_video_url": self.real_video_url,  # MP4链接
+        }
+
+    def _pending(self) -> list:
+        """仍需查找的字段"""
+        found = {"title": self.title, "src": self.real_video_url, "cover": self.cover_url}
+        return [field for field in self._from if not found.get(field)]
+
+    def _find(self, field: str) -> int:
+        """前缀的下一个位置，同时记为下次查找的起点；没有时只保留可能被截断的前缀长度"""
+        prefix = FIELDS[field][0]
+        start = self._from[field]
+        hit = self._buffer.find(prefix, start)
+        self._from[field] = hit if hit >= 0 else max(start, len(self._buffer) - len(prefix) + 1)
+        return hit
+
+    def _scan(self, final: bool):
+        buffer = self._buffer
+        while not self.done:
+            if self._render_start is not None:
+                close = buffer.find(RENDER_CLOSE, self._render_from)
+                if close < 0:
+                    self._render_from = max(self._render_from, len(buffer) - len(RENDER_CLOSE) + 1)
+                    break
+                self._parse_render_data(bytes(buffer[self._render_start:close]))
+                self._render_start = None
+                end = close + len(RENDER_CLOSE)
+                for field in self._from:
+                    self._from[field] = max(self._from[field], end)
+                continue
+
+            hits = []
+            for field in self._pending():
+                hit = self._find(field)
+                if hit >= 0:
+                    hits.append((hit, field))
+            if not hits:
+                break
+            pos, field = min(hits)
+            if field == "render":
+                self._render_start = self._render_from = pos + len(FIELDS["render"][0])
+                for other in self._from:
+                    self._from[other] = max(self._from[other], self._render_start)
+                continue
+
+            if field == "src" and buffer[max(0, pos - len(PLAY_PREFIX)):pos] == PLAY_PREFIX:
+                field, match = "play", PLAY_PATTERN.match(buffer, pos - len(PLAY_PREFIX))
+            else:
+                match = FIELDS[field][1].match(buffer, pos)
+            if match is None and not final and len(buffer) - pos < OVERLAP:
+                break  # 值可能还没读完，等下一块（之后的命中同样留到下一块，保持按出现顺序处理）
+            if match is not None:
+                self._record(field, match.group(1))
+            self._from["src" if field == "play" else field] = pos + 1
+        self._trim()
+
+    def _trim(self):
+        """丢弃所有前缀都已查找过的部分（保留 playAddr 前缀的长度，供之后判断 src 是否属于 playAddr）"""
+        starts = [self._from[field] for field in self._pending()]
+        if self._render_start is not None:
+            starts.append(self._render_start)
+        cut = min(starts, default=len(self._buffer)) - len(PLAY_PREFIX)
+        if cut <= 0:
+            return
+        del self._buffer[:cut]
+        for field in self._from:
+            self._from[field] = max(0, self._from[field] - cut)
+        if self._render_start is not None:
+            self._render_start -= cut
+            self._render_from -= cut
+
+    def _record(self, field: str, raw: bytes):
+        value = _text(raw)
+        if field == "title":
+            if not self.title:
+                self.title = TITLE_SUFFIX.sub("", value).strip()
+        elif field == "cover":
+            if not self.cover_url:
+                self.cover_url = value
+        elif not self.real_video_url:
+            if field == "play":
+                self.real_video_url = _absolute(value)
+            elif ("/video/" in value or "aweme" in value) and ".mp3" not in value and "avatar" not in value:
+                self.real_video_url = value
+
+    def _parse_render_data(self, raw: bytes):
+        try:
+            data = json.loads(_unquote(raw))
+        except ValueError:
+            return
+        aweme = _find_aweme(data)
+        if aweme is None:
+            return
+        video = aweme["video"]
+        author = aweme.get("authorInfo") or aweme.get("author") or {}
+        # RENDER_DATA 中的结构化字段优先于正则结果
+        self.aweme_id = str(aweme.get("awemeId") or aweme.get("aweme_id") or "")
+        self.title = (aweme.get("desc") or self.title).strip()
+        self.author = author.get("nickname", "") if isinstance(author, dict) else ""
+        cover = _first_url(video.get("cover") or video.get("originCover") or video.get("origin_cover"))
+        if cover:
+            self.cover_url = _absolute(cover)
+        play = _first_url(video.get("playAddr") or video.get("play_addr"))
+        if play:
+            self.real_video_url = _absolute(play)
+
+
+def extract_share_page(response, final_url: str, read_size: int = READ_SIZE) -> ShareExtractor:
+    """
+    从上游响应流中提取视频信息，字段齐全后不再继续读取
+
+    Args:
+        response: 带 read(n) 方法的响应对象
+        final_url: 重定向后的最终 URL
+        read_size: 每次读取的字节数
+
+    Returns:
+        ShareExtractor（result() 得到结果，bytes_read 为实际读取字节数）
+    """
+    extractor = ShareExtractor(final_url)
+    while True:
+        chunk = response.read(read_size)
+        if not chunk:
+            extractor.finish()
+            break
+        if extractor.feed(chunk):
+            break
+    return extractor
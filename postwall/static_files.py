@@ -0,0 +1,196 @@
+"""
+静态文件服务
+为封面和前端资源计算基于内容哈希的强 ETag（按 mtime/size 缓存，文件不变时不重复计算），
+按内容哈希命名的封面 / 缩略图 / 上传图片返回一年的 immutable 缓存，其余文件每次用 ETag 重新验证；
+CSS / JS / HTML 等文本资源首次请求时压缩为 gzip（安装 brotli 模块时另有 br）并存盘，之后直接发送压缩文件
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 1024
+MIN_COMPRESS_RATIO = 0.9  # 压缩后不小于原大小 90% 时直接发送原文件
+
+
+def content_hash(f) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def available_encodings() -> tuple:
+    """可生成的压缩格式，按优先级排列"""
+    try:
+        import brotli  # noqa: F401
+        return ("br", "gzip")
+    except ImportError:
+        return ("gzip",)
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.strip())
+    return accepted
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持 * 和多个 ETag）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+
+
+class StaticFile:
+    """一次静态响应：要发送的文件（原文件或压缩文件）及响应头"""
+
+    __slots__ = ("path", "size", "etag", "last_modified", "mtime", "encoding", "cache_control", "vary")
+
+    def __init__(self, path, size, etag, mtime, encoding, cache_control, vary):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.mtime = mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.encoding = encoding
+        self.cache_control = cache_control
+        self.vary = vary
+
+
+class StaticFiles:
+    """
+    静态文件元数据缓存（线程安全）
+
+    Args:
+        cache_dir: 压缩文件存放目录，文件名为 <内容哈希>.<gz|br>
+        immutable_prefixes: 按内容哈希命名、内容永不改变的 URL 路径前缀
+        max_entries: 缓存多少个文件的哈希
+    """
+
+    def __init__(self, cache_dir, immutable_prefixes=(), max_entries: int = 50000):
+        self.cache_dir = Path(cache_dir)
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        self.max_entries = max_entries
+        self.encodings = available_encodings()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 文件路径 -> (stamp, 内容哈希, {压缩格式: (路径, 大小) 或 None})
+
+    def _entry(self, fs_path: str, st: os.stat_result):
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            entry = self._entries.get(fs_path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(fs_path)
+                return entry
+        with open(fs_path, "rb") as f:
+            entry = (stamp, content_hash(f), {})
+        with self._lock:
+            self._entries[fs_path] = entry
+            self._entries.move_to_end(fs_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _variant(self, fs_path: str, entry, encoding: str):
+        """压缩文件 (路径, 大小)，不值得压缩时为 None；首次请求时生成"""
+        variants = entry[2]
+        if encoding in variants:
+            return variants[encoding]
+        digest = entry[1]
+        path = self.cache_dir / digest[:2] / f"{digest}.{'br' if encoding == 'br' else 'gz'}"
+        try:
+            variant = (path, path.stat().st_size)
+        except FileNotFoundError:
+            source = Path(fs_path).read_bytes()
+            if bytes_hash(source) != digest:
+                return None  # 文件在计算哈希后被修改，下次请求重新计算
+            data = compress(source, encoding)
+            variant = None
+            if len(data) < len(source) * MIN_COMPRESS_RATIO:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                variant = (path, len(data))
+        variants[encoding] = variant
+        return variant
+
+    def lookup(self, fs_path: str, url_path: str, content_type: str, accept_encoding: str = ""):
+        """
+        查找要发送的文件；不存在或不是普通文件时返回 None
+
+        Returns:
+            StaticFile
+        """
+        try:
+            st = os.stat(fs_path)
+        except OSError:
+            return None
+        if not os.path.isfile(fs_path):
+            return None
+        stamp, digest, _ = entry = self._entry(fs_path, st)
+        immutable = url_path.startswith(self.immutable_prefixes)
+        cache_control = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES) and stamp[1] >= MIN_COMPRESS_SIZE
+        if compressible:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding in self.encodings:
+                if encoding not in accepted:
+                    continue
+                variant = self._variant(fs_path, entry, encoding)
+                if variant is not None:
+                    # 不同编码是不同的表示，强 ETag 也要不同
+                    return StaticFile(variant[0], variant[1], f'"{digest}-{encoding}"', st.st_mtime,
+                                      encoding, cache_control, "Accept-Encoding")
+        return StaticFile(Path(fs_path), stamp[1], f'"{digest}"', st.st_mtime, None, cache_control,
+                          "Accept-Encoding" if compressible else None)
+
+    def precompress(self, root, suffixes=(".css", ".js", ".html", ".json", ".svg")) -> int:
+        """预先生成 root 下文本资源的压缩文件（服务器启动时在后台调用），返回处理的文件数"""
+        count = 0
+        for path in Path(root).rglob("*"):
+            if path.suffix not in suffixes or not path.is_file():
+                continue
+            st = path.stat()
+            if st.st_size < MIN_COMPRESS_SIZE:
+                continue
+            entry = self._entry(str(path), st)
+            for encoding in self.encodings:
+                self._variant(str(path), entry, encoding)
+            count += 1
+        return count
@@ -0,0 +1,140 @@
+"""
+封面缩略图与布局信息生成
+按宽度档位为每张封面生成 AVIF/WebP 缩略图和 JPEG 兜底，供前端 <picture> + srcset 按需选择；
+同时记录原图尺寸、宽高比和主色调，前端据此在图片加载前就能确定卡片大小并显示占位色。
+缩略图以原图内容哈希命名，封面未变化时跳过，解码 / 编码在进程池中并行（需要 Pillow）
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+
+THUMB_WIDTHS = (280, 560, 840)  # 与前端 --column-width 280px 的 1x/2x/3x 对应
+THUMB_QUALITY = {"avif": 50, "webp": 75, "jpg": 80}
+
+
+def available_formats() -> tuple:
+    """当前 Pillow 支持的输出格式（AVIF 需要较新的 Pillow），JPEG 始终作为兜底"""
+    from PIL import features
+    formats = []
+    if features.check("avif"):
+        formats.append("avif")
+    if features.check("webp"):
+        formats.append("webp")
+    formats.append("jpg")
+    return tuple(formats)
+
+
+def thumb_widths(width: int, widths=THUMB_WIDTHS) -> list:
+    """不放大：只保留小于原图的档位；原图比最小档还窄时保留原宽"""
+    return [w for w in widths if w < width] or [width]
+
+
+def dominant_color(image) -> str:
+    """缩小后做 4 色中位切分量化，取像素最多的颜色，返回 #rrggbb"""
+    from PIL import Image
+
+    small = image.resize((16, 16), Image.BOX).quantize(colors=4, method=Image.Quantize.MEDIANCUT)
+    count, index = max(small.getcolors())
+    r, g, b = small.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def render_thumbnails(source: str, out_dir: str, widths=THUMB_WIDTHS, formats=("webp", "jpg")) -> dict:
+    """
+    生成一张封面的全部缩略图（在工作进程中运行，参数与返回值均可 pickle）
+
+    Returns:
+        {"width", "height", "placeholder", "sizes": [[w, h], ...]}
+    """
+    from PIL import Image
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        width, height = image.size
+        sizes = []
+        for w in thumb_widths(width, widths):
+            h = max(1, round(height * w / width))
+            resized = image if w == width else image.resize((w, h), Image.LANCZOS)
+            for fmt in formats:
+                target = out_dir / f"{w}.{fmt}"
+                tmp = out_dir / f".{w}.{fmt}.{os.getpid()}.tmp"
+                resized.save(tmp, format="JPEG" if fmt == "jpg" else fmt.upper(),
+                             quality=THUMB_QUALITY[fmt], **({"optimize": True} if fmt == "jpg" else {}))
+                os.replace(tmp, target)
+            sizes.append([w, h])
+        placeholder = dominant_color(image)
+    return {"width": width, "height": height, "placeholder": placeholder, "sizes": sizes}
+
+
+def thumbs_complete(thumbs: dict, base_dir) -> bool:
+    """metadata 中记录的缩略图文件是否都还在"""
+    folder = Path(base_dir) / thumbs["dir"]
+    return all((folder / f"{w}.{fmt}").exists() for w, _ in thumbs["sizes"] for fmt in thumbs["formats"])
+
+
+def build_thumbnails(covers: list, store, base_dir, workers: int = None, widths=THUMB_WIDTHS) -> dict:
+    """
+    为已入库的封面生成缩略图，并把尺寸写入封面元数据
+
+    写入字段：width / height（原图尺寸）、aspect（宽 / 高）、placeholder（主色调 #rrggbb）、
+    thumbs = {"hash", "dir", "formats", "sizes"}。thumbs.hash 与当前封面哈希一致且文件齐全时跳过。
+
+    Args:
+        covers: 封面元数据列表（原地更新）
+        store: CoverStore
+        base_dir: local_cover / thumbs.dir 的相对基准目录（项目目录）
+        workers: 进程数，默认 CPU 核数
+
+    Returns:
+        {"generated", "skipped", "failed"}
+    """
+    formats = available_formats()
+    thumbs_root = store.thumbs_dir
+    result = {"generated": 0, "skipped": 0, "failed": 0}
+
+    pending = {}  # 封面哈希 -> 使用该封面的元数据列表（相同图片只处理一次）
+    for cover in covers:
+        entry = store.index.get(cover.get("id"))
+        source = store.path(cover.get("id")) if entry else None
+        if not source:
+            continue
+        thumbs = cover.get("thumbs")
+        if (thumbs and thumbs.get("hash") == entry["hash"] and list(thumbs.get("formats", [])) == list(formats)
+                and cover.get("placeholder") and thumbs_complete(thumbs, base_dir)):
+            result["skipped"] += 1
+            continue
+        pending.setdefault(entry["hash"], (source, []))[1].append(cover)
+
+    if not pending:
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_thumbnails, str(source), str(thumbs_root / digest), widths, formats): digest
+            for digest, (source, _) in pending.items()
+        }
+        for future in as_completed(futures):
+            digest = futures[future]
+            group = pending[digest][1]
+            try:
+                info = future.result()
+            except Exception:
+                result["failed"] += len(group)
+                continue
+            thumbs = {
+                "hash": digest,
+                "dir": (thumbs_root / digest).relative_to(Path(base_dir)).as_posix(),
+                "formats": list(formats),
+                "sizes": info["sizes"],
+            }
+            for cover in group:
+                cover["width"] = info["width"]
+                cover["height"] = info["height"]
+                cover["aspect"] = round(info["width"] / info["height"], 4)
+                cover["placeholder"] = info["placeholder"]
+                cover["thumbs"] = thumbs
+            result["generated"] += len(group)
+    return result
@@ -0,0 +1,208 @@
+"""
+上游连接池
+按 host 复用 keep-alive 连接，视频拖动产生的大量 Range 请求不必每次重新握手
+"""
+import http.client
+import threading
+import time
+import urllib.error
+from urllib.parse import urljoin, urlsplit
+
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class PooledResponse:
+    """
+    上游响应包装，用法与 urlopen 返回值一致（status / headers / read / geturl）
+
+    关闭时若响应体已读完且连接仍可用，连接归还连接池，否则丢弃。
+    """
+
+    def __init__(self, pool, key, conn, response, url):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self._closed = False
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.url = url
+
+    def read(self, amt: int = None) -> bytes:
+        return self._response.read(amt)
+
+    def readinto(self, buffer) -> int:
+        return self._response.readinto(buffer)
+
+    def geturl(self) -> str:
+        return self.url
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # 响应未读完（如客户端中途拖动进度条）时连接处于不确定状态，不能复用
+        reusable = self._response.isclosed() and self._conn.sock is not None
+        if not reusable:
+            self._response.close()
+            self._conn.close()
+        self._pool._release(self._key, self._conn if reusable else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class UpstreamPool:
+    """
+    按 (scheme, host, port) 分组的 HTTP 连接池
+
+    Args:
+        max_per_host: 每个 host 同时使用的最大连接数
+        idle_timeout: 空闲连接保留秒数，超时即关闭
+        timeout: 连接 / 读取超时秒数
+        max_redirects: 最多跟随的重定向次数
+    """
+
+    def __init__(self, max_per_host: int = 8, idle_timeout: float = 30.0,
+                 timeout: float = 10.0, max_redirects: int = 5):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._lock = threading.Lock()
+        self._idle = {}   # key -> [(conn, last_used), ...]
+        self._slots = {}  # key -> BoundedSemaphore
+        self._stats = {
+            "requests": 0,
+            "hits": 0,          # 复用了空闲连接
+            "misses": 0,        # 新建连接
+            "evicted": 0,       # 因空闲超时被关闭
+            "stale_retries": 0, # 复用连接已被对端关闭而重试
+            "handshake_seconds": 0.0,
+        }
+
+    def stats(self) -> dict:
+        """连接池计数器快照"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle_connections"] = sum(len(conns) for conns in self._idle.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["handshake_seconds"] = round(stats["handshake_seconds"], 4)
+        return stats
+
+    def request(self, method: str, url: str, headers: dict = None) -> PooledResponse:
+        """
+        发送请求并返回响应，自动跟随重定向
+
+        Raises:
+            urllib.error.HTTPError: 上游返回 4xx/5xx
+            urllib.error.URLError: 连接失败或连接池耗尽
+        """
+        headers = dict(headers or {})
+        headers.pop("Connection", None)  # HTTP/1.1 默认 keep-alive
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise urllib.error.URLError(f"unsupported scheme: {parts.scheme}")
+            key = (parts.scheme, parts.hostname, parts.port)
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+            response = self._send(key, method, target, headers, url)
+            if response.status in REDIRECT_CODES and response.headers.get("Location"):
+                response.read()
+                response.close()
+                url = urljoin(url, response.headers["Location"])
+                continue
+            if response.status >= 400:
+                response.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return response
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+    def evict_idle(self):
+        """关闭所有超过 idle_timeout 的空闲连接"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, conns in self._idle.items():
+                alive = [(c, t) for c, t in conns if now - t < self.idle_timeout]
+                expired.extend(c for c, t in conns if now - t >= self.idle_timeout)
+                self._idle[key] = alive
+            self._stats["evicted"] += len(expired)
+        for conn in expired:
+            conn.close()
+
+    def close(self):
+        """关闭全部空闲连接"""
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c, _ in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def _send(self, key, method, target, headers, url) -> PooledResponse:
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                conn.request(method, target, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine):
+                if not reused:
+                    raise
+                # 空闲连接已被 CDN 关闭，换新连接重试一次
+                conn.close()
+                with self._lock:
+                    self._stats["stale_retries"] += 1
+                conn = self._connect(key)
+                conn.request(method, target, headers=headers)
+                response = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            self._release(key, None)
+            raise urllib.error.URLError(e) from e
+        return PooledResponse(self, key, conn, response, url)
+
+    def _acquire(self, key):
+        with self._lock:
+            self._stats["requests"] += 1
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+        if not slot.acquire(timeout=self.timeout):
+            raise urllib.error.URLError(f"upstream pool exhausted for {key[1]}")
+
+        self.evict_idle()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn, _ = idle.pop()
+                self._stats["hits"] += 1
+                return conn, True
+        try:
+            return self._connect(key), False
+        except OSError as e:
+            slot.release()
+            raise urllib.error.URLError(e) from e
+
+    def _connect(self, key):
+        scheme, host, port = key
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conn_class(host, port, timeout=self.timeout)
+        start = time.perf_counter()
+        conn.connect()  # TCP (+TLS) 握手，单独计时
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats["handshake_seconds"] += time.perf_counter() - start
+        return conn
+
+    def _release(self, key, conn):
+        if conn is not None:
+            with self._lock:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+        self._slots[key].release()
@@ -9,23 +9,90 @@ import asyncio
 import webbrowser
 import subprocess
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from threading import Thread
+from http.server import SimpleHTTPRequestHandler
+from threading import Thread, Lock
+from functools import partial
 import time
 import re
 
+from postwall.http_server import PooledHTTPServer
+from postwall.upstream import UpstreamPool
+from postwall.range_cache import VideoRangeCache, parse_range
+from postwall.resolve_cache import ResolveCache
+from postwall.share_page import extract_share_page
+from postwall.batch_resolve import extract_share_urls, resolve_batch
+from postwall.scrape_state import ScrapeProgress
+from postwall.scrape_capture import FavoritesCapture
+from postwall.scroll_scheduler import ScrollScheduler
+from postwall.cover_download import FailureManifest, download_batch
+from postwall.cover_store import CoverStore, decode_data_url
+from postwall.thumbnails import build_thumbnails
+from postwall.metadata_api import MetadataView, parse_fields, DEFAULT_LIMIT
+from postwall.metadata_store import StaleVersionError
+from postwall.repository import open_repository, load_covers
+from postwall.search_index import SearchIndex
+from postwall.frame_extract import FrameExtractor, FrameError
+from postwall.static_files import StaticFiles, etag_matches, not_modified_since
+
 
 # 项目路径
 PROJECT_DIR = Path(__file__).parent.resolve()
 DATA_DIR = PROJECT_DIR / "data"
 COVERS_DIR = DATA_DIR / "covers"
+UPLOADS_DIR = DATA_DIR / "uploads"  # 头像、背景等非封面图片，与封面同样按内容哈希存储
 METADATA_PATH = DATA_DIR / "metadata.json"
+VIDEO_CACHE_DIR = DATA_DIR / "video_cache"
+FRAME_CACHE_DIR = DATA_DIR / "frames"
+STATIC_CACHE_DIR = DATA_DIR / "static_cache"  # 前端资源的 gzip / br 压缩文件
+RESOLVE_CACHE_PATH = DATA_DIR / "resolve_cache.json"
+CHECKPOINT_PATH = DATA_DIR / "scrape_checkpoint.json"
+SCRAPE_METRICS_PATH = DATA_DIR / "scrape_metrics.json"
+COVER_FAILURES_PATH = DATA_DIR / "cover_failures.json"
 
 # 配置
 MAX_ITEMS = 2000  # 最大采集数量
 CONCURRENCY = 10  # 并发下载数
+COVER_RETRIES = 3  # 封面下载遇到 429/5xx/网络错误时的最大重试次数
+THUMB_WORKERS = None  # 缩略图生成进程数，None 为 CPU 核数
+CHECKPOINT_EVERY = 50  # 采集时每新增多少个视频写一次断点
+INCREMENTAL_STOP_AFTER = 30  # 增量模式下连续遇到多少个已知视频后停止
+SCRAPE_MODE = "capture"  # capture: 监听收藏接口响应；dom: 解析页面元素
+SCROLL_MIN_WAIT = 0.2  # 滚动后等待新内容的下限（秒），实际等待按加载耗时自适应
+SCROLL_MAX_WAIT = 8.0  # 滚动后等待新内容的上限（秒）
+SCROLL_STABLE_ROUNDS = 2  # 连续多少轮无新数据且页面高度不变时停止
 SERVER_PORT = 5000
+SERVER_WORKERS = 32  # 服务器工作线程数（同时处理的连接上限）
+UPSTREAM_MAX_PER_HOST = 8  # 到同一 CDN host 的最大连接数
+UPSTREAM_IDLE_TIMEOUT = 30  # 上游空闲连接保留秒数
+BATCH_RESOLVE_WORKERS = 6  # 批量导入链接时的并发解析数
+UPLOAD_MAX_BYTES = 16 << 20  # 上传图片（截帧封面、头像、背景）的大小上限
+UPLOAD_SLOTS = ("avatar", "background")  # 可上传的 Hero 图片
+METADATA_BACKEND = "json"  # 元数据存储：json（metadata.json + 操作日志）或 sqlite（data/metadata.db）
+METADATA_COMPACT_EVERY = 200  # json 后端的操作日志累计多少次提交后压缩为 metadata.json 快照
+FFMPEG_BINARY = "ffmpeg"  # 服务端截帧使用的 ffmpeg（可选，未安装时前端回退到浏览器内截帧）
+FRAME_WORKERS = 4  # 同时运行的截帧 ffmpeg 进程数
+FRAME_STRIP_MAX = 24  # 缩略图条最多帧数
+FRAME_SOURCE_WORKERS = FRAME_WORKERS * 2  # ffmpeg 读取视频的本机代理工作线程数（seek 时每个进程可能同时占用两个连接）
+# 按内容哈希命名的文件，浏览器可以永久缓存、无需重新验证
+IMMUTABLE_PATHS = ("/data/covers/blobs/", "/data/covers/thumbs/", "/data/uploads/blobs/")
+
+VIDEO_CACHE_MAX_BYTES = 2 << 30  # 视频磁盘缓存上限 2GB
+VIDEO_CACHE_CHUNK = 1 << 20  # 视频缓存 chunk 大小 1MB
+
+# 视频代理共用的上游 keep-alive 连接池
+UPSTREAM_POOL = UpstreamPool(max_per_host=UPSTREAM_MAX_PER_HOST, idle_timeout=UPSTREAM_IDLE_TIMEOUT)
+# 服务器中多个线程写封面索引时串行化（每次重新读取 index.json，避免覆盖采集进程的写入）
+_cover_store_lock = Lock()
+# 元数据仓库（首次访问时按 METADATA_BACKEND 打开）
+_metadata_store = None
+_metadata_store_lock = Lock()
+# 视频 Range 磁盘缓存（首次代理视频时创建）
+_video_cache = None
+_video_cache_lock = Lock()
+# 服务端截帧（首次请求截帧时创建）
+_frame_extractor = None
+_frame_extractor_lock = Lock()
+_frame_source_server = None
 
 
 def check_dependencies():
@@ -36,20 +103,277 @@ def check_dependencies():
         import aiofiles
         import pyperclip
         import pygetwindow as gw
+        import PIL
         print("✅ 依赖检查通过")
         return True
     except ImportError as e:
         print(f"❌ 缺少依赖: {e}")
         print("🔧 正在安装依赖...")
         subprocess.run([sys.executable, "-m", "pip", "install", 
-                       "playwright", "aiohttp", "aiofiles", "pyperclip", "pygetwindow", "-q"])
+                       "playwright", "aiohttp", "aiofiles", "pyperclip", "pygetwindow", "Pillow", "-q"])
         subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"])
         return True
 
 
-async def login_and_scrape_favorites():
+async def probe_scroll_state(page) -> dict:
+    """轻量探测页面状态：视频链接数、滚动高度、列表末尾是否出现"没有更多"提示"""
+    return await page.evaluate('''() => {
+        // 收藏列表在内部滚动容器中时，取鼠标位置处可滚动祖先的高度
+        let el = document.elementFromPoint(500, 400);
+        while (el && el !== document.body && el.scrollHeight <= el.clientHeight + 1) el = el.parentElement;
+        // 只检查列表末尾的提示元素（不含视频链接的短文本），标题中含"没有更多"的视频不会误判，也不必序列化整个 DOM
+        const isEndHint = (node) => {
+            const text = node.textContent;
+            return text.length < 40 && (text.includes('没有更多') || text.includes('到底了'))
+                && !node.closest('a[href*="/video/"]') && !node.querySelector('a[href*="/video/"]');
+        };
+        let noMore = false;
+        let tail = el || document.body;
+        for (let depth = 0; tail && depth < 4 && !noMore; depth++) {
+            let node = tail.lastElementChild;
+            for (let i = 0; node && i < 3 && !noMore; i++, node = node.previousElementSibling) noMore = isEndHint(node);
+            tail = tail.lastElementChild;
+        }
+        return {
+            // 增量提取已安装时直接读取新增链接计数，避免每次轮询都全量查询
+            count: window.__postwallDelta ? window.__postwallDelta.added : document.querySelectorAll('a[href*="/video/"]').length,
+            height: Math.max(document.documentElement.scrollHeight, el ? el.scrollHeight : 0),
+            no_more: noMore
+        };
+    }''')
+
+
+def new_scroll_scheduler() -> ScrollScheduler:
+    return ScrollScheduler(min_wait=SCROLL_MIN_WAIT, max_wait=SCROLL_MAX_WAIT, stable_rounds=SCROLL_STABLE_ROUNDS)
+
+
+STOP_REASONS = {
+    "no_more": "检测到'没有更多'，已加载所有收藏",
+    "stable": "页面高度不再变化，已加载所有收藏",
+    "idle": "多次等待均无新数据，停止滚动",
+}
+
+
+def report_scroll_metrics(scheduler: ScrollScheduler):
+    """打印滚动耗时汇总，并保存每轮指标供调参"""
+    summary = scheduler.summary()
+    avg = summary["avg_load_time"]
+    print(f"   ⏱️  滚动 {summary['iterations']} 轮, 总等待 {summary['total_wait']:.1f}s"
+          f" (平均加载 {avg if avg is not None else '-'}s, 无新数据等待 {summary['idle_wait']:.1f}s)")
+    try:
+        SCRAPE_METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(SCRAPE_METRICS_PATH, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "iterations": scheduler.metrics}, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+async def scrape_by_dom(page, progress: ScrapeProgress, scheduler: ScrollScheduler = None):
+    """
+    DOM 模式：每次滚动后用 page.evaluate 从页面元素中提取视频
+
+    滚动后轮询页面直到出现新视频，等待上限由 ScrollScheduler 按实测加载耗时自适应调整。
+
+    Args:
+        page: 已打开收藏页的 Playwright 页面
+        progress: 采集进度（结果写入 progress.videos）
+        scheduler: 滚动调度器，None 时新建
+    """
+    all_videos = progress.videos
+    scheduler = scheduler or new_scroll_scheduler()
+    scroll_count = 0
+    elapsed = 0.0
+    state = None
+    # 先将鼠标移到页面中央，滚轮事件才会作用到收藏列表
+    await page.mouse.move(500, 400)
+    
+    while True:
+        try:
+            # 增量提取：页面内用 MutationObserver 收集新插入的视频链接，只返回上次之后新出现的视频，
+            # 每轮的 evaluate 往返与页面扫描都只与新增数量相关，不再随收藏总数增长
+            videos_data = await page.evaluate('''() => {
+                const SELECTOR = 'a[href*="/video/"]';
+                let delta = window.__postwallDelta;
+                if (!delta) {
+                    // reported: 已返回给 Python 的视频 ID；pending: 待提取的链接元素；added: 新增链接计数（供 probe 使用）
+                    delta = window.__postwallDelta = { reported: new Set(), pending: new Set(), added: 0 };
+                    const collect = node => {
+                        if (node.nodeType !== 1) return;
+                        if (node.matches(SELECTOR)) { delta.pending.add(node); delta.added++; }
+                        node.querySelectorAll(SELECTOR).forEach(link => { delta.pending.add(link); delta.added++; });
+                    };
+                    collect(document.body);
+                    // 虚拟列表会复用节点只改 href，所以同时监听 href 属性变化
+                    new MutationObserver(records => {
+                        for (const record of records) {
+                            if (record.type === 'attributes') collect(record.target);
+                            else record.addedNodes.forEach(collect);
+                        }
+                    }).observe(document.body, { childList: true, subtree: true, attributes: true, attributeFilter: ['href'] });
+                }
+                
+                const videos = [];
+                
+                // 策略1: 只处理新出现的视频链接
+                for (const link of delta.pending) {
+                    const videoId = link.href.match(/\\/video\\/([\\d]+)/)?.[1];
+                    if (!videoId || delta.reported.has(videoId) || !link.isConnected) {
+                        delta.pending.delete(link);
+                        continue;
+                    }
+                    
+                    // 在链接内或附近找封面图
+                    const container = link.closest('li, div[class], article') || link;
+                    const img = container.querySelector('img[src*="douyinpic"], img[src*="bytedance"], img[src*="tiktokcdn"]') 
+                             || container.querySelector('img')
+                             || link.querySelector('img');
+                    
+                    // 封面尚未懒加载的链接留在 pending 中，下一轮再试
+                    if (img && img.src && !img.src.includes('avatar')) {
+                        videos.push({
+                            id: videoId,
+                            cover_url: img.src,
+                            title: img.alt || container.textContent?.slice(0, 50) || '无标题',
+                            video_url: link.href
+                        });
+                        delta.reported.add(videoId);
+                        delta.pending.delete(link);
+                    }
+                }
+                
+                // 策略2: 如果策略1从未找到视频，尝试找所有可能是封面的图片（全量扫描，按 reported 去重）
+                if (videos.length === 0 && delta.reported.size === 0) {
+                    const seen = new Set();
+                    document.querySelectorAll('img').forEach((img, idx) => {
+                        // 只要是抖音CDN的图片且尺寸合理
+                        if (img.src && 
+                            (img.src.includes('douyinpic') || img.src.includes('bytedance') || img.src.includes('tiktokcdn')) &&
+                            !img.src.includes('avatar') &&
+                            img.width > 50 && img.height > 50) {
+                            
+                            const container = img.closest('a, li, div[class]');
+                            const link = container?.querySelector('a[href*="/video/"]') || container?.closest('a[href*="/video/"]');
+                            const videoId = link?.href?.match(/\\/video\\/([\\d]+)/)?.[1] || `img_${idx}`;
+                            
+                            if (!seen.has(videoId)) {
+                                seen.add(videoId);
+                                videos.push({
+                                    id: videoId,
+                                    cover_url: img.src,
+                                    title: img.alt || '无标题',
+                                    video_url: link?.href || ''
+                                });
+                            }
+                        }
+                    });
+                }
+                
+                return videos;
+            }''')
+            
+            # 每轮都要调用（即使没有新视频），progress.last_seen 才会反映本轮的新增数量；
+            # ID 索引由 ScrapeProgress 跨轮次保留，满 CHECKPOINT_EVERY 个自动写断点
+            progress.add(videos_data or [])
+            
+            stop = None
+            if scroll_count:
+                stop = scheduler.record(progress.last_seen, elapsed, state["height"], state["no_more"])
+            print(f"\r   📥 已获取 {len(all_videos)} 个视频 (滚动 {scroll_count} 次, "
+                  f"本轮等待 {elapsed:.2f}s, 下轮上限 {scheduler.budget:.2f}s)...", end="", flush=True)
+            
+            if progress.reached_known:
+                print()
+                print(f"   📋 已追上上次采集的数据，新增 {len(all_videos)} 个视频")
+                break
+            if stop:
+                print()
+                print(f"   📋 {STOP_REASONS[stop]}")
+                break
+            if len(all_videos) >= MAX_ITEMS:
+                print()
+                break
+            
+            # 使用鼠标滚轮模拟真实用户滚动（触发虚拟滚动加载），随后等待新内容出现
+            before = await probe_scroll_state(page)
+            for _ in range(5):
+                await page.mouse.wheel(0, 800)  # 垂直滚动 800 像素
+            scroll_count += 1
+            state, elapsed = await scheduler.wait_for_change(partial(probe_scroll_state, page), before)
+            
+        except Exception as e:
+            print(f"   ⚠️ 抓取出错: {e}")
+            import traceback
+            traceback.print_exc()
+            break
+
+
+async def scrape_by_capture(page, capture: FavoritesCapture, progress: ScrapeProgress,
+                            scheduler: ScrollScheduler = None) -> bool:
+    """
+    接口模式：监听收藏接口的 JSON 响应，每到达一页就滚动触发下一页，不再固定等待
+
+    Args:
+        page: 已打开收藏页的 Playwright 页面（需已注册 capture.on_response）
+        progress: 采集进度（结果写入 progress.videos）
+        scheduler: 滚动调度器（决定每次等待响应的上限），None 时新建
+
+    Returns:
+        是否捕获到过接口响应（False 时调用方应回退到 DOM 模式）
+    """
+    all_videos = progress.videos
+    scheduler = scheduler or new_scroll_scheduler()
+    await page.mouse.move(500, 400)
+    
+    while len(all_videos) < MAX_ITEMS:
+        # 队列中已有响应（如登录等待期间加载的第一页）直接处理，否则滚动触发下一页
+        scrolled = capture.queue.empty()
+        if scrolled:
+            for _ in range(5):
+                await page.mouse.wheel(0, 800)
+        
+        started = time.perf_counter()
+        try:
+            aweme_list = await capture.next_page(timeout=scheduler.budget)
+            progress.add(extract_cover_data(aweme_list))
+            new_items = progress.last_seen
+        except asyncio.TimeoutError:
+            new_items = 0
+        elapsed = time.perf_counter() - started
+        
+        no_more = not capture.has_more and capture.queue.empty()
+        stop = "no_more" if no_more else None
+        # 只有滚动后等到的响应才反映加载耗时，已排队的响应不计入
+        if scrolled:
+            # has_more=0 来自接口，本轮有新数据也可以直接停止
+            stop = scheduler.record(new_items, elapsed, no_more=no_more) or stop
+        if not capture.pages and scheduler.idle_rounds >= 2:
+            break  # 一直没有接口响应，交给调用方回退
+        print(f"\r   📥 已获取 {len(all_videos)} 个视频 (接口 {capture.pages} 页, "
+              f"本轮等待 {elapsed:.2f}s, 下轮上限 {scheduler.budget:.2f}s)...", end="", flush=True)
+        
+        if progress.reached_known:
+            print()
+            print(f"   📋 已追上上次采集的数据，新增 {len(all_videos)} 个视频")
+            break
+        if stop:
+            print()
+            print(f"   📋 {'接口返回 has_more=0，已加载所有收藏' if stop == 'no_more' else STOP_REASONS[stop]}")
+            break
+    
+    return capture.pages > 0
+
+
+async def login_and_scrape_favorites(incremental: bool = False, mode: str = SCRAPE_MODE):
     """
     使用 Playwright 登录并直接从页面抓取收藏夹数据
+
+    Args:
+        incremental: 增量模式，只采集 metadata.json 中没有的新收藏，
+                     连续遇到 INCREMENTAL_STOP_AFTER 个已知视频即停止滚动
+        mode: capture 监听收藏接口响应（未捕获到时自动回退），dom 解析页面元素
+
+    Returns:
+        视频列表（增量模式下只含新视频）
     """
     from playwright.async_api import async_playwright
     
@@ -66,6 +390,11 @@ async def login_and_scrape_favorites():
         context = await browser.new_context()
         page = await context.new_page()
         
+        # 在打开页面前注册监听，登录后首屏加载的收藏接口响应也会被捕获
+        capture = FavoritesCapture()
+        if mode == "capture":
+            page.on("response", capture.on_response)
+        
         # 打开抖音收藏页面
         await page.goto("https://www.douyin.com/user/self?showTab=favorite_collection")
         
@@ -94,127 +423,34 @@ async def login_and_scrape_favorites():
         # 等待页面完全加载
         await asyncio.sleep(3)
         
-        all_videos = []
-        last_count = 0
-        no_new_count = 0
-        scroll_count = 0
+        known_ids = {c.get('id') for c in load_metadata()} if incremental else ()
+        progress = ScrapeProgress(
+            known_ids=known_ids,
+            checkpoint_path=CHECKPOINT_PATH,
+            checkpoint_every=CHECKPOINT_EVERY,
+            stop_after_known=INCREMENTAL_STOP_AFTER if incremental else None,
+        )
+        resumed = progress.resume()
+        if resumed:
+            print(f"   ♻️  从断点恢复 {resumed} 个视频，将快速滚过已采集部分")
+        if incremental:
+            print(f"   📌 增量模式：已有 {len(known_ids)} 个视频，遇到连续 {INCREMENTAL_STOP_AFTER} 个已知视频即停止")
         
-        while len(all_videos) < MAX_ITEMS:
-            try:
-                # 使用更宽泛的选择器从页面获取视频数据
-                videos_data = await page.evaluate('''() => {
-                    const videos = [];
-                    const seen = new Set();
-                    
-                    // 策略1: 查找所有带有视频链接的 a 标签
-                    document.querySelectorAll('a[href*="/video/"]').forEach(link => {
-                        const videoId = link.href.match(/\\/video\\/([\\d]+)/)?.[1];
-                        if (!videoId || seen.has(videoId)) return;
-                        seen.add(videoId);
-                        
-                        // 在链接内或附近找封面图
-                        const container = link.closest('li, div[class], article') || link;
-                        const img = container.querySelector('img[src*="douyinpic"], img[src*="bytedance"], img[src*="tiktokcdn"]') 
-                                 || container.querySelector('img')
-                                 || link.querySelector('img');
-                        
-                        if (img && img.src && !img.src.includes('avatar')) {
-                            videos.push({
-                                id: videoId,
-                                cover_url: img.src,
-                                title: img.alt || container.textContent?.slice(0, 50) || '无标题',
-                                video_url: link.href
-                            });
-                        }
-                    });
-                    
-                    // 策略2: 如果策略1没找到，尝试找所有可能是封面的图片
-                    if (videos.length === 0) {
-                        document.querySelectorAll('img').forEach((img, idx) => {
-                            // 只要是抖音CDN的图片且尺寸合理
-                            if (img.src && 
-                                (img.src.includes('douyinpic') || img.src.includes('bytedance') || img.src.includes('tiktokcdn')) &&
-                                !img.src.includes('avatar') &&
-                                img.width > 50 && img.height > 50) {
-                                
-                                const container = img.closest('a, li, div[class]');
-                                const link = container?.querySelector('a[href*="/video/"]') || container?.closest('a[href*="/video/"]');
-                                const videoId = link?.href?.match(/\\/video\\/([\\d]+)/)?.[1] || `img_${idx}`;
-                                
-                                if (!seen.has(videoId)) {
-                                    seen.add(videoId);
-                                    videos.push({
-                                        id: videoId,
-                                        cover_url: img.src,
-                                        title: img.alt || '无标题',
-                                        video_url: link?.href || ''
-                                    });
-                                }
-                            }
-                        });
-                    }
-                    
-                    return videos;
-                }''')
-                
-                if videos_data and len(videos_data) > 0:
-                    # 去重添加
-                    existing_ids = {v.get('id') for v in all_videos}
-                    new_count = 0
-                    for video in videos_data:
-                        if video.get('id') and video.get('id') not in existing_ids:
-                            all_videos.append(video)
-                            existing_ids.add(video.get('id'))
-                            new_count += 1
-                    
-                    if new_count > 0:
-                        no_new_count = 0
-                
-                scroll_count += 1
-                print(f"\r   📥 已获取 {len(all_videos)} 个视频 (滚动 {scroll_count} 次)...", end="", flush=True)
-                
-                # 检查是否有新数据
-                if len(all_videos) == last_count:
-                    no_new_count += 1
-                    # 需要更多次无新数据才停止（给页面更多加载时间）
-                    if no_new_count >= 15:
-                        print()  # 换行
-                        debug_info = await page.evaluate('''() => {
-                            return {
-                                allImages: document.querySelectorAll('img').length,
-                                douyinImages: document.querySelectorAll('img[src*="douyinpic"], img[src*="bytedance"]').length,
-                                videoLinks: document.querySelectorAll('a[href*="/video/"]').length,
-                                url: window.location.href,
-                                scrollHeight: document.body.scrollHeight,
-                                noMore: document.body.innerText.includes('没有更多') || document.body.innerText.includes('到底了')
-                            };
-                        }''')
-                        print(f"   🔍 调试: {debug_info['videoLinks']} 个视频链接, 页面高度 {debug_info['scrollHeight']}px")
-                        if debug_info.get('noMore'):
-                            print("   📋 检测到'没有更多'提示，已加载所有收藏")
-                        else:
-                            print("   📋 连续15次无新数据，停止滚动")
-                        break
-                else:
-                    no_new_count = 0
-                    last_count = len(all_videos)
-                
-                # 使用鼠标滚轮模拟真实用户滚动（触发虚拟滚动加载）
-                # 先将鼠标移到页面中央
-                await page.mouse.move(500, 400)
-                # 模拟多次滚轮滚动
-                for _ in range(5):
-                    await page.mouse.wheel(0, 800)  # 垂直滚动 800 像素
-                    await asyncio.sleep(0.3)
-                
-                await asyncio.sleep(1.5)  # 给页面时间加载新内容
-                
-            except Exception as e:
-                print(f"   ⚠️ 抓取出错: {e}")
-                import traceback
-                traceback.print_exc()
-                break
+        # 优先监听收藏接口的 JSON 响应；没有捕获到接口数据时回退到 DOM 模式
+        scheduler = new_scroll_scheduler()
+        if mode == "capture":
+            captured = await scrape_by_capture(page, capture, progress, scheduler)
+            if not captured:
+                print("   ⚠️ 未捕获到收藏接口响应，改用 DOM 模式")
+                mode = "dom"
+                scheduler = new_scroll_scheduler()
+        if mode == "dom":
+            await scrape_by_dom(page, progress, scheduler)
+        report_scroll_metrics(scheduler)
         
+        all_videos = progress.videos
+        # 保存断点，后续下载 / 保存失败时下次可以继续
+        progress.checkpoint()
         await browser.close()
         print(f"✅ 共获取 {len(all_videos)} 个收藏视频")
         return all_videos
@@ -253,301 +489,875 @@ def extract_cover_data(videos: list) -> list:
     return covers
 
 
-async def download_covers(covers: list):
-    """并发下载封面图片"""
-    import aiohttp
-    import aiofiles
-    
-    print(f"\n📷 开始下载 {len(covers)} 张封面...")
-    
-    COVERS_DIR.mkdir(parents=True, exist_ok=True)
+async def download_covers(covers: list, only_failed: bool = False):
+    """
+    并发下载封面图片到内容寻址存储（已入库且完整的跳过，失败的记录到 COVER_FAILURES_PATH）
+
+    Args:
+        covers: 封面元数据列表，下载成功的会写入 local_cover
+        only_failed: 只重试失败清单中的封面
+    """
+    store = CoverStore(COVERS_DIR)
+    failed_before = FailureManifest(COVER_FAILURES_PATH) if only_failed else None
     
-    semaphore = asyncio.Semaphore(CONCURRENCY)
-    downloaded = 0
+    jobs = []
+    existing = 0
+    for cover in covers:
+        url = cover.get("cover_url", "")
+        if not url:
+            continue
+        video_id = cover.get("id", "unknown")
+        # 按索引中的哈希判断是否已下载；旧版 covers/{id}.jpg 校验通过后迁移入库，截断的会被删除重下
+        if store.path(video_id) or store.adopt(video_id, COVERS_DIR / f"{video_id}.jpg"):
+            cover["local_cover"] = store.relative_path(video_id, PROJECT_DIR)
+            existing += 1
+            continue
+        if failed_before is not None and video_id not in failed_before:
+            continue
+        jobs.append({"id": video_id, "url": url, "cover": cover})
+    store.save()
     
-    async def download_one(session, cover):
-        nonlocal downloaded
-        async with semaphore:
-            url = cover.get("cover_url", "")
-            if not url:
-                return
-            
-            video_id = cover.get("id", "unknown")
-            save_path = COVERS_DIR / f"{video_id}.jpg"
-            
-            if save_path.exists():
-                cover["local_cover"] = f"data/covers/{video_id}.jpg"
-                downloaded += 1
-                return
-            
-            try:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                    if resp.status == 200:
-                        content = await resp.read()
-                        async with aiofiles.open(save_path, "wb") as f:
-                            await f.write(content)
-                        cover["local_cover"] = f"data/covers/{video_id}.jpg"
-                        downloaded += 1
-            except:
-                pass
+    print(f"\n📷 开始下载 {len(jobs)} 张封面（已存在 {existing} 张）...")
     
-    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [download_one(session, cover) for cover in covers]
-        await asyncio.gather(*tasks)
+    def on_success(job, size):
+        job["cover"]["local_cover"] = store.relative_path(job["id"], PROJECT_DIR)
     
-    print(f"✅ 下载完成: {downloaded}/{len(covers)}")
+    report = await download_batch(jobs, concurrency=CONCURRENCY, retries=COVER_RETRIES,
+                                  manifest_path=COVER_FAILURES_PATH, on_success=on_success, store=store)
+    print(f"✅ 下载完成: {report.describe()}")
+    if report.failed:
+        print(f"   ⚠️ {len(report.failed)} 张失败，已记录到 {COVER_FAILURES_PATH.name}，"
+              f"运行 python run.py --retry-failed 只重试失败的封面")
     return covers
 
 
+async def retry_failed_covers():
+    """只重新下载失败清单中的封面，并更新 metadata.json"""
+    covers = load_metadata()
+    if not covers or not COVER_FAILURES_PATH.exists():
+        print("✅ 没有下载失败的封面")
+        return
+    covers = await download_covers(covers, only_failed=True)
+    build_cover_thumbnails(covers)
+    save_metadata(covers)
+
+
+def build_cover_thumbnails(covers: list) -> list:
+    """为已下载的封面生成缩略图（多进程，未变化的跳过），尺寸写入封面元数据"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("⚠️ 未安装 Pillow，跳过缩略图生成（pip install Pillow）")
+        return covers
+    print("\n🖼️  生成缩略图...")
+    started = time.time()
+    result = build_thumbnails(covers, CoverStore(COVERS_DIR), PROJECT_DIR, workers=THUMB_WORKERS)
+    print(f"✅ 缩略图: 新生成 {result['generated']}, 跳过 {result['skipped']}, 失败 {result['failed']} "
+          f"({time.time() - started:.1f}s)")
+    return covers
+
+
+def verify_covers():
+    """重新校验所有封面（哈希与图片完整性），损坏的从索引移除并清空对应的 local_cover"""
+    store = CoverStore(COVERS_DIR)
+    print(f"🔍 校验 {len(store.index)} 张封面...")
+    result = store.verify()
+    broken = set(result["corrupt"]) | set(result["missing"])
+    print(f"✅ 完好 {result['ok']}, 损坏 {len(result['corrupt'])}, 丢失 {len(result['missing'])}")
+    if broken:
+        covers = load_metadata()
+        for cover in covers:
+            if cover.get("id") in broken:
+                cover["local_cover"] = ""
+                for field in STALE_LAYOUT_FIELDS:
+                    cover.pop(field, None)
+        save_metadata(covers)
+        print("   损坏 / 丢失的封面会在下次运行 python run.py --retry-failed 或重新采集时下载")
+        manifest = FailureManifest(COVER_FAILURES_PATH)
+        urls = {c.get("id"): c.get("cover_url", "") for c in covers}
+        for cover_id in broken:
+            manifest.record(cover_id, urls.get(cover_id, ""), "校验失败", 0)
+        manifest.save()
+
+
+def gc_covers():
+    """删除 metadata.json 中已不存在的视频的封面、未被引用的 blob 与残留临时文件"""
+    store = CoverStore(COVERS_DIR)
+    covers = load_metadata()
+    # 没有 metadata.json 时只清理未引用的文件，不动索引
+    result = store.gc({c.get("id") for c in covers} if covers else None)
+    print(f"🧹 移除 {result['dropped_ids']} 个失效索引, 删除 {result['removed_files']} 个文件, "
+          f"释放 {result['freed_bytes'] / (1 << 20):.1f}MB")
+
+
+# 封面内容替换后失效的布局字段（尺寸、占位色、缩略图需要重新生成）
+STALE_LAYOUT_FIELDS = ("width", "height", "aspect", "placeholder", "thumbs")
+
+
+def store_uploaded_image(data: bytes, cover_id: str = None, slot: str = None) -> str:
+    """
+    上传的图片入库：指定 cover_id 时作为该视频的封面，否则按 slot 存入 uploads
+
+    Returns:
+        相对项目目录的路径（写入 local_cover / 设置）
+
+    Raises:
+        ValueError: 图片校验失败
+    """
+    root, key = (COVERS_DIR, cover_id) if cover_id else (UPLOADS_DIR, slot)
+    with _cover_store_lock:
+        store = CoverStore(root)
+        store.put_bytes(key, data)
+        store.save()
+        return store.relative_path(key, PROJECT_DIR)
+
+
+def externalize_inline_covers(cards: list) -> int:
+    """
+    把卡片 cover_url 中内嵌的 base64 图片（旧版截帧封面）存入封面库，改为 local_cover 引用
+
+    Returns:
+        处理的卡片数（解码 / 校验失败的保持原样）
+    """
+    inline = [c for c in cards if (c.get("cover_url") or "").startswith("data:") and c.get("id")]
+    if not inline:
+        return 0
+    moved = 0
+    with _cover_store_lock:
+        store = CoverStore(COVERS_DIR)
+        for card in inline:
+            try:
+                store.put_bytes(card["id"], decode_data_url(card["cover_url"]))
+            except ValueError as e:
+                print(f"⚠️ {card['id']} 的内嵌封面无法解析: {e}")
+                continue
+            card["local_cover"] = store.relative_path(card["id"], PROJECT_DIR)
+            card["cover_url"] = ""
+            for field in STALE_LAYOUT_FIELDS:
+                card.pop(field, None)
+            moved += 1
+        store.save()
+    return moved
+
+
+def externalize_inline_ops(ops: list) -> int:
+    """补丁操作中的内嵌图片同样转存（兼容仍然提交 data URL 的旧页面）"""
+    moved = 0
+    for op in ops:
+        if not isinstance(op, dict):
+            continue
+        if op.get("op") in ("insert", "replace") and isinstance(op.get("cards"), list):
+            moved += externalize_inline_covers([c for c in op["cards"] if isinstance(c, dict)])
+        elif op.get("op") == "update" and isinstance(op.get("fields"), dict):
+            card = {**op["fields"], "id": op.get("id")}
+            if externalize_inline_covers([card]):
+                card.pop("id")
+                op["fields"] = {**{field: None for field in STALE_LAYOUT_FIELDS}, **card}
+                moved += 1
+    return moved
+
+
+def migrate_data_urls():
+    """一次性迁移：metadata 中内嵌的 base64 封面转存为文件"""
+    covers = load_metadata()
+    moved = externalize_inline_covers(covers)
+    if moved:
+        save_metadata(covers)
+    print(f"🗜️ 转存 {moved} 张内嵌封面" if moved else "✅ 没有内嵌的 base64 封面")
+
+
+def get_video_cache() -> VideoRangeCache:
+    """获取视频 Range 磁盘缓存（惰性创建，避免仅采集时也扫描缓存目录）"""
+    global _video_cache
+    with _video_cache_lock:
+        if _video_cache is None:
+            _video_cache = VideoRangeCache(VIDEO_CACHE_DIR, UPSTREAM_POOL,
+                                           max_bytes=VIDEO_CACHE_MAX_BYTES, chunk_size=VIDEO_CACHE_CHUNK)
+        return _video_cache
+
+
+def get_frame_extractor() -> FrameExtractor:
+    """获取截帧器（惰性创建工作池）"""
+    global _frame_extractor
+    with _frame_extractor_lock:
+        if _frame_extractor is None:
+            _frame_extractor = FrameExtractor(FRAME_CACHE_DIR, workers=FRAME_WORKERS, ffmpeg=FFMPEG_BINARY)
+        return _frame_extractor
+
+
+def get_frame_source_server() -> PooledHTTPServer:
+    """
+    ffmpeg 读取视频用的本机代理（惰性启动，只监听 127.0.0.1 的随机端口）
+
+    截帧请求在主服务器的工作线程中等待 ffmpeg，若 ffmpeg 也经主服务器的 /proxy_video 读取，
+    几个缩略图条请求就能占满主线程池并互相等待到超时；独立的监听线程和线程池避免这种死锁
+    """
+    global _frame_source_server
+    with _frame_extractor_lock:
+        if _frame_source_server is None:
+            _frame_source_server = PooledHTTPServer(("127.0.0.1", 0), ProxyHandler, max_workers=FRAME_SOURCE_WORKERS)
+            Thread(target=_frame_source_server.serve_forever, daemon=True).start()
+        return _frame_source_server
+
+
+def get_metadata_store():
+    """元数据仓库（接口见 postwall/repository.py）"""
+    global _metadata_store
+    with _metadata_store_lock:
+        if _metadata_store is None:
+            _metadata_store = open_repository(DATA_DIR, METADATA_BACKEND, compact_every=METADATA_COMPACT_EVERY)
+        return _metadata_store
+
+
+def load_metadata() -> list:
+    """读取全部元数据，不存在时返回空列表；返回副本，可以随意修改"""
+    return load_covers(get_metadata_store())
+
+
 def save_metadata(covers: list):
-    """保存元数据"""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    """整体替换元数据"""
+    get_metadata_store().replace([dict(cover) for cover in covers])
+    print(f"📁 元数据已保存 ({METADATA_BACKEND})")
+
+
+def resolve_share_page(share_url: str) -> dict:
+    """
+    抓取抖音分享页并提取视频信息
+
+    Args:
+        share_url: 分享链接（短链或视频页链接）
+
+    Returns:
+        视频信息字典 (id / title / author / cover_url / video_url / real_video_url)
+    """
+    # 模拟手机UA以获取简单结构；连接池自动处理重定向
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+    }
     
-    with open(METADATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(covers, f, ensure_ascii=False, indent=2)
+    # 单遍流式提取，字段齐全后不再读取剩余 HTML
+    with UPSTREAM_POOL.request('GET', share_url, headers) as response:
+        extractor = extract_share_page(response, response.geturl())
     
-    print(f"📁 元数据已保存: {METADATA_PATH}")
+    result = extractor.result()
+    if not result['id']:
+        result['id'] = f"import_{int(time.time())}"
+    return result
 
 
-def start_server_and_open_browser():
-    """启动服务器并打开浏览器"""
-    os.chdir(PROJECT_DIR)
-    
-    class ProxyHandler(SimpleHTTPRequestHandler):
-        def log_message(self, format, *args):
-            pass  # 静默输出
+# 分享链接解析结果缓存（TTL 跟随签名链接的 x-expires，并发请求合并）
+RESOLVE_CACHE = ResolveCache(resolve_share_page, RESOLVE_CACHE_PATH)
+METADATA_VIEW = MetadataView(lambda: get_metadata_store().snapshot())
+# 标题 / 作者 / 话题的倒排索引，元数据版本变化后增量同步
+SEARCH_INDEX = SearchIndex()
+# 静态文件的内容哈希 ETag 与压缩文件
+STATIC_FILES = StaticFiles(STATIC_CACHE_DIR, IMMUTABLE_PATHS)
+
+
+def sync_search_index():
+    return SEARCH_INDEX.sync(*get_metadata_store().snapshot())
+
+
+def refresh_search_index():
+    """写入元数据后在后台同步搜索索引，避免下一次搜索承担同步耗时"""
+    Thread(target=sync_search_index, daemon=True).start()
+
+
+class ProxyHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # 静默输出
+
+    def server_stopping(self) -> bool:
+        """服务器是否正在关闭（长时间的流式响应据此提前结束）"""
+        stopping = getattr(self.server, 'stopping', None)
+        return stopping is not None and stopping.is_set()
+
+    def send_json(self, data, status: int = 200):
+        """发送 JSON 响应"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_from_video_cache(self, video_url: str, headers: dict, range_header: str) -> bool:
+        """
+        通过磁盘缓存响应视频请求，命中的 chunk 用 sendfile 零拷贝发送
+
+        Returns:
+            是否已处理；False 表示上游不支持 Range，需要直接透传
+        """
+        if range_header and ',' in range_header:
+            return False  # 多段 Range 很少见，直接透传
+        cache = get_video_cache()
+        video = cache.open(video_url, headers)
+        if video is None:
+            return False
+
+        byte_range = parse_range(range_header, video.size)
+        if byte_range is None:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{video.size}')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return True
+
+        start, end = byte_range
+        if range_header:
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{video.size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', video.content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        segments = cache.segments(video, start, end, video_url, headers)
+        try:
+            for path, offset, length in segments:
+                if self.server_stopping():
+                    break
+                with open(path, 'rb') as f:
+                    self.connection.sendfile(f, offset, length)
+        except OSError as e:
+            # 响应头已发出，只能中断连接（客户端断开或回源失败）
+            if not isinstance(e, (ConnectionResetError, BrokenPipeError)):
+                print(f"❌ Video cache error: {e} for {video_url[:100]}")
+            self.close_connection = True
+        finally:
+            segments.close()
+        return True
+
+    def send_metadata_page(self):
+        """
+        /api/metadata?cursor=...&limit=200&fields=grid
+        按游标分页返回元数据，支持字段投影（fields=grid 或逗号分隔字段名）、ETag/304 与压缩
+        """
+        from urllib.parse import urlparse, parse_qs
+
+        query_string = urlparse(self.path).query
+        query = parse_qs(query_string)
+        try:
+            limit = int(query.get('limit', [DEFAULT_LIMIT])[0])
+            etag, body, encoding = METADATA_VIEW.render(
+                query_string,
+                query.get('cursor', [None])[0],
+                limit,
+                parse_fields(query.get('fields', [None])[0]),
+                self.headers.get('Accept-Encoding', ''),
+            )
+        except ValueError as e:
+            self.send_json({'error': f'Invalid parameter: {e}'}, 400)
+            return
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')  # 每次用 ETag 重新验证
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def receive_uploaded_image(self):
+        """接收图片并入库，返回 {"path": 相对路径}；元数据由前端随后通过补丁接口更新"""
+        from urllib.parse import urlparse, parse_qs
+
+        query = parse_qs(urlparse(self.path).query)
+        cover_id = query.get('id', [None])[0]
+        slot = query.get('slot', [None])[0]
+        if not cover_id and slot not in UPLOAD_SLOTS:
+            self.send_json({'error': 'Missing id or slot'}, 400)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if not 0 < length <= UPLOAD_MAX_BYTES:
+            self.send_json({'error': f'Image must be 1..{UPLOAD_MAX_BYTES} bytes'}, 413 if length else 400)
+            self.close_connection = True  # 未读取的请求体不能留在 keep-alive 连接上
+            return
+        try:
+            path = store_uploaded_image(self.rfile.read(length), cover_id, slot)
+        except ValueError as e:
+            self.send_json({'error': f'Invalid image: {e}'}, 400)
+            return
+        self.send_json({'path': path})
+
+    def frame_source(self, query: dict):
+        """
+        截帧参数：返回 (截帧器, 视频 ID, ffmpeg 读取的本机代理地址)，出错时已发送响应并返回 None
+
+        视频地址优先用 url 参数，否则取元数据中的 real_video_url；
+        ffmpeg 经专用本机代理的 /proxy_video 读取（见 get_frame_source_server），只拉取 seek 所需的字节并复用视频磁盘缓存
+        """
+        from urllib.parse import quote
+
+        extractor = get_frame_extractor()
+        if not extractor.available:
+            self.send_json({'error': 'ffmpeg not available'}, 501)
+            return None
+        video_id = query.get('id', [None])[0]
+        if not video_id:
+            self.send_json({'error': 'Missing id parameter'}, 400)
+            return None
+        video_url = query.get('url', [None])[0]
+        if not video_url:
+            cover = get_metadata_store().get(video_id) or {}
+            video_url = cover.get('real_video_url')
+        if not video_url:
+            self.send_json({'error': 'No video url for this id'}, 404)
+            return None
+        port = get_frame_source_server().server_address[1]
+        return extractor, video_id, f"http://127.0.0.1:{port}/proxy_video?url={quote(video_url, safe='')}"
+
+    def send_frame(self):
+        """/api/frame?id=...&t=秒&width=宽度[&url=...]：返回一帧 JPEG，结果按 (ID, 时间, 宽度) 永久缓存"""
+        from urllib.parse import urlparse, parse_qs
+
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            t = max(0.0, float(query.get('t', [0])[0]))
+            width = max(0, min(1920, int(query.get('width', [0])[0])))
+        except ValueError as e:
+            self.send_json({'error': f'Invalid parameter: {e}'}, 400)
+            return
+        source = self.frame_source(query)
+        if source is None:
+            return
+        extractor, video_id, source_url = source
+        try:
+            path = extractor.frame(video_id, source_url, t, width)
+        except FrameError as e:
+            self.send_json({'error': str(e)}, 422)
+            return
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_frame_strip(self):
+        """
+        /api/frame_strip?id=...&n=12&width=160[&url=...]
+        返回 {"duration", "frames": [{"t", "src"}]}：均匀分布的 n 帧缩略图，已并行解码进缓存
+        """
+        from urllib.parse import urlparse, parse_qs, urlencode
+
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            count = max(1, min(FRAME_STRIP_MAX, int(query.get('n', [12])[0])))
+            width = max(32, min(720, int(query.get('width', [160])[0])))
+        except ValueError as e:
+            self.send_json({'error': f'Invalid parameter: {e}'}, 400)
+            return
+        source = self.frame_source(query)
+        if source is None:
+            return
+        extractor, video_id, source_url = source
+        try:
+            strip = extractor.strip(video_id, source_url, count, width)
+        except FrameError as e:
+            self.send_json({'error': str(e)}, 422)
+            return
+        params = {'id': video_id, 'width': width}
+        if query.get('url'):
+            params['url'] = query['url'][0]
+        frames = [{'t': t, 'src': '/api/frame?' + urlencode(dict(params, t=t))} for t in strip['times']]
+        self.send_json({'duration': strip['duration'], 'frames': frames})
+
+    def apply_metadata_patch(self):
+        """
+        按操作日志提交前端的修改（重排 / 删除 / 按 ID 更新等，见 postwall/metadata_store.py）
+
+        返回 200 {"version"}；基准版本过期时 409 {"error": "stale", "version": 当前版本}，
+        前端需要重新加载后再提交；操作无效时 400
+        """
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            ops = payload['ops']
+            if not isinstance(ops, list):
+                raise ValueError('ops must be a list')
+            externalize_inline_ops(ops)
+            version = get_metadata_store().apply(ops, payload.get('version'))
+            refresh_search_index()
+        except StaleVersionError as e:
+            self.send_json({'error': 'stale', 'version': e.current}, 409)
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json({'error': f'Invalid patch: {e}'}, 400)
+            return
+        self.send_json({'version': version})
+
+    def resolve_batch(self, payload):
+        """
+        并发解析一批链接，每完成一个就写出一行 NDJSON，最后合并写入一次 metadata.json
+
+        payload: {"urls": [...]} 或 {"text": "包含多个分享链接的文本"}
+        """
+        if isinstance(payload, list):
+            payload = {'urls': payload}
+        urls = list(payload.get('urls') or [])
+        if payload.get('text'):
+            urls += extract_share_urls(payload['text'])
+        if not urls:
+            self.send_error(400, "Missing urls")
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        known_ids = {c.get('id') for c in get_metadata_store().snapshot()[0]}
+        added = []
+        counts = {'added': 0, 'duplicate': 0, 'error': 0}
+        client_gone = False
+        for event in resolve_batch(urls, RESOLVE_CACHE.get, known_ids, BATCH_RESOLVE_WORKERS):
+            counts[event['status']] += 1
+            if event['status'] == 'added':
+                added.append((event['index'], event['card']))
+            if client_gone:
+                continue  # 客户端已断开也要解析完并保存
+            try:
+                self.wfile.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+            except (ConnectionResetError, BrokenPipeError):
+                client_gone = True
+
+        # 单次合并写入：新卡片按输入顺序插到最前（已存在的 ID 由存储跳过）
+        store = get_metadata_store()
+        if added:
+            cards = [card for _, card in sorted(added, key=lambda x: x[0])]
+            version = store.apply([{'op': 'insert', 'index': 0, 'cards': cards}])
+            refresh_search_index()
+        else:
+            version = store.version
+
+        summary = {'status': 'done', 'total': len(urls), 'version': version, **counts}
+        if not client_gone:
+            try:
+                self.wfile.write((json.dumps(summary) + '\n').encode('utf-8'))
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+
+    def do_GET(self):
+        # API: 上游连接池统计 /api/proxy_stats
+        if self.path.startswith('/api/proxy_stats'):
+            stats = UPSTREAM_POOL.stats()
+            stats['cache'] = get_video_cache().stats()
+            self.send_json(stats)
+            return
+
+        # API: 分页元数据 /api/metadata
+        if self.path.startswith('/api/metadata'):
+            self.send_metadata_page()
+            return
+
+        # API: 搜索 /api/search?q=...&limit=50，返回按相关度排序的 ID
+        if self.path.startswith('/api/search'):
+            from urllib.parse import urlparse, parse_qs
+
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                limit = max(1, min(500, int(query.get('limit', [50])[0])))
+            except ValueError:
+                self.send_json({'error': 'Invalid limit'}, 400)
+                return
+            sync_search_index()
+            self.send_json(SEARCH_INDEX.search(query.get('q', [''])[0], limit))
+            return
+
+        # API: 服务端截帧 /api/frame_strip（缩略图条）与 /api/frame（单帧）
+        if self.path.startswith('/api/frame_strip'):
+            self.send_frame_strip()
+            return
+        if self.path.startswith('/api/frame'):
+            self.send_frame()
+            return
+
+        # 完整元数据：从仓库输出（sqlite 后端没有 metadata.json，json 后端的快照可能落后于操作日志）
+        if self.path.split('?', 1)[0] == '/data/metadata.json':
+            self.send_json(get_metadata_store().snapshot()[0])
+            return
+
+        # API: 解析缓存统计 /api/resolve_stats
+        if self.path.startswith('/api/resolve_stats'):
+            self.send_json(RESOLVE_CACHE.stats())
+            return
+
+        # API: 解析视频信息 /api/resolve_video?url=...
+        if self.path.startswith('/api/resolve_video'):
+            try:
+                from urllib.parse import urlparse, parse_qs
+                
+                query = parse_qs(urlparse(self.path).query)
+                share_url = query.get('url', [None])[0]
+                
+                if not share_url:
+                    self.send_error(400, "Missing url parameter")
+                    return
+
+                result = RESOLVE_CACHE.get(share_url)
+                
+                # 返回 JSON
+                self.send_json(result)
+                
+            except Exception as e:
+                self.send_error(500, str(e))
+            return
+
+        # 视频代理接口：/proxy_video?url=...
+        if self.path.startswith('/proxy_video'):
+            try:
+                from urllib.parse import urlparse, parse_qs
+                import urllib.error
+                
+                query = parse_qs(urlparse(self.path).query)
+                video_url = query.get('url', [None])[0]
+                
+                if not video_url:
+                    self.send_error(400, "Missing url parameter")
+                    return
 
-        def do_GET(self):
-            # API: 解析视频信息 /api/resolve_video?url=...
-            if self.path.startswith('/api/resolve_video'):
+                # 转发请求，支持 Range 请求
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                    'Referer': 'https://www.douyin.com/',
+                    'Accept': '*/*',
+                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+                }
+                
+                # 透传 Range header（HTML5 video 需要）
+                range_header = self.headers.get('Range')
+                if range_header:
+                    headers['Range'] = range_header
+                
+                # print(f"DEBUG: Proxying video: {video_url[:100]}... Range: {range_header}")
+                
                 try:
-                    from urllib.parse import urlparse, parse_qs, unquote
-                    import urllib.request
-                    import urllib.error
-                    import re
-                    import json
-                    
-                    query = parse_qs(urlparse(self.path).query)
-                    share_url = query.get('url', [None])[0]
-                    
-                    if not share_url:
-                        self.send_error(400, "Missing url parameter")
+                    # 优先走磁盘 Range 缓存，上游不支持 Range 时才透传
+                    if self.serve_from_video_cache(video_url, headers, range_header):
                         return
-
-                    # 1. 获取HTML (模拟手机UA以获取简单结构)
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-                    }
-                    
-                    req = urllib.request.Request(share_url, headers=headers)
-                    html = ""
-                    final_url = ""
                     
-                    # 自动处理重定向
-                    with urllib.request.urlopen(req) as response:
-                        html = response.read().decode('utf-8', errors='ignore')
-                        final_url = response.geturl()
-                    
-                    # 2. 提取信息
-                    result = {
-                        'id': '',
-                        'title': '未命名视频',
-                        'author': '未知作者',
-                        'cover_url': '',
-                        'video_url': final_url, # 网页链接
-                        'real_video_url': ''    # MP4链接
-                    }
-                    
-                    # 尝试从 URL 提取 ID
-                    id_match = re.search(r'/video/(\d+)', final_url)
-                    if id_match:
-                        result['id'] = id_match.group(1)
-                    else:
-                        result['id'] = f"import_{int(time.time())}"
+                    # 通过连接池复用到 CDN 的 keep-alive 连接，避免每次拖动都重新握手
+                    with UPSTREAM_POOL.request('GET', video_url, headers) as response:
+                        # 根据是否有 Range 返回不同状态码
+                        if range_header and response.status == 206:
+                            self.send_response(206)
+                            content_range = response.headers.get('Content-Range')
+                            if content_range:
+                                self.send_header('Content-Range', content_range)
+                        else:
+                            self.send_response(200)
                         
-                    # 提取标题 (title 标签通常包含)
-                    title_match = re.search(r'<title>(.*?)</title>', html)
-                    if title_match:
-                        title_text = title_match.group(1)
-                        # 去除后缀
-                        result['title'] = re.sub(r' - 抖音.*', '', title_text).strip()
+                        # 透传关键响应头
+                        self.send_header('Content-Type', response.headers.get('Content-Type', 'video/mp4'))
+                        content_length = response.headers.get('Content-Length')
+                        if content_length:
+                            self.send_header('Content-Length', content_length)
+                        self.send_header('Accept-Ranges', 'bytes')
+                        self.send_header('Access-Control-Allow-Origin', '*')
+                        self.end_headers()
                         
-                    # 提取真实视频地址 (JSON 或 src 属性)
-                    # 策略1: 查找 RENDER_DATA
-                    # 策略2: 正则查找 src
-                    
-                    # 查找包含 play_addr 或 src 的 URL，通常是 v26 或 aweme 域名
-                    # 这里的正则需要宽泛一些
-                    # 寻找 "src":"https:..." 结构
-                    src_matches = re.findall(r'"src":"(https?://[^"]+?)"', html)
-                    for src in src_matches:
-                        src = src.replace(r'\u0026', '&')
-                        if ('/video/' in src or 'aweme' in src) and '.mp3' not in src and 'avatar' not in src:
-                             result['real_video_url'] = src
-                             break
-                    
-                    # 如果没找到，尝试找 playAddr
-                    if not result['real_video_url']:
-                        play_addr_matches = re.findall(r'"playAddr":\[{"src":"(https?://[^"]+?)"', html)
-                        for src in play_addr_matches:
-                             src = src.replace(r'\u0026', '&')
-                             result['real_video_url'] = src
-                             break
-
-                    # 提取封面
-                    cover_matches = re.findall(r'"cover":"(https?://[^"]+?)"', html)
-                    if cover_matches:
-                        result['cover_url'] = cover_matches[0].replace(r'\u0026', '&')
-
-                    # 3. 返回 JSON
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps(result).encode('utf-8'))
-                    
+                        # 流式传输
+                        while not self.server_stopping():
+                            chunk = response.read(65536)  # 64KB chunks
+                            if not chunk: break
+                            try:
+                                self.wfile.write(chunk)
+                            except (ConnectionResetError, BrokenPipeError):
+                                break
+                except urllib.error.URLError as e:
+                    print(f"❌ Proxy URL Error: {e.reason} for {video_url[:100]}")
+                    self.send_error(502, f"Target URL error: {e.reason}")
                 except Exception as e:
+                    print(f"❌ Proxy request failed: {str(e)}")
                     self.send_error(500, str(e))
-                return
+                            
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+            return
 
-            # 视频代理接口：/proxy_video?url=...
-            if self.path.startswith('/proxy_video'):
-                try:
-                    from urllib.parse import urlparse, parse_qs
-                    import urllib.request
-                    
-                    query = parse_qs(urlparse(self.path).query)
-                    video_url = query.get('url', [None])[0]
-                    
-                    if not video_url:
-                        self.send_error(400, "Missing url parameter")
-                        return
+        # 如果是本地文件请求，正常处理
+        self.serve_static()
 
-                    # 转发请求，支持 Range 请求
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        'Referer': 'https://www.douyin.com/',
-                        'Accept': '*/*',
-                        'Connection': 'keep-alive',
-                        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    }
-                    
-                    # 透传 Range header（HTML5 video 需要）
-                    range_header = self.headers.get('Range')
-                    if range_header:
-                        headers['Range'] = range_header
-                    
-                    # print(f"DEBUG: Proxying video: {video_url[:100]}... Range: {range_header}")
-                    
-                    req = urllib.request.Request(video_url, headers=headers)
-                    
-                    try:
-                        with urllib.request.urlopen(req, timeout=10) as response:
-                            # 根据是否有 Range 返回不同状态码
-                            if range_header and response.status == 206:
-                                self.send_response(206)
-                                content_range = response.headers.get('Content-Range')
-                                if content_range:
-                                    self.send_header('Content-Range', content_range)
-                            else:
-                                self.send_response(200)
-                            
-                            # 透传关键响应头
-                            self.send_header('Content-Type', response.headers.get('Content-Type', 'video/mp4'))
-                            content_length = response.headers.get('Content-Length')
-                            if content_length:
-                                self.send_header('Content-Length', content_length)
-                            self.send_header('Accept-Ranges', 'bytes')
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
-                            
-                            # 流式传输
-                            while True:
-                                chunk = response.read(65536)  # 64KB chunks
-                                if not chunk: break
-                                try:
-                                    self.wfile.write(chunk)
-                                except (ConnectionResetError, BrokenPipeError):
-                                    break
-                    except urllib.error.URLError as e:
-                        print(f"❌ Proxy URL Error: {e.reason} for {video_url[:100]}")
-                        self.send_error(502, f"Target URL error: {e.reason}")
-                    except Exception as e:
-                        print(f"❌ Proxy request failed: {str(e)}")
-                        self.send_error(500, str(e))
-                                
-                except Exception as e:
-                    import traceback
-                    traceback.print_exc()
-                return
+    def do_HEAD(self):
+        self.serve_static(head_only=True)
+
+    def serve_static(self, head_only: bool = False):
+        """
+        静态文件：内容哈希 ETag / 304，哈希命名的封面永久缓存，文本资源发送预压缩文件，
+        文件内容通过 socket.sendfile（os.sendfile）由内核直接发送
+        """
+        from urllib.parse import urlsplit, unquote
 
-            # 如果是本地文件请求，正常处理
-            super().do_GET()
+        fs_path = self.translate_path(self.path)
+        if os.path.isdir(fs_path):
+            # 目录：沿用默认的补斜杠重定向 / index.html / 目录列表
+            super().do_HEAD() if head_only else super().do_GET()
+            return
+        entry = STATIC_FILES.lookup(fs_path, unquote(urlsplit(self.path).path), self.guess_type(fs_path),
+                                    self.headers.get('Accept-Encoding', ''))
+        if entry is None:
+            self.send_error(404, "File not found")
+            return
+
+        if_none_match = self.headers.get('If-None-Match')
+        if etag_matches(if_none_match, entry.etag) or (
+                not if_none_match and not_modified_since(self.headers.get('If-Modified-Since'), entry.mtime)):
+            self.send_response(304)
+            self.send_header('ETag', entry.etag)
+            self.send_header('Cache-Control', entry.cache_control)
+            if entry.vary:
+                self.send_header('Vary', entry.vary)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(fs_path))
+        self.send_header('Content-Length', str(entry.size))
+        self.send_header('ETag', entry.etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', entry.cache_control)
+        if entry.encoding:
+            self.send_header('Content-Encoding', entry.encoding)
+        if entry.vary:
+            self.send_header('Vary', entry.vary)
+        self.end_headers()
+        if head_only:
+            return
+        try:
+            with open(entry.path, 'rb') as f:
+                self.connection.sendfile(f, 0, entry.size)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+    
+    def do_POST(self):
+        # API: 保存数据到 metadata.json
+        if self.path == '/api/save_data':
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                post_data = self.rfile.read(content_length)
+                data = json.loads(post_data.decode('utf-8'))
+                
+                # 整体替换（旧版前端 / 导入数据），增量修改走 /api/metadata/patch
+                externalize_inline_covers(data)
+                version = get_metadata_store().replace(data)
+                refresh_search_index()
+                
+                print(f"💾 数据已自动保存 (版本 {version})")
+                
+                self.send_json({'success': True, 'version': version})
+            except Exception as e:
+                self.send_error(500, str(e))
+            return
         
-        def do_POST(self):
-            # API: 保存数据到 metadata.json
-            if self.path == '/api/save_data':
-                try:
-                    import json
-                    content_length = int(self.headers.get('Content-Length', 0))
-                    post_data = self.rfile.read(content_length)
-                    data = json.loads(post_data.decode('utf-8'))
-                    
-                    # 写入 metadata.json
-                    with open(METADATA_PATH, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-                    print(f"💾 数据已自动保存到 {METADATA_PATH}")
-                    
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': True}).encode('utf-8'))
-                except Exception as e:
-                    self.send_error(500, str(e))
+        # API: 增量修改 /api/metadata/patch，{"version": 基准版本, "ops": [...]}
+        if self.path == '/api/metadata/patch':
+            self.apply_metadata_patch()
+            return
+        
+        # API: 上传图片 /api/upload_image?id=视频ID（截帧封面）或 ?slot=avatar|background，请求体为图片内容
+        if self.path.startswith('/api/upload_image'):
+            self.receive_uploaded_image()
+            return
+        
+        # API: 批量解析分享链接 /api/resolve_batch，逐行返回 NDJSON
+        if self.path == '/api/resolve_batch':
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            except ValueError as e:
+                self.send_error(400, f"Invalid JSON: {e}")
                 return
-            
-            self.send_error(404, "Not Found")
+            self.resolve_batch(payload)
+            return
         
-        def do_OPTIONS(self):
-            # 处理 CORS 预检请求
-            self.send_response(200)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
+        self.send_error(404, "Not Found")
+    
+    def do_OPTIONS(self):
+        # 处理 CORS 预检请求
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+
+
+def create_server(port: int = SERVER_PORT, max_workers: int = SERVER_WORKERS, directory: str = None):
+    """
+    创建并发服务器（尚未开始监听循环）
+
+    Args:
+        port: 监听端口，0 表示随机端口
+        max_workers: 工作线程数上限
+        directory: 静态文件根目录，默认为当前工作目录
+
+    Returns:
+        PooledHTTPServer 实例
+    """
+    handler = partial(ProxyHandler, directory=directory) if directory else ProxyHandler
+    return PooledHTTPServer(("", port), handler, max_workers=max_workers)
+
+
+def start_server_and_open_browser():
+    """启动服务器并打开浏览器"""
+    os.chdir(PROJECT_DIR)
     
-    def run_server():
-        # 允许地址重用，避免重启频繁时报错
-        HTTPServer.allow_reuse_address = True
-        server = HTTPServer(("", SERVER_PORT), ProxyHandler)
-        server.serve_forever()
+    server = create_server()
     
     # 后台启动服务器
-    server_thread = Thread(target=run_server, daemon=True)
+    server_thread = Thread(target=server.serve_forever, daemon=True)
     server_thread.start()
+    refresh_search_index()  # 预先建好搜索索引
+    Thread(target=STATIC_FILES.precompress, args=(PROJECT_DIR / "frontend",), daemon=True).start()
     
     url = f"http://localhost:{SERVER_PORT}/frontend/index.html"
-    print(f"\n🌐 服务器已启动: {url}")
+    print(f"\n🌐 服务器已启动: {url} (工作线程 {SERVER_WORKERS})")
     print("   按 Ctrl+C 退出\n")
     
     # 打开浏览器
     webbrowser.open(url)
     
     # 保持运行
-    import time
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        print("\n👋 再见!")
+        print("\n⏳ 正在关闭服务器...")
+        server.graceful_shutdown(timeout=5.0)
+        if _frame_source_server is not None:
+            _frame_source_server.graceful_shutdown(timeout=1.0)
+        print("👋 再见!")
+
 
+async def main(incremental: bool = False, mode: str = SCRAPE_MODE):
+    """
+    主流程
 
-async def main():
-    """主流程"""
+    Args:
+        incremental: 增量采集，新收藏合并到已有的 metadata.json 前面
+        mode: 采集模式，capture（接口响应）或 dom（页面元素）
+    """
     print("\n" + "="*50)
     print("🎬 抖音收藏海报墙 - 全自动采集")
     print("="*50)
@@ -556,9 +1366,13 @@ async def main():
     check_dependencies()
     
     # 2. 登录并抓取收藏夹数据
-    videos = await login_and_scrape_favorites()
+    videos = await login_and_scrape_favorites(incremental=incremental, mode=mode)
     if not videos:
-        print("❌ 未获取到收藏数据")
+        if incremental:
+            print("✅ 没有新的收藏")
+            CHECKPOINT_PATH.unlink(missing_ok=True)
+        else:
+            print("❌ 未获取到收藏数据")
         return
     
     # 3. 提取封面信息（页面抓取的数据已经是简化格式）
@@ -569,11 +1383,16 @@ async def main():
         covers = extract_cover_data(videos)
     print(f"📊 提取到 {len(covers)} 个有效封面")
     
-    # 5. 下载封面
+    # 5. 下载封面并生成缩略图
     covers = await download_covers(covers)
+    build_cover_thumbnails(covers)
     
-    # 6. 保存元数据
+    # 6. 保存元数据（增量模式下新收藏放在最前面）
+    if incremental:
+        new_ids = {c.get('id') for c in covers}
+        covers = covers + [c for c in load_metadata() if c.get('id') not in new_ids]
     save_metadata(covers)
+    CHECKPOINT_PATH.unlink(missing_ok=True)  # 保存成功，删除采集断点
     
     # 7. 启动服务器并打开浏览器
     print("\n" + "="*50)
@@ -648,5 +1467,31 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "server":
         print("🚀 仅启动服务器模式")
         start_server_and_open_browser()
+    elif len(sys.argv) > 1 and sys.argv[1] == "verify":
+        verify_covers()
+    elif len(sys.argv) > 1 and sys.argv[1] == "gc":
+        gc_covers()
+    elif len(sys.argv) > 1 and sys.argv[1] == "migrate-data-urls":
+        migrate_data_urls()
+    elif len(sys.argv) > 1 and sys.argv[1] == "export-json":
+        # python run.py export-json [路径] 导出为 metadata.json 格式（默认 data/metadata.json）
+        target = Path(sys.argv[2]) if len(sys.argv) > 2 else METADATA_PATH
+        get_metadata_store().export_json(target)
+        print(f"📤 已导出到 {target}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "import-json":
+        version = get_metadata_store().import_json(sys.argv[2])
+        print(f"📥 已导入 {sys.argv[2]}（版本 {version}）")
+    elif len(sys.argv) > 1 and sys.argv[1] == "thumbs":
+        # 为已有数据补生成缩略图
+        covers = load_metadata()
+        if covers:
+            save_metadata(build_cover_thumbnails(covers))
+    elif "--retry-failed" in sys.argv:
+        # python run.py --retry-failed 只重试上次下载失败的封面
+        asyncio.run(retry_failed_covers())
     else:
-        asyncio.run(main())
+        # python run.py --incremental 只采集新增收藏；--dom 使用页面元素解析模式
+        asyncio.run(main(
+            incremental="--incremental" in sys.argv,
+            mode="dom" if "--dom" in sys.argv else SCRAPE_MODE,
+        ))
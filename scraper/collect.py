@@ -12,10 +12,12 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).parent.resolve()
 PROJECT_DIR = SCRIPT_DIR.parent
 
-# 添加外部依赖路径
+# 添加外部依赖路径；元数据仓库与 run.py 共用
 sys.path.insert(0, str(PROJECT_DIR / "external/douyin"))
+sys.path.insert(0, str(PROJECT_DIR))
 
 from config import COOKIE, MAX_ITEMS
+from postwall.repository import open_repository
 
 # 使用绝对路径解析输出目录
 OUTPUT_DIR = PROJECT_DIR / "data"
@@ -110,6 +112,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="抖音收藏夹采集")
     parser.add_argument("--cookie", type=str, help="抖音Cookie")
     parser.add_argument("--test", action="store_true", help="测试模式")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json", help="元数据存储后端")
     args = parser.parse_args()
     
     if args.test:
@@ -130,20 +133,14 @@ if __name__ == "__main__":
         ]
         covers = extract_cover_data(test_data)
         
-        output_path = Path(OUTPUT_DIR) / "metadata.json"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(covers, f, ensure_ascii=False, indent=2)
+        open_repository(OUTPUT_DIR, args.backend).replace(covers)
         
-        print(f"✅ 测试数据已生成: {output_path}")
+        print(f"✅ 测试数据已生成: {OUTPUT_DIR} ({args.backend})")
     else:
         videos = asyncio.run(collect_favorites(args.cookie))
         if videos:
             covers = extract_cover_data(videos)
             
-            output_path = Path(OUTPUT_DIR) / "metadata.json"
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(covers, f, ensure_ascii=False, indent=2)
+            open_repository(OUTPUT_DIR, args.backend).replace(covers)
             
-            print(f"📁 元数据已保存至: {output_path}")
+            print(f"📁 元数据已保存至: {OUTPUT_DIR} ({args.backend})")
@@ -1,107 +1,90 @@
 """
 封面图片批量下载脚本
 """
-import os
-import json
+import sys
 import asyncio
-import aiohttp
-import aiofiles
 from pathlib import Path
 from urllib.parse import urlparse
 
-from config import COVERS_DIR, OUTPUT_DIR
+# 获取脚本所在目录
+SCRIPT_DIR = Path(__file__).parent.resolve()
+PROJECT_DIR = SCRIPT_DIR.parent
 
+# 与 run.py 共用下载引擎
+sys.path.insert(0, str(PROJECT_DIR))
 
-async def download_cover(session: aiohttp.ClientSession, url: str, save_path: Path) -> bool:
-    """
-    下载单张封面图片
-    
-    Args:
-        session: aiohttp会话
-        url: 图片URL
-        save_path: 保存路径
-        
-    Returns:
-        是否成功
-    """
-    try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-            if resp.status == 200:
-                content = await resp.read()
-                async with aiofiles.open(save_path, "wb") as f:
-                    await f.write(content)
-                return True
-            else:
-                print(f"⚠️ 下载失败 [{resp.status}]: {url}")
-                return False
-    except Exception as e:
-        print(f"❌ 下载异常: {e}")
-        return False
+from config import COVERS_DIR, OUTPUT_DIR
+from postwall.cover_download import FailureManifest, download_batch
+from postwall.cover_store import CoverStore
+from postwall.metadata_store import MetadataStore
+from postwall.repository import open_repository, load_covers
 
 
-async def batch_download_covers(metadata_path: str = None, concurrency: int = 10):
+async def batch_download_covers(metadata_path: str = None, concurrency: int = 10,
+                                retries: int = 3, only_failed: bool = False, backend: str = "json"):
     """
     批量下载封面图片
     
     Args:
-        metadata_path: 元数据JSON路径
+        metadata_path: 元数据JSON路径，默认使用 OUTPUT_DIR 下的元数据仓库
         concurrency: 并发下载数
+        retries: 429/5xx/网络错误的最大重试次数
+        only_failed: 只重试失败清单（OUTPUT_DIR/cover_failures.json）中的封面
+        backend: 元数据仓库后端（json / sqlite），指定 metadata_path 时忽略
     """
-    metadata_path = metadata_path or str(Path(OUTPUT_DIR) / "metadata.json")
+    manifest_path = Path(OUTPUT_DIR) / "cover_failures.json"
     
-    if not os.path.exists(metadata_path):
-        print(f"❌ 元数据文件不存在: {metadata_path}")
+    if metadata_path:
+        repo = MetadataStore(metadata_path, Path(metadata_path).with_suffix(".oplog"))
+    else:
+        repo = open_repository(OUTPUT_DIR, backend)
+    covers = load_covers(repo)
+    if not covers:
+        print("❌ 没有元数据")
         print("   请先运行 collect.py 采集数据")
         return
     
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        covers = json.load(f)
-    
-    print(f"📷 准备下载 {len(covers)} 张封面...")
-    
     covers_dir = Path(COVERS_DIR)
-    covers_dir.mkdir(parents=True, exist_ok=True)
+    store = CoverStore(covers_dir)
+    base_dir = Path(OUTPUT_DIR).parent
+    failed_before = FailureManifest(manifest_path) if only_failed else None
     
-    # 创建信号量控制并发
-    semaphore = asyncio.Semaphore(concurrency)
+    jobs = []
+    for cover in covers:
+        url = cover.get("cover_url", "")
+        if not url:
+            continue
+        
+        video_id = cover.get("id", "unknown")
+        
+        # 跳过已入库的封面（按哈希索引）；旧版按 ID 命名的文件校验后迁移入库
+        ext = urlparse(url).path.split(".")[-1] or "jpg"
+        if len(ext) > 5:  # 防止URL没有扩展名
+            ext = "jpg"
+        if store.path(video_id) or store.adopt(video_id, covers_dir / f"{video_id}.{ext}"):
+            cover["local_cover"] = store.relative_path(video_id, base_dir)
+            continue
+        if failed_before is not None and video_id not in failed_before:
+            continue
+        jobs.append({"id": video_id, "url": url, "cover": cover})
+    store.save()
     
-    async def download_with_semaphore(session, cover):
-        async with semaphore:
-            url = cover.get("cover_url", "")
-            if not url:
-                return None
-            
-            # 生成文件名
-            video_id = cover.get("id", "unknown")
-            ext = urlparse(url).path.split(".")[-1] or "jpg"
-            if len(ext) > 5:  # 防止URL没有扩展名
-                ext = "jpg"
-            save_path = covers_dir / f"{video_id}.{ext}"
-            
-            # 跳过已存在的文件
-            if save_path.exists():
-                return cover
-            
-            success = await download_cover(session, url, save_path)
-            if success:
-                cover["local_cover"] = str(save_path.relative_to(Path(OUTPUT_DIR).parent))
-                return cover
-            return None
+    print(f"📷 准备下载 {len(jobs)} 张封面...")
     
-    # 并发下载
-    connector = aiohttp.TCPConnector(limit=concurrency)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [download_with_semaphore(session, cover) for cover in covers]
-        results = await asyncio.gather(*tasks)
+    def on_success(job, size):
+        job["cover"]["local_cover"] = store.relative_path(job["id"], base_dir)
     
-    # 更新元数据（添加本地路径）
-    updated_covers = [r for r in results if r is not None]
+    report = await download_batch(jobs, concurrency=concurrency, retries=retries,
+                                  manifest_path=manifest_path, on_success=on_success, store=store)
     
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(updated_covers, f, ensure_ascii=False, indent=2)
+    # 更新元数据（添加本地路径；失败的封面保留在元数据中，下次可以重试）
+    repo.replace(covers)
     
-    success_count = len([r for r in results if r is not None])
-    print(f"✅ 下载完成: {success_count}/{len(covers)}")
+    print(f"✅ 下载完成: {report.describe()}")
+    for video_id, error in list(report.failed.items())[:10]:
+        print(f"   ⚠️ {video_id}: {error}")
+    if report.failed:
+        print(f"   失败清单: {manifest_path}，使用 --retry-failed 只重试失败项")
     print(f"📁 封面保存于: {covers_dir}")
 
 
@@ -111,6 +94,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="批量下载封面")
     parser.add_argument("--input", type=str, help="元数据JSON路径")
     parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--retries", type=int, default=3, help="失败重试次数")
+    parser.add_argument("--retry-failed", action="store_true", help="只重试上次失败的封面")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json", help="元数据存储后端")
     args = parser.parse_args()
     
-    asyncio.run(batch_download_covers(args.input, args.concurrency))
+    asyncio.run(batch_download_covers(args.input, args.concurrency, args.retries, args.retry_failed,
+                                      args.backend))
@@ -0,0 +1,84 @@
+"""
+上游连接池测试：连接复用、空闲连接淘汰、复用已被 CDN 关闭的连接时重试
+使用 benchmarks/fake_cdn.py 作为本地 CDN
+
+用法:
+    python -m unittest discover tests
+"""
+import sys
+import time
+import unittest
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(PROJECT_DIR / "benchmarks"))
+
+from fake_cdn import FakeCDN  # noqa: E402
+from postwall.upstream import UpstreamPool  # noqa: E402
+
+VIDEO = bytes(range(256)) * 1024  # 256KB
+
+
+class UpstreamPoolTest(unittest.TestCase):
+
+    def start_cdn(self, **kwargs) -> str:
+        cdn = FakeCDN({"/video.mp4": VIDEO}, **kwargs).start()
+        self.addCleanup(cdn.stop)
+        self.cdn = cdn
+        return f"{cdn.base_url}/video.mp4"
+
+    def fetch(self, pool, url, start, end) -> bytes:
+        with pool.request("GET", url, {"Range": f"bytes={start}-{end}"}) as response:
+            self.assertEqual(response.status, 206)
+            return response.read()
+
+    def test_reuses_connection(self):
+        url = self.start_cdn()
+        pool = UpstreamPool()
+        self.addCleanup(pool.close)
+        for start in (0, 1000, 70000, 200000):
+            self.assertEqual(self.fetch(pool, url, start, start + 4095), VIDEO[start:start + 4096])
+
+        stats = pool.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 3))
+        self.assertEqual(len(self.cdn.connections), 1)
+        self.assertEqual(stats["idle_connections"], 1)
+
+    def test_unread_response_is_not_reused(self):
+        url = self.start_cdn()
+        pool = UpstreamPool()
+        self.addCleanup(pool.close)
+        with pool.request("GET", url, {"Range": "bytes=0-"}) as response:
+            response.read(100)  # 客户端中途拖动，响应体没有读完
+        self.assertEqual(pool.stats()["idle_connections"], 0)
+        self.assertEqual(self.fetch(pool, url, 0, 99), VIDEO[:100])
+        self.assertEqual(pool.stats()["misses"], 2)
+
+    def test_evicts_idle_connections(self):
+        url = self.start_cdn()
+        pool = UpstreamPool(idle_timeout=0.05)
+        self.addCleanup(pool.close)
+        self.fetch(pool, url, 0, 99)
+        time.sleep(0.1)
+        self.fetch(pool, url, 100, 199)
+
+        stats = pool.stats()
+        self.assertEqual(stats["evicted"], 1)
+        self.assertEqual((stats["misses"], stats["hits"]), (2, 0))
+
+    def test_retries_stale_connection(self):
+        url = self.start_cdn(keep_alive=False)
+        pool = UpstreamPool()
+        self.addCleanup(pool.close)
+        self.fetch(pool, url, 0, 99)
+        time.sleep(0.05)  # 等 CDN 关闭连接
+        self.assertEqual(self.fetch(pool, url, 500, 599), VIDEO[500:600])
+
+        stats = pool.stats()
+        self.assertEqual(stats["stale_retries"], 1)
+        self.assertEqual((stats["misses"], stats["hits"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()